@@ -0,0 +1 @@
+"""Бенчмарки инференса и обучения ForecastMark."""
@@ -0,0 +1,94 @@
+"""Общие утилиты бенчмарков: метрики, запись результатов, сравнение с базой."""
+
+import json
+import logging
+import platform
+import sys
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Сохранённые базовые результаты (по одному JSON на бенчмарк)
+BASELINES_DIR: Path = Path(__file__).resolve().parent / "baselines"
+
+# Допустимое ухудшение метрики относительно базы, доля
+DEFAULT_TOLERANCE: float = 0.25
+
+# Разница меньше этой (в единицах метрики) — шум, а не регрессия: стадии
+# в несколько миллисекунд легко «ухудшаются» на десятки процентов
+NOISE_FLOOR: dict[str, float] = {"s": 0.05, "ms": 0.5, "us": 5.0, "MB": 10.0}
+
+
+@dataclass
+class Metric:
+    """Значение метрики бенчмарка."""
+    value: float
+    unit: str
+    higher_is_better: bool = False
+
+
+def percentiles(samples: Sequence[float], scale: float = 1.0) -> dict[str, float]:
+    """p50 и p99 выборки, умноженные на ``scale`` (например, 1e6 для мкс)."""
+    values = np.asarray(samples, dtype=np.float64) * scale
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p99": float(np.percentile(values, 99)),
+    }
+
+
+def build_report(benchmark: str, metrics: dict[str, Metric], params: dict) -> dict:
+    """Собирает отчёт бенчмарка в JSON-совместимый словарь."""
+    return {
+        "benchmark": benchmark,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": params,
+        "metrics": {name: asdict(metric) for name, metric in metrics.items()},
+    }
+
+
+def write_report(report: dict, output: Optional[Path]) -> None:
+    """Печатает отчёт в stdout или пишет его в файл."""
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output is None:
+        print(text)
+    else:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(text + "\n", encoding="utf-8")
+        logger.info("Результаты записаны: %s", output)
+
+
+def compare_with_baseline(
+    report: dict, baseline_path: Path, tolerance: float = DEFAULT_TOLERANCE
+) -> list[str]:
+    """Сравнивает отчёт с базовым и возвращает описания регрессий.
+
+    Регрессия — метрика хуже базовой больше чем на ``tolerance`` (в нужную
+    для метрики сторону) и больше чем на NOISE_FLOOR её единиц. Метрики,
+    которых нет в одном из отчётов, пропускаются.
+    """
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    regressions = []
+    for name, current in report["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None or not base["value"]:
+            continue
+        ratio = current["value"] / base["value"]
+        worse = ratio < 1 - tolerance if current["higher_is_better"] else ratio > 1 + tolerance
+        if abs(current["value"] - base["value"]) < NOISE_FLOOR.get(current["unit"], 0.0):
+            worse = False
+        logger.info(
+            "%-28s %12.3f %-6s база %12.3f (%+.0f%%)%s",
+            name, current["value"], current["unit"], base["value"],
+            (ratio - 1) * 100, "  ← регрессия" if worse else "",
+        )
+        if worse:
+            regressions.append(
+                f"{name}: {current['value']:.3f} {current['unit']} "
+                f"(база {base['value']:.3f}, допуск {tolerance:.0%})"
+            )
+    return regressions
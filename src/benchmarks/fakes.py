@@ -0,0 +1,44 @@
+"""Поддельные объекты Telethon для прогона обработчиков без сети."""
+
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+
+@dataclass
+class SentMessage:
+    """Сообщение, «отправленное» ботом."""
+    chat_id: int
+    text: str
+    buttons: Any = None
+
+
+@dataclass
+class FakeClient:
+    """Клиент, который запоминает отправленные сообщения вместо отправки."""
+    sent: list[SentMessage] = field(default_factory=list)
+
+    async def send_message(
+        self, entity: int, message: str, buttons: Any = None, **kwargs: Any
+    ) -> SentMessage:
+        sent = SentMessage(chat_id=entity, text=message, buttons=buttons)
+        self.sent.append(sent)
+        return sent
+
+
+@dataclass
+class FakeEvent:
+    """Входящее сообщение NewMessage с полями, которые читают обработчики."""
+    client: FakeClient
+    sender_id: int
+    text: str
+    chat_id: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.chat_id is None:
+            self.chat_id = self.sender_id
+
+    async def reply(self, message: str, buttons: Any = None, **kwargs: Any) -> SentMessage:
+        return await self.client.send_message(self.chat_id, message, buttons=buttons, **kwargs)
+
+    async def respond(self, message: str, buttons: Any = None, **kwargs: Any) -> SentMessage:
+        return await self.client.send_message(self.chat_id, message, buttons=buttons, **kwargs)
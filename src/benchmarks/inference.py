@@ -0,0 +1,302 @@
+"""Бенчмарк инференса: MarkPredictor и полный диалог обработчиков бота.
+
+Запуск (офлайн, на артефактах из models/):
+
+    python -m src.benchmarks.inference
+    python -m src.benchmarks.inference --concurrency 50 --output results.json
+    python -m src.benchmarks.inference --update-baseline
+
+При расхождении с базой больше допуска процесс завершается с кодом 1.
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from src.config import (
+    BASE_DIR,
+    MODEL_PATH,
+    ENCODERS_PATH,
+    MODEL_BUNDLE_PATH,
+    FREQUENCY_MIN,
+    FREQUENCY_MAX,
+)
+from src.benchmarks.common import (
+    BASELINES_DIR,
+    DEFAULT_TOLERANCE,
+    Metric,
+    percentiles,
+    build_report,
+    write_report,
+    compare_with_baseline,
+)
+from src.benchmarks.fakes import FakeClient, FakeEvent
+from src.bot import handlers
+from src.bot.inference import InferenceQueue
+from src.bot.sessions import MemorySessionStore
+from src.model.predictor import MarkPredictor
+
+logger = logging.getLogger(__name__)
+
+BASELINE_PATH: Path = BASELINES_DIR / "inference.json"
+
+
+# ----- Входные данные -----
+
+def _random_inputs(predictor: MarkPredictor, n: int, seed: int) -> list[dict]:
+    """Случайные входы из словарей модели и диапазона частот бота."""
+    rng = random.Random(seed)
+    return [
+        {
+            "tier": rng.choice(predictor.available_tiers),
+            "frequency_day": rng.randint(FREQUENCY_MIN, FREQUENCY_MAX),
+            "frequency_day_o": rng.randint(FREQUENCY_MIN, FREQUENCY_MAX),
+            "like_drink_f": rng.choice(predictor.available_like_drinks),
+            "often_drink_f": rng.choice(predictor.available_often_drinks),
+        }
+        for _ in range(n)
+    ]
+
+
+def _load_predictor(table_dir: Optional[str] = None, cache_size: int = 0) -> MarkPredictor:
+    """Предиктор как в боте (бандл и таблица) или «голая» модель без ускорений."""
+    if table_dir is not None and MODEL_BUNDLE_PATH.exists():
+        return MarkPredictor.from_bundle(
+            str(MODEL_BUNDLE_PATH),
+            table_path=str(Path(table_dir) / "prediction_table.npz"),
+            precompute=True,
+            cache_size=cache_size,
+        )
+    return MarkPredictor(str(MODEL_PATH), str(ENCODERS_PATH), cache_size=cache_size)
+
+
+# ----- Предиктор -----
+
+def bench_predict_latency(predictor: MarkPredictor, inputs: list[dict]) -> dict[str, float]:
+    """Задержка одиночного predict(), в микросекундах."""
+    for features in inputs[:100]:
+        predictor.predict(**features)
+
+    samples = []
+    for features in inputs:
+        start = time.perf_counter()
+        predictor.predict(**features)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples, scale=1e6)
+
+
+def bench_batch_throughput(
+    predictor: MarkPredictor, inputs: list[dict], batch_size: int
+) -> float:
+    """Пропускная способность predict_many(), строк в секунду."""
+    frame = pd.DataFrame(inputs)
+    batches = [frame.iloc[start:start + batch_size] for start in range(0, len(frame), batch_size)]
+    predictor.predict_many(batches[0])
+
+    start = time.perf_counter()
+    for batch in batches:
+        predictor.predict_many(batch)
+    return len(frame) / (time.perf_counter() - start)
+
+
+def bench_cold_start(use_bundle: bool, repeats: int) -> float:
+    """Медианное время от запуска интерпретатора до первого предсказания, с.
+
+    Первое предсказание идёт через predict_many() на списках, как в боте.
+    """
+    if use_bundle:
+        load = f"MarkPredictor.from_bundle({str(MODEL_BUNDLE_PATH)!r})"
+    else:
+        load = f"MarkPredictor({str(MODEL_PATH)!r}, {str(ENCODERS_PATH)!r})"
+    code = (
+        f"from src.model.predictor import MarkPredictor; p = {load}; "
+        "p.predict_many({'tier': p.available_tiers[:1], 'frequency_day': [2], "
+        "'frequency_day_o': [2], 'like_drink_f': p.available_like_drinks[:1], "
+        "'often_drink_f': p.available_often_drinks[:1]})"
+    )
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=BASE_DIR, check=True, capture_output=True,
+        )
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+# ----- Диалог обработчиков -----
+
+def _dialog_script(predictor: MarkPredictor, rng: random.Random) -> list[str]:
+    """Сообщения пользователя: /start и ответы на пять шагов."""
+    return [
+        "/start",
+        rng.choice(predictor.available_tiers),
+        rng.choice(predictor.available_like_drinks),
+        str(rng.randint(FREQUENCY_MIN, FREQUENCY_MAX)),
+        rng.choice(predictor.available_often_drinks),
+        str(rng.randint(FREQUENCY_MIN, FREQUENCY_MAX)),
+    ]
+
+
+async def _run_dialog(
+    user_id: int, script: list[str], semaphore: asyncio.Semaphore, latencies: list[float]
+) -> bool:
+    """Прогоняет один диалог; True, если бот выдал предсказание."""
+    client = FakeClient()
+    async with semaphore:
+        for text in script:
+            event = FakeEvent(client=client, sender_id=user_id, text=text)
+            start = time.perf_counter()
+            # Как в bot.py: /start — отдельный обработчик, остальное — диспетчер
+            if text == "/start":
+                await handlers.handle_start(event)
+            else:
+                await handlers.handle_message(event)
+            latencies.append(time.perf_counter() - start)
+    return any("Результат предсказания" in sent.text for sent in client.sent)
+
+
+async def bench_dialog(
+    predictor: MarkPredictor,
+    users: int,
+    concurrency: int,
+    use_queue: bool,
+    seed: int,
+    workers: int = 0,
+) -> dict[str, float]:
+    """Полные диалоги ``users`` пользователей, не больше ``concurrency`` одновременно."""
+    queue = InferenceQueue(predictor, workers=workers) if use_queue else None
+    if queue is not None:
+        queue.start()
+        await queue.wait_ready()
+    handlers.init_handlers(predictor, queue, MemorySessionStore())
+
+    rng = random.Random(seed)
+    scripts = [_dialog_script(predictor, rng) for _ in range(users)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    start = time.perf_counter()
+    try:
+        completed = await asyncio.gather(*(
+            _run_dialog(user_id, script, semaphore, latencies)
+            for user_id, script in enumerate(scripts, start=1)
+        ))
+    finally:
+        if queue is not None:
+            await queue.stop()
+    elapsed = time.perf_counter() - start
+
+    if not all(completed):
+        raise RuntimeError(f"Не завершено диалогов: {completed.count(False)} из {users}")
+    return {
+        **percentiles(latencies, scale=1e3),
+        "dialogs_per_s": users / elapsed,
+    }
+
+
+# ----- Запуск -----
+
+def run(args: argparse.Namespace) -> dict:
+    """Выполняет все замеры и возвращает отчёт."""
+    metrics: dict[str, Metric] = {}
+
+    with tempfile.TemporaryDirectory() as table_dir:
+        served = _load_predictor(table_dir, cache_size=args.cache_size)
+        inputs = _random_inputs(served, args.iterations, args.seed)
+
+        latency = bench_predict_latency(served, inputs)
+        metrics["predict_p50_us"] = Metric(latency["p50"], "us")
+        metrics["predict_p99_us"] = Metric(latency["p99"], "us")
+        logger.info("predict() как в боте: p50 %.1f мкс, p99 %.1f мкс", latency["p50"], latency["p99"])
+
+        dialog = asyncio.run(bench_dialog(
+            served, args.users, args.concurrency, not args.no_queue, args.seed, args.workers
+        ))
+        metrics["dialog_message_p50_ms"] = Metric(dialog["p50"], "ms")
+        metrics["dialog_message_p99_ms"] = Metric(dialog["p99"], "ms")
+        metrics["dialogs_per_s"] = Metric(dialog["dialogs_per_s"], "1/s", higher_is_better=True)
+        logger.info(
+            "Диалоги: %.0f/с, сообщение p50 %.2f мс, p99 %.2f мс",
+            dialog["dialogs_per_s"], dialog["p50"], dialog["p99"],
+        )
+
+    bare = _load_predictor()
+    latency = bench_predict_latency(bare, inputs)
+    metrics["predict_model_p50_us"] = Metric(latency["p50"], "us")
+    metrics["predict_model_p99_us"] = Metric(latency["p99"], "us")
+    logger.info("predict() через модель: p50 %.1f мкс, p99 %.1f мкс", latency["p50"], latency["p99"])
+
+    throughput = bench_batch_throughput(bare, inputs, args.batch_size)
+    metrics["batch_rows_per_s"] = Metric(throughput, "rows/s", higher_is_better=True)
+    logger.info("predict_many() батчами по %d: %.0f строк/с", args.batch_size, throughput)
+
+    metrics["cold_start_s"] = Metric(bench_cold_start(False, args.cold_repeats), "s")
+    if MODEL_BUNDLE_PATH.exists():
+        metrics["cold_start_bundle_s"] = Metric(bench_cold_start(True, args.cold_repeats), "s")
+    logger.info(
+        "Холодный старт: %s",
+        ", ".join(f"{name} {metrics[name].value:.3f} с" for name in metrics if name.startswith("cold")),
+    )
+
+    return build_report("inference", metrics, {
+        key: value for key, value in vars(args).items()
+        if key not in ("output", "baseline", "update_baseline")
+    })
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк инференса ForecastMark")
+    parser.add_argument("--iterations", type=int, default=5000, help="вызовов predict()")
+    parser.add_argument("--batch-size", type=int, default=1024, help="строк в батче predict_many()")
+    parser.add_argument("--users", type=int, default=500, help="диалогов в прогоне обработчиков")
+    parser.add_argument("--concurrency", type=int, default=20, help="одновременных диалогов")
+    parser.add_argument("--no-queue", action="store_true", help="без очереди инференса")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="процессов инференса в очереди (0 — пул потоков)")
+    parser.add_argument("--cache-size", type=int, default=0, help="кэш предсказаний (0 — без кэша)")
+    parser.add_argument("--cold-repeats", type=int, default=3, help="повторов холодного старта")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="куда записать JSON (по умолчанию stdout)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true", help="сохранить результат как базу")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    write_report(report, args.output)
+
+    if args.update_baseline:
+        write_report(report, args.baseline)
+        return 0
+    if not args.baseline.exists():
+        logger.warning("Базовых результатов нет: %s", args.baseline)
+        return 0
+
+    regressions = compare_with_baseline(report, args.baseline, args.tolerance)
+    for regression in regressions:
+        logger.error("Регрессия: %s", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    # Логи предиктора и обработчиков на каждый запрос исказили бы замеры
+    logging.getLogger("src.bot").setLevel(logging.WARNING)
+    logging.getLogger("src.model").setLevel(logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""Бенчмарк обучения: стадии ModelTrainer.run на синтетических датасетах.
+
+Датасеты генерируются по схеме data/drinks.csv: категориальные колонки
+выбираются из реальных строк (словари как в проде), частоты и балл —
+случайные, с «грязными» значениями как в опросе. Каждый размер прогоняется
+в отдельном процессе, чтобы пиковый RSS относился только к нему.
+
+    python -m src.benchmarks.training
+    python -m src.benchmarks.training --rows 1000000 10000000 --chunksize 1000000
+    python -m src.benchmarks.training --rows 100000 --profile prof/
+    python -m src.benchmarks.training --rows 100000 --py-spy prof/
+"""
+
+import argparse
+import cProfile
+import functools
+import json
+import logging
+import math
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import BASE_DIR, DATASET_PATH, FREQUENCY_MAX, SEARCH_MODE, TRAIN_WORKERS
+from src.benchmarks.common import (
+    BASELINES_DIR,
+    DEFAULT_TOLERANCE,
+    Metric,
+    build_report,
+    write_report,
+    compare_with_baseline,
+)
+from src.model.trainer import ModelTrainer
+
+logger = logging.getLogger(__name__)
+
+BASELINE_PATH: Path = BASELINES_DIR / "training.json"
+
+# Стадии пайплайна, которые замеряются (вложенные вызовы учитываются отдельно)
+STAGES: tuple[str, ...] = (
+    "load_data",
+    "encode_features",
+    "split_data",
+    "build_feature_cache",
+    "train_with_kfold",
+    "train_with_halving",
+    "train_external_memory",
+    "evaluate",
+    "save",
+)
+
+# Колонки, которые берутся из реальных строк целиком (сохраняет связь
+# «сырой ответ → нормализованная категория»)
+_SAMPLED_COLUMNS: list[str] = [
+    "tier", "like_drink", "often_drink", "like_drink_f", "often_drink_f",
+]
+
+# Строк в одной записываемой части CSV
+_WRITE_CHUNK_ROWS: int = 1_000_000
+
+
+# ----- Синтетические данные -----
+
+def generate_dataset(path: Path, n_rows: int, seed: int = 0) -> Path:
+    """Пишет синтетический CSV со схемой data/drinks.csv частями."""
+    source = pd.read_csv(DATASET_PATH)
+    rng = np.random.default_rng(seed)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for start in range(0, n_rows, _WRITE_CHUNK_ROWS):
+        size = min(_WRITE_CHUNK_ROWS, n_rows - start)
+        rows = rng.integers(0, len(source), size)
+        chunk = source[_SAMPLED_COLUMNS].iloc[rows].reset_index(drop=True)
+
+        # Частоты — в основном 1–3 раза в день, как у реальных ответов
+        chunk["frequency_day"] = np.minimum(rng.poisson(2.5, size), FREQUENCY_MAX)
+        chunk["frequency_day_o"] = np.minimum(rng.poisson(3.0, size), FREQUENCY_MAX)
+
+        mark = np.clip(rng.normal(4.0, 0.5, size) - 0.03 * chunk["frequency_day"], 2.0, 5.0)
+        mark_text = pd.Series(np.round(mark, 2)).astype(str)
+        # Часть баллов — с запятой или пустые, как в форме опроса
+        comma = rng.random(size) < 0.1
+        mark_text[comma] = mark_text[comma].str.replace(".", ",", regex=False)
+        mark_text[rng.random(size) < 0.01] = ""
+        chunk["mark"] = mark_text
+
+        money = rng.integers(1, 20, size) * 10_000.0
+        chunk["money"] = np.where(rng.random(size) < 0.2, money, np.nan)
+        chunk["timestamp_unix"] = 1759337394.0 + rng.uniform(0, 86_400 * 30, size).round()
+
+        chunk[source.columns].to_csv(
+            path, mode="w" if start == 0 else "a", header=start == 0, index=False
+        )
+
+    logger.info("Синтетический датасет: %s, %d строк", path, n_rows)
+    return path
+
+
+# ----- Замер стадий -----
+
+def _peak_rss_mb() -> float:
+    """Пиковый RSS процесса, МБ (ru_maxrss в Linux — в КБ, в macOS — в байтах)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageTimer:
+    """Оборачивает методы тренера и копит время по стадиям.
+
+    ``wall_s`` — полное время стадии, ``self_s`` — без вложенных замеряемых
+    стадий (split_data сам вызывает encode_features).
+    """
+
+    def __init__(self) -> None:
+        self.stages: dict[str, dict[str, float]] = {}
+        self._children: list[float] = []
+
+    def instrument(self, trainer: ModelTrainer) -> None:
+        for name in STAGES:
+            setattr(trainer, name, self._wrap(name, getattr(trainer, name)))
+
+    def _wrap(self, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(method)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            self._children.append(0.0)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = self._children.pop()
+                if self._children:
+                    self._children[-1] += elapsed
+                stage = self.stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "self_s": 0.0})
+                stage["calls"] += 1
+                stage["wall_s"] += elapsed
+                stage["self_s"] += elapsed - children
+                stage["peak_rss_mb"] = _peak_rss_mb()
+        return timed
+
+
+def measure(dataset: Path, args: argparse.Namespace, profile: Optional[Path]) -> dict[str, Any]:
+    """Прогоняет ModelTrainer.run на датасете и возвращает замеры стадий."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        trainer = ModelTrainer(
+            dataset_path=str(dataset),
+            n_workers=args.workers,
+            search_mode=args.search_mode,
+            chunksize=args.chunksize,
+            models_dir=Path(work_dir) / "models",
+            cache_dir=Path(work_dir) / "cache",
+        )
+        timer = StageTimer()
+        timer.instrument(trainer)
+
+        profiler = cProfile.Profile() if profile is not None else None
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        trainer.run()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile)
+        wall = time.perf_counter() - start
+
+    return {
+        "wall_s": wall,
+        "peak_rss_mb": _peak_rss_mb(),
+        "dataset_rows": trainer.dataset_rows,
+        "stages": timer.stages,
+    }
+
+
+# ----- Запуск -----
+
+def _run_size(n_rows: int, args: argparse.Namespace, data_dir: Path) -> dict[str, Any]:
+    """Генерирует (или переиспользует) датасет и меряет его в отдельном процессе."""
+    dataset = data_dir.resolve() / f"drinks_{n_rows}_{args.seed}.csv"
+    if not dataset.exists():
+        generate_dataset(dataset, n_rows, args.seed)
+
+    command = [sys.executable, "-m", "src.benchmarks.training", "--measure", str(dataset)]
+    command += ["--workers", str(args.workers), "--search-mode", args.search_mode]
+    if args.chunksize is not None:
+        command += ["--chunksize", str(args.chunksize)]
+    if args.profile is not None:
+        args.profile.mkdir(parents=True, exist_ok=True)
+        command += ["--profile-file", str(args.profile.resolve() / f"train_{n_rows}.prof")]
+    if args.py_spy is not None:
+        if shutil.which("py-spy") is None:
+            raise RuntimeError("py-spy не найден в PATH")
+        args.py_spy.mkdir(parents=True, exist_ok=True)
+        output = args.py_spy.resolve() / f"train_{n_rows}.speedscope.json"
+        command = ["py-spy", "record", "--format", "speedscope", "-o", str(output), "--"] + command
+
+    logger.info("Обучение на %d строках...", n_rows)
+    completed = subprocess.run(
+        command, cwd=BASE_DIR, check=True, stdout=subprocess.PIPE, text=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    logger.info(
+        "%d строк: %.2f с, пиковый RSS %.0f МБ; %s",
+        n_rows, result["wall_s"], result["peak_rss_mb"],
+        ", ".join(f"{name} {stage['self_s']:.2f} с" for name, stage in result["stages"].items()),
+    )
+    return result
+
+
+def _log_scaling(results: dict[int, dict[str, Any]]) -> None:
+    """Эмпирический показатель роста времени: t ∝ rows^k между соседними размерами."""
+    sizes = sorted(results)
+    for small, large in zip(sizes, sizes[1:]):
+        k = math.log(results[large]["wall_s"] / results[small]["wall_s"]) / math.log(large / small)
+        logger.info("Рост времени %d → %d строк: t ∝ rows^%.2f", small, large, k)
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Прогоняет все размеры датасета и собирает отчёт."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = args.data_dir if args.data_dir is not None else Path(tmp_dir)
+        results = {n_rows: _run_size(n_rows, args, data_dir) for n_rows in args.rows}
+    _log_scaling(results)
+
+    metrics: dict[str, Metric] = {}
+    for n_rows, result in results.items():
+        metrics[f"rows_{n_rows}_wall_s"] = Metric(result["wall_s"], "s")
+        metrics[f"rows_{n_rows}_peak_rss_mb"] = Metric(result["peak_rss_mb"], "MB")
+        for name, stage in result["stages"].items():
+            metrics[f"rows_{n_rows}_{name}_s"] = Metric(stage["self_s"], "s")
+
+    report = build_report("training", metrics, {
+        "rows": args.rows,
+        "seed": args.seed,
+        "workers": args.workers,
+        "search_mode": args.search_mode,
+        "chunksize": args.chunksize,
+    })
+    report["runs"] = {str(n_rows): result for n_rows, result in results.items()}
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк обучения ForecastMark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="размеры синтетических датасетов")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=TRAIN_WORKERS)
+    parser.add_argument("--search-mode", choices=("grid", "halving"), default=SEARCH_MODE)
+    parser.add_argument("--chunksize", type=int, help="потоковое обучение частями по N строк")
+    parser.add_argument("--data-dir", type=Path, help="где хранить и переиспользовать датасеты")
+    parser.add_argument("--profile", type=Path, help="каталог для cProfile (.prof на размер)")
+    parser.add_argument("--py-spy", type=Path, help="каталог для py-spy (speedscope на размер)")
+    parser.add_argument("--output", type=Path, help="куда записать JSON (по умолчанию stdout)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="сохранить результат как базу")
+    # Внутренний режим: замер одного датасета в дочернем процессе
+    parser.add_argument("--measure", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--profile-file", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure is not None:
+        print(json.dumps(measure(args.measure, args, args.profile_file)))
+        return 0
+
+    report = run(args)
+    write_report(report, args.output)
+
+    if args.update_baseline:
+        write_report(report, args.baseline)
+        return 0
+    if not args.baseline.exists():
+        logger.warning("Базовых результатов нет: %s", args.baseline)
+        return 0
+
+    regressions = compare_with_baseline(report, args.baseline, args.tolerance)
+    for regression in regressions:
+        logger.error("Регрессия: %s", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    # Пошаговые логи тренера не нужны в отчёте бенчмарка
+    logging.getLogger("src.model").setLevel(logging.WARNING)
+    logging.getLogger("src.data").setLevel(logging.WARNING)
+    sys.exit(main())
@@ -1,59 +1,165 @@
 """Точка входа Telegram-бота ForecastMark."""
 
+import argparse
 import asyncio
 import logging
 import sys
 
 from telethon import TelegramClient, events
 
-from src.config import API_ID, API_HASH, BOT_TOKEN, SESSION_NAME, MODEL_PATH, ENCODERS_PATH
+from src.config import (
+    API_ID,
+    API_HASH,
+    BOT_TOKEN,
+    SESSION_NAME,
+    MODEL_PATH,
+    ENCODERS_PATH,
+    MODEL_BUNDLE_PATH,
+    PREDICTION_TABLE_PATH,
+    METRICS_PORT,
+    PREDICTION_LOG_PATH,
+    SEND_RATE,
+    SEND_BURST,
+)
+from src.bot.dispatcher import UpdateDispatcher
+from src.bot.inference import InferenceQueue
+from src.bot.metrics import REGISTRY, LoopLagMonitor, MetricsExporter
+from src.bot.outbox import OutboundQueue
+from src.bot.reloader import ModelReloader
+from src.bot.sessions import MemorySessionStore, create_session_store
+from src.data.prediction_log import PredictionLogWriter
 from src.model.predictor import MarkPredictor
-from src.bot.handlers import init_handlers, handle_start, handle_message
+from src.bot.handlers import (
+    init_handlers,
+    handle_start,
+    handle_predict,
+    handle_message,
+    handle_callback,
+)
 
 logger = logging.getLogger(__name__)
 
 
-async def main() -> None:
-    """Инициализирует и запускает Telegram-бота."""
+def in_shard(user_id: int, shard: int, shards: int) -> bool:
+    """Обрабатывает ли шард ``shard`` из ``shards`` сообщения пользователя."""
+    return user_id % shards == shard
+
+
+async def main(shard: int = 0, shards: int = 1) -> None:
+    """Инициализирует и запускает Telegram-бота.
+
+    При ``shards`` > 1 процесс — один из шардов (см. ``src.bot.supervisor``):
+    у него своя сессия Telethon и свой порт метрик, а обрабатывает он только
+    пользователей своего шарда по ``sender_id``.
+    """
+    shard_prefix = f"[shard {shard}] " if shards > 1 else ""
     logging.basicConfig(
         level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        format=f"%(asctime)s [%(levelname)s] {shard_prefix}%(name)s: %(message)s",
     )
 
     logger.info("🚀 Инициализация бота ForecastMark...")
 
-    # Загружаем модель
+    # Загружаем модель: из бандла, если тренер его экспортировал
     try:
-        predictor = MarkPredictor(
-            model_path=str(MODEL_PATH),
-            encoders_path=str(ENCODERS_PATH),
-        )
+        if MODEL_BUNDLE_PATH.exists():
+            predictor = MarkPredictor.from_bundle(
+                str(MODEL_BUNDLE_PATH),
+                table_path=str(PREDICTION_TABLE_PATH),
+                precompute=True,
+            )
+        else:
+            predictor = MarkPredictor(
+                model_path=str(MODEL_PATH),
+                encoders_path=str(ENCODERS_PATH),
+                table_path=str(PREDICTION_TABLE_PATH),
+                precompute=True,
+            )
     except Exception:
         logger.exception("❌ Ошибка загрузки модели")
         sys.exit(1)
 
-    # Пробрасываем предиктор в обработчики
-    init_handlers(predictor)
-
-    # Инициализируем клиент Telethon
-    client = TelegramClient(SESSION_NAME, API_ID, API_HASH)
+    # Запускаем очередь инференса, хранилище сессий и пробрасываем всё в обработчики
+    inference_queue = InferenceQueue(predictor)
+    inference_queue.start()
+    await inference_queue.wait_ready()
+    sessions = create_session_store()
+    if shards > 1 and isinstance(sessions, MemorySessionStore):
+        logger.warning(
+            "Сессии хранятся в памяти шарда: диалоги не переживут перезапуск "
+            "и смену числа шардов (задайте SESSION_STORE_PATH)"
+        )
 
-    # Регистрируем обработчики
-    client.on(events.NewMessage(pattern="/start"))(handle_start)
-    client.on(events.NewMessage())(handle_message)
+    # Журнал предсказаний пишется батчами в фоне
+    prediction_log = PredictionLogWriter(PREDICTION_LOG_PATH) if PREDICTION_LOG_PATH else None
+    if prediction_log is not None:
+        await prediction_log.start()
+
+    # Исходящие сообщения идут через очередь с лимитами; общий лимит бота
+    # делится между шардами
+    outbox = OutboundQueue(rate=SEND_RATE / shards, burst=max(1, SEND_BURST // shards))
+    outbox.start()
+    init_handlers(predictor, inference_queue, sessions, prediction_log, outbox)
+
+    # Следим за файлами модели, чтобы подхватывать переобученную без перезапуска
+    reloader = ModelReloader(predictor)
+    reloader.start()
+
+    # Метрики: задержка event loop и эндпоинт /metrics на локальном адресе
+    loop_lag = LoopLagMonitor()
+    loop_lag.start()
+    exporter = MetricsExporter(REGISTRY, port=METRICS_PORT + shard if METRICS_PORT else 0)
+    await exporter.start()
+
+    # Инициализируем клиент Telethon: файл сессии у каждого шарда свой
+    session_name = f"{SESSION_NAME}_{shard}" if shards > 1 else SESSION_NAME
+    # FloodWait не пережидается внутри запроса: паузу держит очередь исходящих,
+    # чтобы остальные отправки тоже ждали
+    client = TelegramClient(session_name, API_ID, API_HASH, flood_sleep_threshold=0)
+
+    # Регистрируем обработчики (только для пользователей своего шарда). Апдейты
+    # идут через диспетчер: разные пользователи — параллельно, один — по порядку
+    def own(event: events.NewMessage.Event) -> bool:
+        return in_shard(event.sender_id or 0, shard, shards)
+
+    dispatcher = UpdateDispatcher()
+    client.on(events.NewMessage(pattern="/start", func=own))(dispatcher.wrap(handle_start))
+    client.on(events.NewMessage(pattern=r"(?i)/predict(@\w+)?(\s|$)", func=own))(
+        dispatcher.wrap(handle_predict)
+    )
+    client.on(events.NewMessage(func=own))(dispatcher.wrap(handle_message))
+    client.on(events.CallbackQuery(func=own))(dispatcher.wrap(handle_callback))
 
     # Запускаем
     await client.start(bot_token=BOT_TOKEN)
     logger.info("✅ Бот успешно запущен!")
 
-    await client.run_until_disconnected()
+    try:
+        await client.run_until_disconnected()
+    finally:
+        await dispatcher.stop()
+        await outbox.stop()
+        await exporter.stop()
+        await loop_lag.stop()
+        await reloader.stop()
+        await inference_queue.stop()
+        if prediction_log is not None:
+            await prediction_log.stop()
+        sessions.close()
 
 
 if __name__ == "__main__":
     if sys.platform == "win32":
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
+    parser = argparse.ArgumentParser(description="Telegram-бот ForecastMark")
+    parser.add_argument("--shard", type=int, default=0, help="номер шарда (с нуля)")
+    parser.add_argument("--shards", type=int, default=1, help="всего шардов")
+    args = parser.parse_args()
+    if not 0 <= args.shard < args.shards:
+        parser.error("--shard должен быть в диапазоне [0, --shards)")
+
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.shard, args.shards))
     except KeyboardInterrupt:
         logger.info("👋 Бот остановлен")
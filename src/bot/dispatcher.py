@@ -0,0 +1,119 @@
+"""Диспетчер апдейтов: параллельно между пользователями, по порядку внутри.
+
+Telethon по умолчанию запускает каждый апдейт отдельной задачей: число
+одновременных обработчиков не ограничено, а два быстрых сообщения одного
+пользователя могут гоняться за одну сессию. Диспетчер ставит апдейты в
+очередь пользователя (``sender_id``) и обрабатывает её одной задачей, не
+больше ``max_concurrency`` обработчиков сразу. Очереди ограничены: при
+перегрузке новые апдейты отбрасываются.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from src.bot.metrics import DISPATCH_UPDATES, DISPATCH_WAIT, DISPATCH_DROPPED
+from src.config import DISPATCH_CONCURRENCY, DISPATCH_USER_QUEUE_SIZE, DISPATCH_MAX_PENDING
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Any], Awaitable[None]]
+
+
+class UpdateDispatcher:
+    """Очереди апдейтов по пользователям с общим пределом параллельности."""
+
+    def __init__(
+        self,
+        max_concurrency: int = DISPATCH_CONCURRENCY,
+        user_queue_size: int = DISPATCH_USER_QUEUE_SIZE,
+        max_pending: int = DISPATCH_MAX_PENDING,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency должен быть >= 1")
+        self.max_concurrency: int = max_concurrency
+        self.user_queue_size: int = user_queue_size
+        self.max_pending: int = max_pending
+        # user_id → очередь (обработчик, апдейт, время постановки)
+        self._queues: dict[int, deque[tuple[Handler, Any, float]]] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+        self._slots: asyncio.Semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending: int = 0
+        self._running: int = 0
+        self._closing: bool = False
+
+        DISPATCH_UPDATES.set_function(
+            lambda: {"queued": self._pending - self._running, "running": self._running}
+        )
+
+    def wrap(self, handler: Handler) -> Handler:
+        """Обработчик событий Telethon, который передаёт апдейт в диспетчер."""
+        async def dispatch(event: Any) -> None:
+            self.submit(event.sender_id or 0, handler, event)
+        dispatch.__name__ = handler.__name__
+        return dispatch
+
+    def submit(self, user_id: int, handler: Handler, event: Any) -> bool:
+        """Ставит апдейт в очередь пользователя; False — апдейт отброшен."""
+        if self._closing:
+            DISPATCH_DROPPED.inc(reason="stopping")
+            return False
+        queue = self._queues.get(user_id)
+        if queue is not None and len(queue) >= self.user_queue_size:
+            DISPATCH_DROPPED.inc(reason="user_queue")
+            logger.warning("Очередь пользователя %d переполнена, апдейт отброшен", user_id)
+            return False
+        if self._pending >= self.max_pending:
+            DISPATCH_DROPPED.inc(reason="overload")
+            logger.warning("Диспетчер перегружен (%d апдейтов), апдейт отброшен", self._pending)
+            return False
+
+        if queue is None:
+            queue = self._queues[user_id] = deque()
+        queue.append((handler, event, time.perf_counter()))
+        self._pending += 1
+        if user_id not in self._workers:
+            self._workers[user_id] = asyncio.get_running_loop().create_task(
+                self._drain(user_id, queue)
+            )
+        return True
+
+    async def _drain(self, user_id: int, queue: deque) -> None:
+        """Обрабатывает очередь пользователя по порядку, пока она не опустеет."""
+        try:
+            while queue:
+                handler, event, queued_at = queue[0]
+                # Слот берётся на каждый апдейт: пользователь с длинной
+                # очередью не держит его, пока ждут другие
+                async with self._slots:
+                    DISPATCH_WAIT.observe(time.perf_counter() - queued_at)
+                    self._running += 1
+                    try:
+                        await handler(event)
+                    except Exception:
+                        logger.exception("Ошибка обработки апдейта пользователя %d", user_id)
+                    finally:
+                        self._running -= 1
+                        self._pending -= 1
+                        queue.popleft()
+        finally:
+            # Между проверкой очереди и удалением нет await: submit() не
+            # может добавить апдейт в уже удаляемую очередь
+            self._pending -= len(queue)
+            del self._queues[user_id]
+            del self._workers[user_id]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Перестаёт принимать апдейты и ждёт обработки очередей (до ``timeout``)."""
+        self._closing = True
+        workers = list(self._workers.values())
+        if not workers:
+            return
+        _, pending = await asyncio.wait(workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+            logger.warning("Диспетчер остановлен, не обработано очередей: %d", len(pending))
@@ -1,78 +1,243 @@
 """Обработчики сообщений Telegram-бота."""
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+import re
+import time
+from typing import Optional
 
-from telethon import events, Button
+from telethon import events
 from telethon.tl.custom import Message
-
+from telethon.tl.types import TypeReplyMarkup
+
+from src.bot.inference import InferenceQueue
+from src.bot.inline import (
+    STEP_TIER,
+    STEP_LIKE_DRINK,
+    STEP_LIKE_FREQUENCY,
+    STEP_OFTEN_DRINK,
+    STEP_OFTEN_FREQUENCY,
+    ACTION_PAGE,
+    InlineKeyboards,
+    build_inline_keyboards,
+    decode_callback,
+)
+from src.bot.keyboards import (
+    BUTTONS_PER_PAGE,
+    MORE_DRINKS_LABEL,
+    CLEAR_KEYBOARD,
+    DrinkPages,
+    Keyboards,
+    build_keyboards,
+)
+from src.bot.metrics import (
+    HANDLER_LATENCY,
+    PREDICTION_LATENCY,
+    ACTIVE_SESSIONS,
+    UNKNOWN_CATEGORIES,
+    PREDICTION_CACHE,
+    PREDICTION_LOG,
+    ERRORS,
+)
+from src.bot.outbox import OutboundQueue, PRIORITY_PROMPT, PRIORITY_RESULT
+from src.bot.sessions import Session, SessionStore, MemorySessionStore
+from src.config import CATEGORICAL_COLUMNS, DIALOG_MODE
+from src.data.prediction_log import PredictionLogWriter, PredictionRecord
+from src.data.preprocessing import clean_categorical_value
 from src.model.predictor import MarkPredictor
 
 logger = logging.getLogger(__name__)
 
-# Максимальное количество кнопок «Показать ещё» за раз
-BUTTONS_PER_PAGE: int = 10
 FREQUENCY_MIN: int = 0
 FREQUENCY_MAX: int = 20
 
-# Хранилище сессий пользователей: {user_id: dict}
-user_sessions: Dict[int, Dict[str, Any]] = {}
+# /predict: предел строк в одном сообщении, порог похожести для опечаток и
+# отрыв лучшего кандидата от второго, при котором исправление принимается
+PREDICT_MAX_LINES: int = 20
+PREDICT_FUZZY_CUTOFF: float = 0.75
+PREDICT_FUZZY_MARGIN: float = 0.05
+
+# Хранилище сессий пользователей: {user_id: Session}
+user_sessions: SessionStore = MemorySessionStore()
 
 # Ссылка на предиктор (устанавливается из bot.py)
 predictor: Optional[MarkPredictor] = None
 
+# Очередь батчевого инференса; без неё предсказание считается синхронно
+inference_queue: Optional[InferenceQueue] = None
+
+# Готовые клавиатуры для текущей версии модели
+keyboards: Optional[Keyboards] = None
+inline_keyboards: Optional[InlineKeyboards] = None
+
+# Журнал предсказаний (None — не вести)
+prediction_log: Optional[PredictionLogWriter] = None
 
-def init_handlers(p: MarkPredictor) -> None:
-    """Инициализирует обработчики ссылкой на предиктор."""
-    global predictor
+# Очередь исходящих сообщений; без неё ответы отправляются сразу
+outbox: Optional[OutboundQueue] = None
+
+
+def init_handlers(
+    p: MarkPredictor,
+    queue: Optional[InferenceQueue] = None,
+    sessions: Optional[SessionStore] = None,
+    log: Optional[PredictionLogWriter] = None,
+    sender: Optional[OutboundQueue] = None,
+) -> None:
+    """Инициализирует обработчики предиктором, очередью инференса, хранилищем
+    сессий, журналом предсказаний и очередью исходящих сообщений."""
+    global predictor, inference_queue, user_sessions, keyboards, inline_keyboards
+    global prediction_log, outbox
     predictor = p
+    inference_queue = queue
+    prediction_log = log
+    outbox = sender
+    if sessions is not None:
+        user_sessions = sessions
+    keyboards = build_keyboards(p)
+    inline_keyboards = build_inline_keyboards(p)
+
+    # Эти метрики считаются в момент сбора из состояния предиктора и хранилища
+    ACTIVE_SESSIONS.set_function(lambda: len(user_sessions))
+    UNKNOWN_CATEGORIES.set_function(lambda: predictor.unknown_value_counts)
+    PREDICTION_CACHE.set_function(_prediction_cache_counts)
+    PREDICTION_LOG.set_function(_prediction_log_counts)
+
+
+def _prediction_cache_counts() -> dict[str, int]:
+    stats = predictor.cache_stats
+    if stats is None:
+        return {}
+    return {"hit": stats.hits, "miss": stats.misses}
+
+
+def _prediction_log_counts() -> dict[str, int]:
+    if prediction_log is None:
+        return {}
+    return {"written": prediction_log.written, "dropped": prediction_log.dropped}
 
 
 # ----- Хелперы -----
 
-def _build_drink_buttons(
-    drinks: list[str],
-    start: int = 0,
-    label: str = "Показать ещё напитки",
-) -> list:
-    """Создаёт кнопки с напитками + кнопку «Показать ещё»."""
-    chunk = drinks[start : start + BUTTONS_PER_PAGE]
-    buttons = [[Button.text(d, resize=True)] for d in chunk]
-    if start + BUTTONS_PER_PAGE < len(drinks):
-        buttons.append([Button.text(label, resize=True)])
-    return buttons
+async def _reply(
+    event: events.NewMessage.Event,
+    text: str,
+    buttons: Optional[TypeReplyMarkup] = None,
+    priority: int = PRIORITY_PROMPT,
+) -> Message:
+    """Ответ на сообщение через очередь исходящих (лимиты, FloodWait, приоритет)."""
+    if outbox is None:
+        return await event.reply(text, buttons=buttons)
+    return await outbox.send(
+        event.chat_id, lambda: event.reply(text, buttons=buttons), priority
+    )
+
+
+async def _edit(
+    event: events.CallbackQuery.Event,
+    text: str,
+    buttons: Optional[TypeReplyMarkup] = None,
+    priority: int = PRIORITY_PROMPT,
+) -> None:
+    """Редактирование сообщения с inline-кнопками через очередь исходящих."""
+    if outbox is None:
+        await event.edit(text, buttons=buttons)
+        return
+    await outbox.send(event.chat_id, lambda: event.edit(text, buttons=buttons), priority)
+
+
+def _keyboards() -> Keyboards:
+    """Клавиатуры текущей версии модели; после перезагрузки собираются заново."""
+    global keyboards
+    if keyboards.model_version != predictor.model_version:
+        keyboards = build_keyboards(predictor)
+        logger.info("Клавиатуры пересобраны для модели %s", keyboards.model_version)
+    return keyboards
+
+
+def _inline_keyboards() -> InlineKeyboards:
+    """Inline-клавиатуры текущей версии модели (пересборка — как в _keyboards)."""
+    global inline_keyboards
+    if inline_keyboards.model_version != predictor.model_version:
+        inline_keyboards = build_inline_keyboards(predictor)
+    return inline_keyboards
 
 
 def _show_more_drinks(
-    drinks: list[str],
-    session: dict,
+    pages: DrinkPages,
+    session: Session,
     index_key: str,
-) -> list:
+) -> TypeReplyMarkup:
     """Логика пагинации «Показать ещё» для напитков.
 
-    Возвращает список кнопок для следующей страницы и обновляет сессию.
+    Возвращает разметку следующей страницы и обновляет сессию.
     """
     start = session.get(index_key, BUTTONS_PER_PAGE)
-    buttons = _build_drink_buttons(drinks, start)
     new_page = start + BUTTONS_PER_PAGE
-    session[index_key] = new_page if new_page < len(drinks) else len(drinks)
-    return buttons
+    session[index_key] = new_page if new_page < pages.size else pages.size
+    return pages.page(start)
+
+
+def _session_features(session: Session) -> dict:
+    """Входы predict() из заполненной сессии диалога."""
+    return {
+        "tier": session["tier"],
+        "frequency_day": session["frequency_day"],
+        "frequency_day_o": session["frequency_day_o"],
+        "like_drink_f": session["like_drink_f"],
+        "often_drink_f": session["often_drink_f"],
+    }
+
+
+async def _predict(features: dict) -> float:
+    """Предсказание через очередь инференса (или синхронно) с метрикой и журналом."""
+    start = time.perf_counter()
+    if inference_queue is not None:
+        prediction = await inference_queue.predict(**features)
+    else:
+        prediction = predictor.predict(**features)
+    elapsed = time.perf_counter() - start
+    PREDICTION_LATENCY.observe(elapsed)
+    if prediction_log is not None:
+        prediction_log.log(PredictionRecord.from_prediction(
+            features, prediction, predictor.model_version, elapsed
+        ))
+    return prediction
+
+
+def _result_text(features: dict, prediction: float) -> str:
+    return (
+        "🎓 **Результат предсказания**\n\n"
+        f"📊 **Твой предсказанный балл:** {prediction}\n\n"
+        "📝 **Введённые данные:**\n"
+        f"• Курс: {features['tier']}\n"
+        f"• Любимый напиток: {features['like_drink_f']}\n"
+        f"• Частота любимого: {features['frequency_day']} раз/день\n"
+        f"• Частый напиток: {features['often_drink_f']}\n"
+        f"• Частота частого: {features['frequency_day_o']} раз/день\n\n"
+        "🔄 Хочешь сделать ещё одно предсказание? Напиши /start"
+    )
 
 
 # ----- Обработчик /start -----
 
 async def handle_start(event: events.NewMessage.Event) -> None:
     """Обрабатывает команду /start — начинает диалог."""
+    start = time.perf_counter()
     user_id = event.sender_id
-    user_sessions[user_id] = {"step": 1}
-
-    buttons = [[Button.text(t, resize=True)] for t in predictor.available_tiers]
-
-    await event.reply(
-        "🍹 **Привет! Я бот для предсказания балла на основе твоих напитков!**\n\n"
-        "Давай начнём! Выбери твой курс:",
-        buttons=buttons,
-    )
+    session = Session(step=1)
+    user_sessions.save(user_id, session)
+
+    if DIALOG_MODE == "inline":
+        await _reply(event, _inline_text(session), buttons=_inline_keyboards().page(STEP_TIER))
+    else:
+        await _reply(
+            event,
+            "🍹 **Привет! Я бот для предсказания балла на основе твоих напитков!**\n\n"
+            "Давай начнём! Выбери твой курс:",
+            buttons=_keyboards().tiers,
+        )
+    HANDLER_LATENCY.observe(time.perf_counter() - start, step="start")
     logger.info("Пользователь %d начал диалог", user_id)
 
 
@@ -87,12 +252,13 @@ async def handle_message(event: events.NewMessage.Event) -> None:
     if text.startswith("/"):
         return
 
-    if user_id not in user_sessions:
+    session = user_sessions.get(user_id)
+    if session is None:
         await handle_start(event)
         return
 
-    session = user_sessions[user_id]
     step = session.get("step", 0)
+    start = time.perf_counter()
 
     try:
         if step == 1:
@@ -104,30 +270,41 @@ async def handle_message(event: events.NewMessage.Event) -> None:
         elif step == 4:
             await _handle_often_drink(event, session, text)
         elif step == 5:
+            # Последний шаг завершает диалог и сам удаляет сессию
             await _handle_often_frequency(event, session, text)
+            HANDLER_LATENCY.observe(time.perf_counter() - start, step=str(step))
+            return
     except Exception:
+        ERRORS.inc(step=str(step))
         logger.exception("Ошибка обработки для пользователя %d", user_id)
-        await event.reply("❌ Произошла ошибка. Давай начнём заново — напиши /start")
+        await _reply(event, "❌ Произошла ошибка. Давай начнём заново — напиши /start")
         user_sessions.pop(user_id, None)
+        return
+
+    user_sessions.save(user_id, session)
+    HANDLER_LATENCY.observe(time.perf_counter() - start, step=str(step))
 
 
 # ----- Шаг 1: выбор курса -----
 
 async def _handle_tier(
-    event: events.NewMessage.Event, session: dict, text: str
+    event: events.NewMessage.Event, session: Session, text: str
 ) -> None:
-    if text not in predictor.available_tiers:
-        await event.reply("❌ Пожалуйста, выбери курс из предложенных вариантов")
+    # Один хэш-поиск: проверка и приведение ввода к значению словаря модели
+    tier = predictor.vocabulary("tier").canonical(text)
+    if tier is None:
+        await _reply(event, "❌ Пожалуйста, выбери курс из предложенных вариантов")
         return
 
-    session["tier"] = text
+    session["tier"] = tier
     session["step"] = 2
 
-    buttons = _build_drink_buttons(predictor.available_like_drinks, 0)
-    await event.reply(
-        f"✅ Курс: {text}\n\n"
+    buttons = _keyboards().like_drinks.page(0)
+    await _reply(
+        event,
+        f"✅ Курс: {tier}\n\n"
         "🎯 Теперь выбери твой **любимый напиток** из списка:\n"
-        f"_Доступно вариантов: {len(predictor.available_like_drinks)}_",
+        f"_Доступно вариантов: {len(predictor.vocabulary('like_drink_f'))}_",
         buttons=buttons,
     )
 
@@ -135,129 +312,377 @@ async def _handle_tier(
 # ----- Шаг 2: любимый напиток -----
 
 async def _handle_like_drink(
-    event: events.NewMessage.Event, session: dict, text: str
+    event: events.NewMessage.Event, session: Session, text: str
 ) -> None:
-    if text == "Показать ещё напитки":
+    if text == MORE_DRINKS_LABEL:
         buttons = _show_more_drinks(
-            predictor.available_like_drinks,
+            _keyboards().like_drinks,
             session,
             "drink_page",
         )
-        await event.reply("🎯 Выбери твой **любимый напиток**:", buttons=buttons)
+        await _reply(event, "🎯 Выбери твой **любимый напиток**:", buttons=buttons)
         return
 
-    if text not in predictor.available_like_drinks:
-        await event.reply("❌ Пожалуйста, выбери напиток из списка")
+    drink = predictor.vocabulary("like_drink_f").canonical(text)
+    if drink is None:
+        await _reply(event, "❌ Пожалуйста, выбери напиток из списка")
         return
 
-    session["like_drink_f"] = text
+    session["like_drink_f"] = drink
     session["step"] = 3
     session.pop("drink_page", None)
 
-    await event.reply(
-        f"✅ Любимый напиток: {text}\n\n"
+    await _reply(
+        event,
+        f"✅ Любимый напиток: {drink}\n\n"
         "🔢 **Сколько раз в день ты его пьёшь?** (в среднем)\n"
         "_Введи число, например: 2_",
-        buttons=Button.clear(),
+        buttons=CLEAR_KEYBOARD,
     )
 
 
 # ----- Шаг 3: частота любимого -----
 
 async def _handle_like_frequency(
-    event: events.NewMessage.Event, session: dict, text: str
+    event: events.NewMessage.Event, session: Session, text: str
 ) -> None:
     try:
         freq = int(text)
         if not (FREQUENCY_MIN <= freq <= FREQUENCY_MAX):
-            await event.reply(f"❌ Пожалуйста, введи разумное число ({FREQUENCY_MIN}–{FREQUENCY_MAX})")
+            await _reply(event, f"❌ Пожалуйста, введи разумное число ({FREQUENCY_MIN}–{FREQUENCY_MAX})")
             return
 
         session["frequency_day"] = freq
         session["step"] = 4
 
-        buttons = _build_drink_buttons(predictor.available_often_drinks, 0)
-        await event.reply(
+        buttons = _keyboards().often_drinks.page(0)
+        await _reply(
+            event,
             f"✅ Частота: {freq} раз/день\n\n"
             "☕ Теперь выбери напиток, который ты **пьёшь чаще всего**:\n"
-            f"_Доступно вариантов: {len(predictor.available_often_drinks)}_",
+            f"_Доступно вариантов: {len(predictor.vocabulary('often_drink_f'))}_",
             buttons=buttons,
         )
     except ValueError:
-        await event.reply("❌ Пожалуйста, введи целое число")
+        await _reply(event, "❌ Пожалуйста, введи целое число")
 
 
 # ----- Шаг 4: частый напиток -----
 
 async def _handle_often_drink(
-    event: events.NewMessage.Event, session: dict, text: str
+    event: events.NewMessage.Event, session: Session, text: str
 ) -> None:
-    if text == "Показать ещё напитки":
+    if text == MORE_DRINKS_LABEL:
         buttons = _show_more_drinks(
-            predictor.available_often_drinks,
+            _keyboards().often_drinks,
             session,
             "often_drink_page",
         )
-        await event.reply(
+        await _reply(
+            event,
             "☕ Выбери напиток, который пьёшь **чаще всего**:", buttons=buttons
         )
         return
 
-    if text not in predictor.available_often_drinks:
-        await event.reply("❌ Пожалуйста, выбери напиток из списка")
+    drink = predictor.vocabulary("often_drink_f").canonical(text)
+    if drink is None:
+        await _reply(event, "❌ Пожалуйста, выбери напиток из списка")
         return
 
-    session["often_drink_f"] = text
+    session["often_drink_f"] = drink
     session["step"] = 5
     session.pop("often_drink_page", None)
 
-    await event.reply(
-        f"✅ Частый напиток: {text}\n\n"
+    await _reply(
+        event,
+        f"✅ Частый напиток: {drink}\n\n"
         "🔢 **Сколько раз в день ты его пьёшь?** (в среднем)\n"
         "_Введи число, например: 3_",
-        buttons=Button.clear(),
+        buttons=CLEAR_KEYBOARD,
     )
 
 
 # ----- Шаг 5: частота частого → предсказание -----
 
 async def _handle_often_frequency(
-    event: events.NewMessage.Event, session: dict, text: str
+    event: events.NewMessage.Event, session: Session, text: str
 ) -> None:
     try:
         freq = int(text)
         if not (FREQUENCY_MIN <= freq <= FREQUENCY_MAX):
-            await event.reply(f"❌ Пожалуйста, введи разумное число ({FREQUENCY_MIN}–{FREQUENCY_MAX})")
+            await _reply(event, f"❌ Пожалуйста, введи разумное число ({FREQUENCY_MIN}–{FREQUENCY_MAX})")
             return
 
         session["frequency_day_o"] = freq
 
-        await event.reply("⏳ Рассчитываю твой балл...")
-
-        prediction = predictor.predict(
-            tier=session["tier"],
-            frequency_day=session["frequency_day"],
-            frequency_day_o=session["frequency_day_o"],
-            like_drink_f=session["like_drink_f"],
-            often_drink_f=session["often_drink_f"],
-        )
-
-        result = (
-            "🎓 **Результат предсказания**\n\n"
-            f"📊 **Твой предсказанный балл:** {prediction}\n\n"
-            "📝 **Введённые данные:**\n"
-            f"• Курс: {session['tier']}\n"
-            f"• Любимый напиток: {session['like_drink_f']}\n"
-            f"• Частота любимого: {session['frequency_day']} раз/день\n"
-            f"• Частый напиток: {session['often_drink_f']}\n"
-            f"• Частота частого: {session['frequency_day_o']} раз/день\n\n"
-            "🔄 Хочешь сделать ещё одно предсказание? Напиши /start"
-        )
+        await _reply(event, "⏳ Рассчитываю твой балл...")
 
-        await event.reply(result)
+        features = _session_features(session)
+        prediction = await _predict(features)
+        await _reply(event, _result_text(features, prediction), priority=PRIORITY_RESULT)
         logger.info("Предсказание для пользователя %d: %.2f", event.sender_id, prediction)
 
     except ValueError:
-        await event.reply("❌ Пожалуйста, введи целое число")
+        await _reply(event, "❌ Пожалуйста, введи целое число")
     finally:
         user_sessions.pop(event.sender_id, None)
+
+
+# ----- Inline-диалог: шаги редактируют одно сообщение -----
+
+# Поле сессии, подпись и вопрос каждого шага
+_INLINE_STEPS: dict[int, tuple[str, str, str]] = {
+    STEP_TIER: ("tier", "Курс", "Давай начнём! Выбери твой курс:"),
+    STEP_LIKE_DRINK: (
+        "like_drink_f", "Любимый напиток", "🎯 Выбери твой **любимый напиток**:"
+    ),
+    STEP_LIKE_FREQUENCY: (
+        "frequency_day", "Частота любимого", "🔢 **Сколько раз в день ты его пьёшь?** (в среднем)"
+    ),
+    STEP_OFTEN_DRINK: (
+        "often_drink_f", "Частый напиток", "☕ Выбери напиток, который ты **пьёшь чаще всего**:"
+    ),
+    STEP_OFTEN_FREQUENCY: (
+        "frequency_day_o", "Частота частого", "🔢 **Сколько раз в день ты его пьёшь?** (в среднем)"
+    ),
+}
+
+
+def _inline_text(session: Session) -> str:
+    """Текст сообщения inline-диалога: уже выбранное и вопрос текущего шага."""
+    step = session["step"]
+    lines = ["🍹 **Привет! Я бот для предсказания балла на основе твоих напитков!**", ""]
+    for done in range(STEP_TIER, step):
+        col, label, _ = _INLINE_STEPS[done]
+        suffix = "" if col in CATEGORICAL_COLUMNS else " раз/день"
+        lines.append(f"✅ {label}: {session[col]}{suffix}")
+    if step > STEP_TIER:
+        lines.append("")
+    lines.append(_INLINE_STEPS[step][2])
+    return "\n".join(lines)
+
+
+def _inline_select(session: Session, step: int, value: int) -> bool:
+    """Записывает в сессию значение из payload; False — значения нет."""
+    col = _INLINE_STEPS[step][0]
+    if col in CATEGORICAL_COLUMNS:
+        values = predictor.vocabulary(col).values
+        if value >= len(values):
+            return False
+        session[col] = values[value]
+    else:
+        if not (FREQUENCY_MIN <= value <= FREQUENCY_MAX):
+            return False
+        session[col] = value
+    return True
+
+
+async def handle_callback(event: events.CallbackQuery.Event) -> None:
+    """Обрабатывает нажатие inline-кнопки: листание страниц или выбор значения."""
+    start = time.perf_counter()
+    user_id = event.sender_id
+    callback = decode_callback(event.data)
+    inline = _inline_keyboards()
+
+    # Payload от клавиатуры прошлой версии модели: индексы могли сместиться
+    if callback is None or callback.version != inline.tag:
+        await event.answer("Кнопки устарели — напиши /start", alert=True)
+        return
+    session = user_sessions.get(user_id)
+    if session is None or session.get("step") != callback.step:
+        await event.answer("Этот шаг уже пройден — напиши /start")
+        return
+
+    step = callback.step
+    try:
+        # Нажатие подтверждается до того, как правка встанет в исходящую
+        # очередь: иначе у кнопки крутится индикатор, пока ждёт отправка
+        if callback.action == ACTION_PAGE:
+            await event.answer()
+            await _edit(event, _inline_text(session), buttons=inline.page(step, callback.value))
+        elif not _inline_select(session, step, callback.value):
+            await event.answer("❌ Такого варианта нет")
+        elif step < STEP_OFTEN_FREQUENCY:
+            session["step"] = step + 1
+            user_sessions.save(user_id, session)
+            await event.answer()
+            await _edit(event, _inline_text(session), buttons=inline.page(step + 1))
+        else:
+            # Сессия удаляется до расчёта: повторное нажатие не даст второго предсказания
+            user_sessions.pop(user_id, None)
+            features = _session_features(session)
+            prediction = await _predict(features)
+            await event.answer()
+            await _edit(
+                event, _result_text(features, prediction), buttons=None, priority=PRIORITY_RESULT
+            )
+            logger.info("Предсказание для пользователя %d: %.2f", user_id, prediction)
+    except Exception:
+        ERRORS.inc(step=f"inline_{step}")
+        logger.exception("Ошибка обработки кнопки для пользователя %d", user_id)
+        user_sessions.pop(user_id, None)
+        await event.answer("❌ Произошла ошибка. Давай начнём заново — напиши /start", alert=True)
+        return
+
+    HANDLER_LATENCY.observe(time.perf_counter() - start, step=f"inline_{step}")
+
+
+# ----- Команда /predict: все поля одним сообщением -----
+
+PREDICT_USAGE: str = (
+    "⚡ **Быстрое предсказание без диалога**\n\n"
+    "Напиши все пять полей через `;` в порядке диалога:\n"
+    "`/predict курс; любимый напиток; раз в день; частый напиток; раз в день`\n\n"
+    "Например: `/predict 1 курс; вино; 2; вода; 5`\n\n"
+    f"Для нескольких вариантов сразу — по одному на строке (до {PREDICT_MAX_LINES})."
+)
+
+# Поля строки /predict в порядке шагов диалога
+_PREDICT_FIELDS: tuple[str, ...] = (
+    "tier", "like_drink_f", "frequency_day", "often_drink_f", "frequency_day_o",
+)
+_PREDICT_FIELD_NAMES: dict[str, str] = {
+    "tier": "курс",
+    "like_drink_f": "любимый напиток",
+    "frequency_day": "частота любимого",
+    "often_drink_f": "частый напиток",
+    "frequency_day_o": "частота частого",
+}
+_PREDICT_COMMAND = re.compile(r"^/predict(?:@\w+)?", re.IGNORECASE)
+_PREDICT_SEPARATOR = re.compile(r"\s*[;|]\s*")
+# Курс числом: «3», «3 курс», «3-й курс»
+_TIER_NUMBER = re.compile(r"(\d+)(?:\s*-?\s*(?:й|ый|ой))?(?:\s*курс)?")
+
+
+def _resolve_tier(raw: str) -> Optional[str]:
+    """Курс по точному значению, нормализованной форме или номеру.
+
+    Опечатки исправляются только в курсах без номера («аспирнтура»):
+    «7 курс» — неизвестный курс, а не опечатка в «6 курс».
+    """
+    vocabulary = predictor.vocabulary("tier")
+    value = vocabulary.canonical(raw)
+    if value is not None:
+        return value
+    alias = clean_categorical_value(raw)
+    if alias is None:
+        return None
+    number = _TIER_NUMBER.fullmatch(alias)
+    if number is not None:
+        return vocabulary.canonical(f"{int(number.group(1))} курс")
+    return vocabulary.closest(raw, PREDICT_FUZZY_CUTOFF, PREDICT_FUZZY_MARGIN)
+
+
+def _parse_predict_line(line: str) -> tuple[Optional[dict], Optional[str], dict[str, str]]:
+    """Разбирает строку /predict в признаки для predict().
+
+    Returns:
+        (признаки, None, исправления) или (None, текст ошибки для
+        пользователя, {}). Исправления — исходный ввод полей, которые
+        распознаны не буквально (опечатка, номер курса).
+    """
+    parts = _PREDICT_SEPARATOR.split(line.strip())
+    if len(parts) != len(_PREDICT_FIELDS):
+        return None, f"нужно {len(_PREDICT_FIELDS)} полей через «;», получено {len(parts)}", {}
+
+    features, corrections = {}, {}
+    for col, raw in zip(_PREDICT_FIELDS, parts):
+        if col in ("frequency_day", "frequency_day_o"):
+            try:
+                value = int(raw)
+            except ValueError:
+                return None, f"{_PREDICT_FIELD_NAMES[col]}: «{raw}» — не целое число", {}
+            if not (FREQUENCY_MIN <= value <= FREQUENCY_MAX):
+                return None, (
+                    f"{_PREDICT_FIELD_NAMES[col]}: {value} вне диапазона "
+                    f"{FREQUENCY_MIN}–{FREQUENCY_MAX}"
+                ), {}
+        else:
+            if col == "tier":
+                value = _resolve_tier(raw)
+            else:
+                value = predictor.vocabulary(col).closest(
+                    raw, PREDICT_FUZZY_CUTOFF, PREDICT_FUZZY_MARGIN
+                )
+            if value is None:
+                return None, f"{_PREDICT_FIELD_NAMES[col]}: «{raw}» не найден", {}
+            if clean_categorical_value(raw) != clean_categorical_value(value):
+                corrections[col] = raw
+        features[col] = value
+    return features, None, corrections
+
+
+def _shown(features: dict, corrections: dict[str, str], col: str) -> str:
+    """Значение поля для ответа; исправленный ввод — как «вада → вода»."""
+    if col in corrections:
+        return f"{corrections[col]} → {features[col]}"
+    return str(features[col])
+
+
+async def handle_predict(event: events.NewMessage.Event) -> None:
+    """Обрабатывает /predict — предсказание по всем полям из одного сообщения.
+
+    Каждая непустая строка (первая — после самой команды) — отдельный набор
+    полей; все предсказания уходят одним ответом.
+    """
+    start = time.perf_counter()
+    user_id = event.sender_id
+    body = _PREDICT_COMMAND.sub("", event.text.strip(), count=1)
+    lines = [line for line in body.splitlines() if line.strip()]
+
+    if not lines:
+        await _reply(event, PREDICT_USAGE)
+        return
+    if len(lines) > PREDICT_MAX_LINES:
+        await _reply(event, f"❌ Не больше {PREDICT_MAX_LINES} строк за раз")
+        return
+
+    try:
+        parsed = [_parse_predict_line(line) for line in lines]
+        rows = [features for features, _, _ in parsed if features is not None]
+
+        predict_start = time.perf_counter()
+        if inference_queue is not None:
+            predictions = await asyncio.gather(
+                *(inference_queue.predict(**features) for features in rows)
+            )
+        elif rows:
+            columns = {col: [features[col] for features in rows] for col in _PREDICT_FIELDS}
+            predictions = [float(p) for p in predictor.predict_many(columns)]
+        else:
+            predictions = []
+        elapsed = time.perf_counter() - predict_start
+        if rows:
+            PREDICTION_LATENCY.observe(elapsed)
+        if prediction_log is not None:
+            model_version = predictor.model_version
+            for features, prediction in zip(rows, predictions):
+                prediction_log.log(PredictionRecord.from_prediction(
+                    features, prediction, model_version, elapsed / len(rows)
+                ))
+
+        results = iter(predictions)
+        answer = []
+        for number, (features, error, corrections) in enumerate(parsed, 1):
+            prefix = f"{number}. " if len(parsed) > 1 else ""
+            if features is None:
+                answer.append(f"{prefix}❌ {error}")
+                continue
+            answer.append(
+                f"{prefix}📊 **{next(results)}** — {_shown(features, corrections, 'tier')}, "
+                f"{_shown(features, corrections, 'like_drink_f')} "
+                f"{features['frequency_day']} раз/день, "
+                f"{_shown(features, corrections, 'often_drink_f')} "
+                f"{features['frequency_day_o']} раз/день"
+            )
+        if len(rows) < len(parsed):
+            answer.append("\nℹ️ Пример формата — /predict без аргументов")
+        await _reply(event, "\n".join(answer), priority=PRIORITY_RESULT)
+    except Exception:
+        ERRORS.inc(step="predict")
+        logger.exception("Ошибка /predict для пользователя %d", user_id)
+        await _reply(event, "❌ Произошла ошибка. Попробуй ещё раз или напиши /start")
+        return
+
+    HANDLER_LATENCY.observe(time.perf_counter() - start, step="predict")
+    logger.info("/predict для пользователя %d: %d из %d строк", user_id, len(rows), len(lines))
@@ -0,0 +1,303 @@
+"""Очередь инференса с микро-батчингом для обработчиков бота."""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional
+
+import numpy as np
+
+from src.config import (
+    INFERENCE_BATCH_SIZE,
+    INFERENCE_MAX_WAIT,
+    INFERENCE_QUEUE_SIZE,
+    INFERENCE_SCALAR_BATCH,
+    INFERENCE_WORKERS,
+    INPUT_COLUMNS,
+)
+from src.model.predictor import MarkPredictor
+
+logger = logging.getLogger(__name__)
+
+
+# ----- Рабочие процессы -----
+
+# Предиктор рабочего процесса (создаётся инициализатором пула)
+_worker_predictor: Optional[MarkPredictor] = None
+
+
+def _worker_options(predictor: MarkPredictor) -> dict[str, Any]:
+    """Аргументы, с которыми рабочий процесс загружает ту же модель, что и бот.
+
+    Бандл открывается с ``mmap_artifacts``: деревья всех процессов лежат в
+    общем page cache, а таблица предсказаний читается из файла, который уже
+    построил бот.
+    """
+    return {
+        "model_path": predictor.model_path,
+        "encoders_path": predictor.encoders_path,
+        "table_path": predictor.table_path,
+        "precompute": predictor.precompute,
+        "bundle_path": predictor.bundle_path,
+        "backend": predictor.backend,
+        "cache_size": predictor.cache_size,
+        "mmap_artifacts": predictor.bundle_path is not None,
+    }
+
+
+def _init_worker(options: dict[str, Any]) -> None:
+    """Инициализатор пула: модель загружается один раз на процесс."""
+    global _worker_predictor
+    _worker_predictor = MarkPredictor(**options)
+
+
+def _worker_ready() -> None:
+    """Пустая задача: первая отправка запускает процессы пула, а её
+    завершение значит, что инициализатор (загрузка модели) отработал."""
+
+
+def _predict_rows(predictor: MarkPredictor, rows: list[tuple]) -> np.ndarray:
+    """Предсказания для строк батча: маленький — построчно, большой — векторно."""
+    if len(rows) <= INFERENCE_SCALAR_BATCH:
+        return np.array([predictor.predict(*row) for row in rows])
+    return predictor.predict_many(
+        {col: [row[i] for row in rows] for i, col in enumerate(INPUT_COLUMNS)}
+    )
+
+
+def _default_executor_workers() -> int:
+    """Потоков в пуле event loop по умолчанию (как у ThreadPoolExecutor)."""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def _predict_in_worker(rows: list[tuple], version: str) -> np.ndarray:
+    """Считает батч в рабочем процессе.
+
+    Если бот уже перешёл на другую версию модели, а файлы изменились с
+    загрузки в этом процессе, модель перечитывается перед расчётом.
+    """
+    predictor = _worker_predictor
+    if predictor.model_version != version and predictor.artifacts_changed():
+        predictor.reload()
+    return _predict_rows(predictor, rows)
+
+
+# ----- Очередь -----
+
+class InferenceQueue:
+    """Собирает запросы на предсказание в батчи и считает их вне event loop.
+
+    Запросы копятся до ``max_batch_size`` штук или ``max_wait`` секунд с момента
+    первого запроса в батче, после чего весь батч уходит одним вызовом
+    ``MarkPredictor.predict_many`` в пул потоков, не блокируя event loop
+    (батч до ``INFERENCE_SCALAR_BATCH`` запросов там же считается построчно
+    через ``predict()``).
+
+    С ``workers`` > 0 батчи считаются в пуле из стольких процессов (каждый
+    загружает модель один раз в инициализаторе). Одновременно в работе столько
+    батчей, сколько исполнителей у пула: ``workers`` процессов или потоков
+    пула event loop по умолчанию. Когда все исполнители заняты, новые запросы
+    ждут в очереди, а при её заполнении ``predict()`` ждёт свободного места
+    (backpressure).
+    """
+
+    def __init__(
+        self,
+        predictor: MarkPredictor,
+        max_batch_size: int = INFERENCE_BATCH_SIZE,
+        max_wait: float = INFERENCE_MAX_WAIT,
+        max_queue: int = INFERENCE_QUEUE_SIZE,
+        workers: int = INFERENCE_WORKERS,
+    ) -> None:
+        self.predictor: MarkPredictor = predictor
+        self.max_batch_size: int = max_batch_size
+        self.max_wait: float = max_wait
+        self.workers: int = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: asyncio.Semaphore = asyncio.Semaphore(
+            workers if workers > 0 else _default_executor_workers()
+        )
+        self._in_flight: set[asyncio.Task] = set()
+        self._warmup: list[Future] = []
+        # Будит сбор батча при новом запросе и при остановке
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._closing: bool = False
+
+    # ----- Жизненный цикл -----
+
+    def start(self) -> None:
+        """Запускает фоновую задачу, обрабатывающую очередь."""
+        if self._worker is None:
+            if self.workers > 0:
+                self._executor = self._create_executor()
+            self._closing = False
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+            logger.info(
+                "Очередь инференса запущена: батч до %d, ожидание %.1f мс, процессов %d",
+                self.max_batch_size, self.max_wait * 1000, self.workers,
+            )
+
+    async def stop(self) -> None:
+        """Останавливает фоновую задачу; ожидающие запросы получают отмену."""
+        if self._worker is None:
+            return
+        # Флаг завершает сбор батча, даже если отмена потеряется внутри
+        # wait_for; собранные запросы отменяет сам рабочий цикл
+        self._closing = True
+        self._wakeup.set()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        for task in list(self._in_flight):
+            task.cancel()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # spawn: форк процесса с потоками и event loop Telethon небезопасен
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(_worker_options(self.predictor),),
+        )
+        self._warmup = [executor.submit(_worker_ready) for _ in range(self.workers)]
+        return executor
+
+    async def wait_ready(self) -> None:
+        """Дожидается, пока процессы пула загрузят модель (без пула — сразу)."""
+        if self._warmup:
+            await asyncio.gather(*(asyncio.wrap_future(future) for future in self._warmup))
+
+    # ----- Запросы -----
+
+    async def predict(
+        self,
+        tier: str,
+        frequency_day: float,
+        frequency_day_o: float,
+        like_drink_f: str,
+        often_drink_f: str,
+    ) -> float:
+        """Ставит запрос в очередь и дожидается результата батча.
+
+        Если очередь заполнена, ожидает свободного места (backpressure).
+        """
+        row = (tier, frequency_day, frequency_day_o, like_drink_f, often_drink_f)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        self._wakeup.set()
+        return await future
+
+    # ----- Рабочий цикл -----
+
+    async def _collect_batch(self) -> list[tuple]:
+        """Ждёт первый запрос и добирает остальные до лимита размера или времени.
+
+        Запросы, уже снятые с очереди, при отмене или остановке отменяются
+        здесь же: их больше нет ни в очереди, ни в батчах в работе.
+        """
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        try:
+            while len(batch) < self.max_batch_size and not self._closing:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            self._cancel_batch(batch)
+            raise
+        if self._closing:
+            self._cancel_batch(batch)
+            return []
+        return batch
+
+    @staticmethod
+    def _cancel_batch(batch: list[tuple]) -> None:
+        for _, future in batch:
+            future.cancel()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._closing:
+            # Свободный исполнитель берётся до сбора батча: пока все заняты,
+            # запросы копятся в очереди и следующий батч уходит полным
+            await self._slots.acquire()
+            try:
+                batch = await self._collect_batch()
+            except BaseException:
+                self._slots.release()
+                raise
+            if not batch:
+                self._slots.release()
+                break
+            task = loop.create_task(self._process_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _process_batch(self, batch: list[tuple]) -> None:
+        rows = [row for row, _ in batch]
+        executor = self._executor
+
+        try:
+            predictions = await self._predict_many(executor, rows)
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:
+            logger.exception("Ошибка батча инференса (%d запросов)", len(batch))
+            if isinstance(exc, BrokenProcessPool) and executor is self._executor:
+                # Рабочий процесс упал — пул непригоден, поднимаем новый (один раз
+                # на все батчи, которые были в упавшем пуле)
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create_executor()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self._slots.release()
+
+        for (_, future), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result(float(prediction))
+        logger.debug("Батч инференса: %d запросов", len(batch))
+
+    async def _predict_many(
+        self, executor: Optional[ProcessPoolExecutor], rows: list[tuple]
+    ) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        if executor is None:
+            return await loop.run_in_executor(None, _predict_rows, self.predictor, rows)
+        return await loop.run_in_executor(
+            executor, _predict_in_worker, rows, self.predictor.model_version
+        )
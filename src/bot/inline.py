@@ -0,0 +1,138 @@
+"""Inline-клавиатуры диалога: выбор кнопками под одним сообщением.
+
+Каждая кнопка несёт компактный payload (шаг, действие, индекс в словаре
+или номер страницы, метка версии словарей — 8 байт при лимите Telegram в 64),
+поэтому выбор не нужно сверять со строками, а листание и переход к
+следующему шагу редактируют то же сообщение вместо отправки новых.
+"""
+
+import struct
+import zlib
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from telethon import Button, TelegramClient
+from telethon.tl.types import TypeReplyMarkup
+
+from src.config import FREQUENCY_MIN, FREQUENCY_MAX
+from src.model.predictor import MarkPredictor
+
+# Шаги диалога (как session["step"])
+STEP_TIER: int = 1
+STEP_LIKE_DRINK: int = 2
+STEP_LIKE_FREQUENCY: int = 3
+STEP_OFTEN_DRINK: int = 4
+STEP_OFTEN_FREQUENCY: int = 5
+
+# Действия кнопки: выбрать значение или открыть страницу
+ACTION_SELECT: int = 0
+ACTION_PAGE: int = 1
+
+# Раскладка: напитков на странице, кнопок в ряду
+INLINE_DRINKS_PER_PAGE: int = 10
+INLINE_DRINKS_PER_ROW: int = 2
+INLINE_FREQUENCIES_PER_ROW: int = 7
+
+# Шаг, действие, значение (индекс в словаре, частота или страница), метка версии
+_PAYLOAD = struct.Struct("!BBHI")
+
+
+@dataclass(frozen=True)
+class Callback:
+    """Разобранный payload inline-кнопки."""
+    step: int
+    action: int
+    value: int
+    version: int
+
+
+def version_tag(model_version: str) -> int:
+    """32-битная метка версии модели для payload."""
+    return zlib.crc32(model_version.encode())
+
+
+def encode_callback(step: int, action: int, value: int, version: int) -> bytes:
+    return _PAYLOAD.pack(step, action, value, version)
+
+
+def decode_callback(data: bytes) -> Optional[Callback]:
+    """Payload кнопки или None, если данные не от этих клавиатур."""
+    if len(data) != _PAYLOAD.size:
+        return None
+    return Callback(*_PAYLOAD.unpack(data))
+
+
+def _rows(buttons: list, per_row: int) -> list[list]:
+    return [buttons[i : i + per_row] for i in range(0, len(buttons), per_row)]
+
+
+def _drink_pages(step: int, drinks: tuple[str, ...], version: int) -> tuple[TypeReplyMarkup, ...]:
+    """Страницы выбора напитка со стрелками «назад/вперёд»."""
+    n_pages = max(1, -(-len(drinks) // INLINE_DRINKS_PER_PAGE))
+    pages = []
+    for page in range(n_pages):
+        start = page * INLINE_DRINKS_PER_PAGE
+        buttons = [
+            Button.inline(drink, encode_callback(step, ACTION_SELECT, code, version))
+            for code, drink in enumerate(drinks[start : start + INLINE_DRINKS_PER_PAGE], start)
+        ]
+        rows = _rows(buttons, INLINE_DRINKS_PER_ROW)
+        nav = []
+        if page > 0:
+            nav.append(Button.inline("◀️", encode_callback(step, ACTION_PAGE, page - 1, version)))
+        if page + 1 < n_pages:
+            nav.append(Button.inline("▶️", encode_callback(step, ACTION_PAGE, page + 1, version)))
+        if nav:
+            rows.append(nav)
+        pages.append(TelegramClient.build_reply_markup(rows))
+    return tuple(pages)
+
+
+def _frequency_page(step: int, version: int) -> tuple[TypeReplyMarkup, ...]:
+    buttons = [
+        Button.inline(str(freq), encode_callback(step, ACTION_SELECT, freq, version))
+        for freq in range(FREQUENCY_MIN, FREQUENCY_MAX + 1)
+    ]
+    return (TelegramClient.build_reply_markup(_rows(buttons, INLINE_FREQUENCIES_PER_ROW)),)
+
+
+@dataclass(frozen=True)
+class InlineKeyboards:
+    """Inline-клавиатуры всех шагов диалога для одной версии модели."""
+    model_version: str
+    tag: int
+    # Страницы клавиатуры каждого шага
+    pages: Mapping[int, tuple[TypeReplyMarkup, ...]]
+
+    def page(self, step: int, number: int = 0) -> TypeReplyMarkup:
+        """Страница ``number`` шага ``step`` (за границами — ближайшая)."""
+        pages = self.pages[step]
+        return pages[min(max(number, 0), len(pages) - 1)]
+
+
+def build_inline_keyboards(predictor: MarkPredictor) -> InlineKeyboards:
+    """Собирает inline-клавиатуры по словарям загруженной модели."""
+    # Версия читается первой — как в build_keyboards
+    version = predictor.model_version
+    tag = version_tag(version)
+    tiers = predictor.vocabulary("tier").values
+    tier_buttons = [
+        Button.inline(tier, encode_callback(STEP_TIER, ACTION_SELECT, code, tag))
+        for code, tier in enumerate(tiers)
+    ]
+    return InlineKeyboards(
+        model_version=version,
+        tag=tag,
+        pages=MappingProxyType({
+            STEP_TIER: (TelegramClient.build_reply_markup(_rows(tier_buttons, 2)),),
+            STEP_LIKE_DRINK: _drink_pages(
+                STEP_LIKE_DRINK, predictor.vocabulary("like_drink_f").values, tag
+            ),
+            STEP_LIKE_FREQUENCY: _frequency_page(STEP_LIKE_FREQUENCY, tag),
+            STEP_OFTEN_DRINK: _drink_pages(
+                STEP_OFTEN_DRINK, predictor.vocabulary("often_drink_f").values, tag
+            ),
+            STEP_OFTEN_FREQUENCY: _frequency_page(STEP_OFTEN_FREQUENCY, tag),
+        }),
+    )
@@ -0,0 +1,81 @@
+"""Клавиатуры бота, построенные заранее для текущей версии модели.
+
+Списки курсов и напитков меняются только вместе с моделью, поэтому все
+страницы клавиатур собираются в готовую разметку Telegram один раз, а
+обработчики лишь выбирают нужную страницу.
+"""
+
+from dataclasses import dataclass
+
+from telethon import Button, TelegramClient
+from telethon.tl.types import TypeReplyMarkup
+
+from src.model.predictor import MarkPredictor
+
+# Максимальное количество кнопок «Показать ещё» за раз
+BUTTONS_PER_PAGE: int = 10
+MORE_DRINKS_LABEL: str = "Показать ещё напитки"
+
+# Скрыть клавиатуру (шаги со вводом числа)
+CLEAR_KEYBOARD: TypeReplyMarkup = Button.clear()
+
+
+def _markup(buttons: list) -> TypeReplyMarkup:
+    return TelegramClient.build_reply_markup(buttons)
+
+
+def drink_buttons(drinks: list[str], start: int = 0, label: str = MORE_DRINKS_LABEL) -> list:
+    """Кнопки страницы напитков, начиная с ``start``, + кнопка «Показать ещё»."""
+    chunk = drinks[start : start + BUTTONS_PER_PAGE]
+    buttons = [[Button.text(d, resize=True)] for d in chunk]
+    if start + BUTTONS_PER_PAGE < len(drinks):
+        buttons.append([Button.text(label, resize=True)])
+    return buttons
+
+
+@dataclass(frozen=True)
+class DrinkPages:
+    """Все страницы клавиатуры одного списка напитков."""
+    pages: tuple[TypeReplyMarkup, ...]
+    # Страница за концом списка (пустая, как при листании дальше последней)
+    past_end: TypeReplyMarkup
+    size: int
+
+    @classmethod
+    def build(cls, drinks: list[str]) -> "DrinkPages":
+        return cls(
+            pages=tuple(
+                _markup(drink_buttons(drinks, start))
+                for start in range(0, len(drinks), BUTTONS_PER_PAGE)
+            ),
+            past_end=_markup(drink_buttons(drinks, len(drinks))),
+            size=len(drinks),
+        )
+
+    def page(self, start: int) -> TypeReplyMarkup:
+        """Страница, начинающаяся с напитка номер ``start``."""
+        if start >= self.size:
+            return self.past_end
+        return self.pages[start // BUTTONS_PER_PAGE]
+
+
+@dataclass(frozen=True)
+class Keyboards:
+    """Клавиатуры всех шагов диалога для одной версии модели."""
+    model_version: str
+    tiers: TypeReplyMarkup
+    like_drinks: DrinkPages
+    often_drinks: DrinkPages
+
+
+def build_keyboards(predictor: MarkPredictor) -> Keyboards:
+    """Собирает клавиатуры по словарям загруженной модели."""
+    # Версия читается первой: если модель перезагрузится посреди сборки,
+    # версия не совпадёт с новой и клавиатуры пересоберутся при следующем шаге
+    version = predictor.model_version
+    return Keyboards(
+        model_version=version,
+        tiers=_markup([[Button.text(t, resize=True)] for t in predictor.available_tiers]),
+        like_drinks=DrinkPages.build(predictor.available_like_drinks),
+        often_drinks=DrinkPages.build(predictor.available_often_drinks),
+    )
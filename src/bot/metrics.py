@@ -0,0 +1,389 @@
+"""Метрики горячего пути бота: реестр, HTTP-эндпоинт Prometheus и дампы в лог.
+
+Без внешних зависимостей: счётчики, gauge и гистограммы в памяти процесса,
+текстовый формат Prometheus отдаёт маленький HTTP-сервер на asyncio.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import threading
+import time
+from typing import Callable, Optional, TypeVar, Union
+
+from src.config import (
+    METRICS_HOST,
+    METRICS_PORT,
+    METRICS_DUMP_INTERVAL,
+    LOOP_LAG_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+LabelValues = tuple[str, ...]
+# Функция метрики возвращает число или {значение метки: число} (одна метка)
+MetricFunction = Callable[[], Union[float, dict[str, float]]]
+
+_M = TypeVar("_M", bound="_Metric")
+
+# Границы гистограмм задержек, сек
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+class _Metric:
+    """Общая часть метрик: имя, описание, метки и блокировка."""
+    kind: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: tuple[str, ...] = labelnames
+        self._lock = threading.Lock()
+        self._function: Optional[MetricFunction] = None
+
+    def set_function(self, function: MetricFunction) -> None:
+        """Значение метрики считается функцией в момент сбора."""
+        self._function = function
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _collect_function(self) -> dict[LabelValues, float]:
+        value = self._function()
+        if isinstance(value, dict):
+            return {(str(label),): float(v) for label, v in value.items()}
+        return {(): float(value)}
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        """(имя сэмпла, метки, значение) для вывода."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            values = dict(self._values)
+        if self._function is not None:
+            values.update(self._collect_function())
+        return [
+            (self.name, dict(zip(self.labelnames, key)), value)
+            for key, value in sorted(values.items())
+        ]
+
+
+class Gauge(Counter):
+    """Значение, которое может расти и убывать."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными границами корзин."""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets)) + (math.inf,)
+        # метки → [счётчики корзин..., сумма, количество]
+        self._values: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[idx] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        result = []
+        for key, state in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                result.append((f"{self.name}_bucket", {**labels, "le": le}, cumulative))
+            result.append((f"{self.name}_sum", labels, state[-2]))
+            result.append((f"{self.name}_count", labels, state[-1]))
+        return result
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Количество, среднее и оценка p99 по корзинам — для дампа в лог."""
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        result = {}
+        for key, state in sorted(values.items()):
+            count = state[-1]
+            p99, cumulative = math.inf, 0.0
+            for bound, bucket in zip(self.buckets, state):
+                cumulative += bucket
+                if cumulative >= 0.99 * count:
+                    p99 = bound
+                    break
+            result[",".join(key) or "all"] = {
+                "count": count,
+                "mean": state[-2] / count if count else 0.0,
+                "p99_le": p99,
+            }
+        return result
+
+
+class MetricsRegistry:
+    """Набор метрик процесса."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _M) -> _M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика уже зарегистрирована: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Текстовый формат экспозиции Prometheus (0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Структурированный снимок для дампа в лог."""
+        result = {}
+        for metric in self._metrics.values():
+            if isinstance(metric, Histogram):
+                result[metric.name] = metric.summary()
+            else:
+                result[metric.name] = {
+                    ",".join(labels.values()) or "value": value
+                    for _, labels, value in metric.samples()
+                }
+        return result
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+# ----- Метрики бота -----
+
+REGISTRY = MetricsRegistry()
+
+HANDLER_LATENCY = REGISTRY.register(Histogram(
+    "forecastmark_handler_seconds",
+    "Время обработки сообщения по шагам диалога",
+    ("step",),
+))
+PREDICTION_LATENCY = REGISTRY.register(Histogram(
+    "forecastmark_prediction_seconds",
+    "Время получения предсказания на последнем шаге (с очередью инференса)",
+))
+LOOP_LAG = REGISTRY.register(Histogram(
+    "forecastmark_event_loop_lag_seconds",
+    "Запаздывание event loop относительно запланированного пробуждения",
+))
+ACTIVE_SESSIONS = REGISTRY.register(Gauge(
+    "forecastmark_active_sessions",
+    "Число сессий диалога в хранилище",
+))
+UNKNOWN_CATEGORIES = REGISTRY.register(Counter(
+    "forecastmark_unknown_category_total",
+    "Неизвестные значения категорий, заменённые на код 0",
+    ("feature",),
+))
+PREDICTION_CACHE = REGISTRY.register(Counter(
+    "forecastmark_prediction_cache_total",
+    "Обращения к кэшу предсказаний текущей версии модели",
+    ("result",),
+))
+PREDICTION_LOG = REGISTRY.register(Counter(
+    "forecastmark_prediction_log_total",
+    "Записи журнала предсказаний: записанные и отброшенные",
+    ("result",),
+))
+DISPATCH_UPDATES = REGISTRY.register(Gauge(
+    "forecastmark_dispatch_updates",
+    "Апдейты в диспетчере: ждущие в очередях пользователей и обрабатываемые",
+    ("state",),
+))
+DISPATCH_WAIT = REGISTRY.register(Histogram(
+    "forecastmark_dispatch_wait_seconds",
+    "Ожидание апдейта в диспетчере до начала обработки",
+))
+DISPATCH_DROPPED = REGISTRY.register(Counter(
+    "forecastmark_dispatch_dropped_total",
+    "Апдейты, отброшенные диспетчером при перегрузке",
+    ("reason",),
+))
+OUTBOX_QUEUE = REGISTRY.register(Gauge(
+    "forecastmark_outbox_queue",
+    "Исходящие сообщения в очереди по приоритетам",
+    ("priority",),
+))
+OUTBOX_WAIT = REGISTRY.register(Histogram(
+    "forecastmark_outbox_wait_seconds",
+    "Время от постановки исходящего сообщения в очередь до его отправки",
+    ("priority",),
+))
+FLOOD_WAITS = REGISTRY.register(Counter(
+    "forecastmark_flood_wait_total",
+    "Ответы FloodWait от Telegram на исходящие запросы",
+))
+ERRORS = REGISTRY.register(Counter(
+    "forecastmark_errors_total",
+    "Ошибки обработки сообщений",
+    ("step",),
+))
+
+
+# ----- Фоновые задачи -----
+
+class LoopLagMonitor:
+    """Периодически засыпает и меряет, насколько позже event loop его разбудил."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL) -> None:
+        self.interval: float = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            LOOP_LAG.observe(max(0.0, loop.time() - expected))
+
+
+class MetricsExporter:
+    """HTTP-эндпоинт /metrics на локальном адресе и периодический дамп в лог."""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = REGISTRY,
+        host: str = METRICS_HOST,
+        port: int = METRICS_PORT,
+        dump_interval: float = METRICS_DUMP_INTERVAL,
+    ) -> None:
+        self.registry: MetricsRegistry = registry
+        self.host: str = host
+        self.port: int = port
+        self.dump_interval: float = dump_interval
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._dumper: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self.port > 0 and self._server is None:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            logger.info("Метрики: http://%s:%d/metrics", self.host, self.port)
+        if self.dump_interval > 0 and self._dumper is None:
+            self._dumper = asyncio.get_running_loop().create_task(self._dump_periodically())
+
+    async def stop(self) -> None:
+        if self._dumper is not None:
+            self._dumper.cancel()
+            try:
+                await self._dumper
+            except asyncio.CancelledError:
+                pass
+            self._dumper = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Заголовки запроса не нужны — дочитываем до пустой строки
+            while True:
+                header = await asyncio.wait_for(reader.readline(), timeout=5)
+                if header in (b"\r\n", b"\n", b""):
+                    break
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status = "200 OK"
+                body = self.registry.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dump_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.dump_interval)
+            logger.info(
+                "metrics %s",
+                json.dumps({"ts": time.time(), **self.registry.snapshot()}, ensure_ascii=False),
+            )
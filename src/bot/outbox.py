@@ -0,0 +1,242 @@
+"""Очередь исходящих сообщений с лимитами скорости и обработкой FloodWait.
+
+Ответы обработчиков не уходят в Telegram напрямую, а встают в очередь с
+приоритетом: итог предсказания отправляется раньше промежуточных вопросов.
+Планировщик держит общий лимит бота и лимит на чат (token bucket), а при
+FloodWait приостанавливает отправку на требуемое время и повторяет запрос,
+вместо того чтобы отдавать ошибку обработчику.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from telethon.errors import FloodWaitError
+
+from src.bot.metrics import OUTBOX_QUEUE, OUTBOX_WAIT, FLOOD_WAITS
+from src.config import (
+    SEND_RATE,
+    SEND_BURST,
+    SEND_CHAT_RATE,
+    SEND_CHAT_BURST,
+    SEND_MAX_RETRIES,
+    SEND_MAX_FLOOD_WAIT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты (меньше — раньше)
+PRIORITY_RESULT: int = 0
+PRIORITY_PROMPT: int = 1
+_PRIORITY_NAMES: dict[int, str] = {PRIORITY_RESULT: "result", PRIORITY_PROMPT: "prompt"}
+
+# Как часто забывать лимиты чатов, которые успели полностью восстановиться (сек)
+_PRUNE_INTERVAL: float = 60.0
+
+
+@dataclass
+class TokenBucket:
+    """Лимит скорости: ``rate`` токенов в секунду, не больше ``capacity`` сразу."""
+    rate: float
+    capacity: float
+    tokens: float
+    updated: float
+
+    @classmethod
+    def full(cls, rate: float, capacity: float, now: float) -> "TokenBucket":
+        return cls(rate=rate, capacity=capacity, tokens=capacity, updated=now)
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Через сколько секунд будет доступен токен (0 — уже доступен)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+@dataclass(order=True)
+class _Outgoing:
+    priority: int
+    seq: int
+    chat_id: int = field(compare=False)
+    send: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    queued_at: float = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+class OutboundQueue:
+    """Планировщик исходящих запросов с приоритетами и лимитами скорости.
+
+    ``send()`` ждёт фактической отправки и возвращает её результат, поэтому
+    порядок сообщений внутри диалога сохраняется. Пока очередь не запущена,
+    запросы выполняются сразу.
+    """
+
+    def __init__(
+        self,
+        rate: float = SEND_RATE,
+        burst: int = SEND_BURST,
+        chat_rate: float = SEND_CHAT_RATE,
+        chat_burst: int = SEND_CHAT_BURST,
+        max_retries: int = SEND_MAX_RETRIES,
+        max_flood_wait: float = SEND_MAX_FLOOD_WAIT,
+    ) -> None:
+        self.chat_rate: float = chat_rate
+        self.chat_burst: int = chat_burst
+        self.max_retries: int = max_retries
+        self.max_flood_wait: float = max_flood_wait
+        now = time.monotonic()
+        self._global: TokenBucket = TokenBucket.full(rate, burst, now)
+        self._chats: dict[int, TokenBucket] = {}
+        self._pruned_at: float = now
+        # До этого момента (monotonic) отправка приостановлена по FloodWait
+        self._paused_until: float = 0.0
+        self._heap: list[_Outgoing] = []
+        self._seq = itertools.count()
+        self._inflight: set[asyncio.Task] = set()
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing: bool = False
+
+        OUTBOX_QUEUE.set_function(self._queue_depth)
+
+    def _queue_depth(self) -> dict[str, int]:
+        depth = dict.fromkeys(_PRIORITY_NAMES.values(), 0)
+        for item in list(self._heap):
+            depth[_PRIORITY_NAMES.get(item.priority, "prompt")] += 1
+        return depth
+
+    # ----- Жизненный цикл -----
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Досылает очередь (до ``timeout``), остальное отменяет."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        _, pending = await asyncio.wait([self._task], timeout=timeout)
+        if pending:
+            logger.warning("Исходящая очередь не дослана: %d сообщений", len(self._heap))
+            for item in self._heap:
+                item.future.cancel()
+            self._heap.clear()
+            self._wakeup.set()
+            await self._task
+        if self._inflight:
+            await asyncio.wait(self._inflight)
+        self._task = None
+
+    # ----- Отправка -----
+
+    async def send(
+        self,
+        chat_id: int,
+        send: Callable[[], Awaitable[Any]],
+        priority: int = PRIORITY_PROMPT,
+    ) -> Any:
+        """Выполняет ``send()`` в свою очередь с учётом лимитов и FloodWait."""
+        if self._task is None or self._closing:
+            return await send()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, _Outgoing(
+            priority, next(self._seq), chat_id, send, future, time.monotonic()
+        ))
+        self._wakeup.set()
+        return await future
+
+    async def _run(self) -> None:
+        while not (self._closing and not self._heap):
+            self._wakeup.clear()
+            item, delay = self._next(time.monotonic())
+            if item is not None:
+                task = asyncio.get_running_loop().create_task(self._deliver(item))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _next(self, now: float) -> tuple[Optional[_Outgoing], Optional[float]]:
+        """Следующий запрос, который можно отправить сейчас, или (None, сколько ждать)."""
+        if now < self._paused_until:
+            return None, self._paused_until - now
+        delay = self._global.delay(now)
+        if delay > 0:
+            return None, delay
+        if now - self._pruned_at > _PRUNE_INTERVAL:
+            self._chats = {
+                chat_id: bucket for chat_id, bucket in self._chats.items()
+                if not bucket.is_full(now)
+            }
+            self._pruned_at = now
+
+        # Самый приоритетный запрос в чат, лимит которого не исчерпан
+        chosen, blocked, wait = None, [], None
+        while self._heap:
+            item = heapq.heappop(self._heap)
+            if item.future.done():
+                # Обработчик уже не ждёт ответа
+                continue
+            bucket = self._chats.get(item.chat_id)
+            if bucket is None:
+                bucket = self._chats[item.chat_id] = TokenBucket.full(
+                    self.chat_rate, self.chat_burst, now
+                )
+            chat_delay = bucket.delay(now)
+            if chat_delay == 0:
+                chosen = item
+                bucket.consume(now)
+                self._global.consume(now)
+                break
+            blocked.append(item)
+            wait = chat_delay if wait is None else min(wait, chat_delay)
+        for item in blocked:
+            heapq.heappush(self._heap, item)
+        return chosen, wait
+
+    async def _deliver(self, item: _Outgoing) -> None:
+        try:
+            result = await item.send()
+        except FloodWaitError as e:
+            FLOOD_WAITS.inc()
+            item.attempts += 1
+            if self._closing or e.seconds > self.max_flood_wait or item.attempts > self.max_retries:
+                if not item.future.done():
+                    item.future.set_exception(e)
+                return
+            logger.warning(
+                "FloodWait %d с: отправка приостановлена (попытка %d)", e.seconds, item.attempts
+            )
+            self._paused_until = max(self._paused_until, time.monotonic() + e.seconds)
+            heapq.heappush(self._heap, item)
+            self._wakeup.set()
+        except Exception as e:
+            if not item.future.done():
+                item.future.set_exception(e)
+        else:
+            OUTBOX_WAIT.observe(
+                time.monotonic() - item.queued_at, priority=_PRIORITY_NAMES.get(item.priority, "prompt")
+            )
+            if not item.future.done():
+                item.future.set_result(result)
@@ -0,0 +1,70 @@
+"""Фоновая горячая перезагрузка модели без перезапуска бота."""
+
+import asyncio
+import logging
+from typing import Optional
+
+from src.config import MODEL_RELOAD_INTERVAL
+from src.model.predictor import MarkPredictor
+
+logger = logging.getLogger(__name__)
+
+
+class ModelReloader:
+    """Следит за файлами модели и энкодеров и перезагружает предиктор.
+
+    Перезагрузка запускается, только когда новые файлы не менялись целый
+    интервал опроса: тренер записывает модель и энкодеры по очереди, и так
+    бот не подхватит модель без соответствующих ей энкодеров. Загрузка идёт
+    в пуле потоков, event loop не блокируется.
+    """
+
+    def __init__(
+        self, predictor: MarkPredictor, interval: float = MODEL_RELOAD_INTERVAL
+    ) -> None:
+        self.predictor: MarkPredictor = predictor
+        self.interval: float = interval
+        self._watcher: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Запускает опрос файлов (если интервал положительный)."""
+        if self._watcher is None and self.interval > 0:
+            self._watcher = asyncio.get_running_loop().create_task(self._run())
+            logger.info("Слежение за моделью: опрос каждые %.0f с", self.interval)
+
+    async def stop(self) -> None:
+        if self._watcher is None:
+            return
+        self._watcher.cancel()
+        try:
+            await self._watcher
+        except asyncio.CancelledError:
+            pass
+        self._watcher = None
+
+    async def reload(self) -> None:
+        """Явно перезагружает модель в пуле потоков."""
+        await asyncio.get_running_loop().run_in_executor(None, self.predictor.reload)
+
+    async def _run(self) -> None:
+        pending: Optional[tuple] = None
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                signature = self.predictor.artifacts_signature()
+            except OSError:
+                # Файл в процессе замены — проверим на следующем шаге
+                continue
+
+            if signature == self.predictor.loaded_signature:
+                pending = None
+                continue
+            if signature != pending:
+                pending = signature
+                continue
+
+            try:
+                await self.reload()
+            except Exception:
+                logger.exception("Не удалось перезагрузить модель, остаётся прежняя версия")
+            pending = None
@@ -0,0 +1,269 @@
+"""Хранилища сессий диалога пользователей бота."""
+
+import json
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Optional
+
+from src.config import (
+    SESSION_TTL,
+    SESSION_MAX_COUNT,
+    SESSION_STORE_PATH,
+    SESSION_STORE_BUSY_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """Компактная запись состояния 5-шагового диалога.
+
+    Поддерживает доступ как к словарю (``session["tier"]``, ``get``, ``pop``);
+    значение None означает отсутствие ключа.
+    """
+
+    __slots__ = (
+        "step",
+        "tier",
+        "like_drink_f",
+        "frequency_day",
+        "often_drink_f",
+        "frequency_day_o",
+        "drink_page",
+        "often_drink_page",
+        "touched_at",
+    )
+
+    # Поля, которые сохраняются в постоянное хранилище
+    FIELDS: tuple[str, ...] = __slots__[:-1]
+
+    def __init__(self, **values: Any) -> None:
+        for name in self.__slots__:
+            setattr(self, name, None)
+        self.touched_at = 0.0
+        for key, value in values.items():
+            self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        value = getattr(self, key) if key in self.FIELDS else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS and getattr(self, key) is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key) if key in self.FIELDS else None
+        return default if value is None else value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        value = self.get(key, default)
+        if key in self.FIELDS:
+            setattr(self, key, None)
+        return value
+
+    def to_dict(self) -> dict[str, Any]:
+        """Заполненные поля сессии для сериализации."""
+        return {name: getattr(self, name) for name in self.FIELDS if name in self}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Session":
+        return cls(**{k: v for k, v in data.items() if k in cls.FIELDS})
+
+    def __repr__(self) -> str:
+        return f"Session({self.to_dict()!r})"
+
+
+@dataclass
+class SessionStoreStats:
+    """Счётчики обращений к хранилищу сессий."""
+    hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class SessionStore(ABC):
+    """Интерфейс хранилища сессий: user_id → Session с истечением по TTL."""
+
+    def __init__(self, ttl: float = SESSION_TTL) -> None:
+        self.ttl: float = ttl
+        self.stats: SessionStoreStats = SessionStoreStats()
+
+    @abstractmethod
+    def get(self, user_id: int) -> Optional[Session]:
+        """Возвращает живую сессию пользователя или None."""
+
+    @abstractmethod
+    def save(self, user_id: int, session: Session) -> None:
+        """Сохраняет сессию и продлевает её TTL."""
+
+    @abstractmethod
+    def pop(self, user_id: int, default: Optional[Session] = None) -> Optional[Session]:
+        """Удаляет сессию пользователя и возвращает её."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Количество хранимых сессий (включая ещё не вычищенные просроченные)."""
+
+    def __contains__(self, user_id: int) -> bool:
+        return self.get(user_id) is not None
+
+    def close(self) -> None:
+        """Освобождает ресурсы хранилища."""
+
+
+class MemorySessionStore(SessionStore):
+    """Ограниченное хранилище в памяти с вытеснением LRU и истечением по TTL."""
+
+    def __init__(self, ttl: float = SESSION_TTL, max_size: int = SESSION_MAX_COUNT) -> None:
+        super().__init__(ttl)
+        self.max_size: int = max_size
+        self._sessions: OrderedDict[int, Session] = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[Session]:
+        session = self._sessions.get(user_id)
+        if session is None:
+            self.stats.misses += 1
+            return None
+        if time.monotonic() - session.touched_at > self.ttl:
+            del self._sessions[user_id]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._sessions.move_to_end(user_id)
+        self.stats.hits += 1
+        return session
+
+    def save(self, user_id: int, session: Session) -> None:
+        session.touched_at = time.monotonic()
+        self._sessions[user_id] = session
+        self._sessions.move_to_end(user_id)
+        self._purge(session.touched_at)
+
+    def pop(self, user_id: int, default: Optional[Session] = None) -> Optional[Session]:
+        return self._sessions.pop(user_id, default)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _purge(self, now: float) -> None:
+        """Удаляет просроченные и лишние сессии с начала LRU-очереди.
+
+        Сессии упорядочены по последнему обращению (чтению или сохранению).
+        Просроченная сессия за живой остаётся до обращения к ней или до
+        выхода в начало очереди; размер очереди ограничен в любом случае.
+        """
+        while self._sessions:
+            user_id, oldest = next(iter(self._sessions.items()))
+            if now - oldest.touched_at > self.ttl:
+                self.stats.expirations += 1
+            elif len(self._sessions) > self.max_size:
+                self.stats.evictions += 1
+            else:
+                break
+            del self._sessions[user_id]
+
+
+class SQLiteSessionStore(SessionStore):
+    """Постоянное хранилище в SQLite (WAL), общее для нескольких процессов.
+
+    Сессии переживают перезапуск бота; просроченные удаляются при записи.
+    Обращения синхронные и идут из event loop: чтения в WAL не блокируются,
+    а блокировку записи другого процесса обращение ждёт не дольше
+    ``busy_timeout`` секунд и затем падает с ``sqlite3.OperationalError``
+    (обработчик отвечает пользователю ошибкой), не останавливая бота.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = SESSION_TTL,
+        busy_timeout: float = SESSION_STORE_BUSY_TIMEOUT,
+    ) -> None:
+        super().__init__(ttl)
+        self.path: str = path
+        # Подготовка базы при запуске может подождать другой процесс дольше
+        self._conn = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " user_id INTEGER PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)"
+        )
+        self._conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+        logger.info("Хранилище сессий SQLite: %s", path)
+
+    def get(self, user_id: int) -> Optional[Session]:
+        row = self._conn.execute(
+            "SELECT data, updated_at FROM sessions WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        data, updated_at = row
+        if time.time() - updated_at > self.ttl:
+            self._conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return Session.from_dict(json.loads(data))
+
+    def save(self, user_id: int, session: Session) -> None:
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions (user_id, data, updated_at) VALUES (?, ?, ?)",
+            (user_id, json.dumps(session.to_dict(), ensure_ascii=False), now),
+        )
+        expired = self._conn.execute(
+            "DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,)
+        ).rowcount
+        self.stats.expirations += max(expired, 0)
+
+    def pop(self, user_id: int, default: Optional[Session] = None) -> Optional[Session]:
+        # SELECT и DELETE в одной транзакции записи: DELETE ... RETURNING
+        # есть только с SQLite 3.35
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return Session.from_dict(json.loads(row[0])) if row is not None else default
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def create_session_store(path: str = SESSION_STORE_PATH) -> SessionStore:
+    """Создаёт SQLite-хранилище, если задан путь, иначе хранилище в памяти."""
+    if path:
+        return SQLiteSessionStore(path)
+    return MemorySessionStore()
@@ -0,0 +1,151 @@
+"""Супервизор шардированного запуска бота.
+
+Запускает N процессов ``src.bot.bot``, каждый обрабатывает своих
+пользователей (``sender_id % N``). Сессии диалога лежат в общем
+SQLite-хранилище (WAL), поэтому диалог переживает перезапуск шарда и смену
+их числа. Упавшие шарды перезапускаются, по SIGINT/SIGTERM останавливаются все:
+
+    python -m src.bot.supervisor --workers 4
+"""
+
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from src.config import BASE_DIR, BOT_WORKERS, SESSION_STORE_PATH, SHARED_SESSION_STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Задержка перезапуска упавшего шарда (сек): удваивается до максимума и
+# сбрасывается, если шард до падения проработал дольше RESTART_RESET_AFTER
+RESTART_DELAY_MIN: float = 1.0
+RESTART_DELAY_MAX: float = 60.0
+RESTART_RESET_AFTER: float = 60.0
+
+# Сколько ждать штатной остановки шардов, прежде чем их убить (сек)
+SHUTDOWN_TIMEOUT: float = 15.0
+POLL_INTERVAL: float = 0.5
+
+
+@dataclass
+class Shard:
+    """Процесс бота, обслуживающий один шард пользователей."""
+    index: int
+    process: Optional[subprocess.Popen] = None
+    started_at: float = 0.0
+    restart_delay: float = RESTART_DELAY_MIN
+    restart_at: float = 0.0
+
+
+class Supervisor:
+    """Запускает шарды бота, перезапускает упавшие и останавливает все по сигналу."""
+
+    def __init__(self, workers: int = BOT_WORKERS, session_store_path: str = "") -> None:
+        if workers < 1:
+            raise ValueError("Нужен хотя бы один шард")
+        self.workers: int = workers
+        self.session_store_path: str = (
+            session_store_path or SESSION_STORE_PATH or str(SHARED_SESSION_STORE_PATH)
+        )
+        self.shards: list[Shard] = [Shard(index) for index in range(workers)]
+        self._stopping: bool = False
+
+    def run(self) -> None:
+        """Блокирующий цикл супервизора до сигнала остановки."""
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        logger.info(
+            "Запуск %d шардов, хранилище сессий: %s", self.workers, self.session_store_path
+        )
+
+        try:
+            while not self._stopping:
+                now = time.monotonic()
+                for shard in self.shards:
+                    self._check(shard, now)
+                time.sleep(POLL_INTERVAL)
+        finally:
+            self._stop_all()
+
+    def _request_stop(self, signum: int, frame: Any) -> None:
+        logger.info("Получен сигнал %s, останавливаем шарды", signal.Signals(signum).name)
+        self._stopping = True
+
+    # ----- Шарды -----
+
+    def _start(self, shard: Shard) -> None:
+        command = [
+            sys.executable, "-m", "src.bot.bot",
+            "--shard", str(shard.index), "--shards", str(self.workers),
+        ]
+        env = {**os.environ, "SESSION_STORE_PATH": self.session_store_path}
+        # Своя группа процессов: Ctrl+C получает только супервизор и
+        # останавливает шарды сам, по одному разу
+        shard.process = subprocess.Popen(command, cwd=BASE_DIR, env=env, start_new_session=True)
+        shard.started_at = time.monotonic()
+        logger.info("Шард %d запущен (pid %d)", shard.index, shard.process.pid)
+
+    def _check(self, shard: Shard, now: float) -> None:
+        """Запускает шард, если пора, или планирует перезапуск упавшего."""
+        if shard.process is None:
+            if now >= shard.restart_at:
+                self._start(shard)
+            return
+
+        code = shard.process.poll()
+        if code is None:
+            return
+
+        if now - shard.started_at > RESTART_RESET_AFTER:
+            shard.restart_delay = RESTART_DELAY_MIN
+        logger.warning(
+            "Шард %d завершился с кодом %d, перезапуск через %.0f с",
+            shard.index, code, shard.restart_delay,
+        )
+        shard.process = None
+        shard.restart_at = now + shard.restart_delay
+        shard.restart_delay = min(shard.restart_delay * 2, RESTART_DELAY_MAX)
+
+    def _stop_all(self) -> None:
+        """Просит шарды завершиться (SIGINT), по таймауту — убивает."""
+        running = [shard.process for shard in self.shards if shard.process is not None]
+        for process in running:
+            if process.poll() is None:
+                if sys.platform == "win32":
+                    process.terminate()
+                else:
+                    process.send_signal(signal.SIGINT)
+
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        for process in running:
+            try:
+                process.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logger.warning("Шард (pid %d) не остановился, завершаем принудительно", process.pid)
+                process.kill()
+                process.wait()
+        logger.info("👋 Все шарды остановлены")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Шардированный запуск бота ForecastMark")
+    parser.add_argument("--workers", type=int, default=BOT_WORKERS, help="процессов бота")
+    parser.add_argument("--session-store", default="",
+                        help="SQLite-файл сессий (по умолчанию SESSION_STORE_PATH "
+                             "или bot_sessions.db в корне проекта)")
+    args = parser.parse_args(argv)
+    Supervisor(args.workers, args.session_store).run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    main()
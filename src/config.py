@@ -5,6 +5,7 @@
 
 import os
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
 # Загружаем .env из корня проекта
@@ -21,6 +22,15 @@ MODEL_ALT_PATH: Path = MODELS_DIR / "best_xgboost_model.joblib"
 ENCODERS_PATH: Path = MODELS_DIR / "label_encoders.joblib"
 MODEL_INFO_PATH: Path = MODELS_DIR / "model_info.joblib"
 DATASET_PATH: Path = DATA_DIR / "drinks.csv"
+# Дисковый кэш закодированных признаков для потокового обучения
+FEATURE_CACHE_DIR: Path = DATA_DIR / "cache"
+# Журнал предсказаний бота (SQLite, WAL; пусто — не вести)
+PREDICTION_LOG_PATH: str = os.getenv("PREDICTION_LOG_PATH", str(DATA_DIR / "prediction_log.db"))
+# Предрасчитанная таблица предсказаний по всей сетке входов бота
+PREDICTION_TABLE_PATH: Path = MODELS_DIR / "prediction_table.npz"
+# Бандл для быстрого старта бота: модель в UBJSON, деревья в плоских
+# массивах и словари категорий
+MODEL_BUNDLE_PATH: Path = MODELS_DIR / "model_bundle.bin"
 
 # ---- Telegram API ----
 API_ID: int = int(os.getenv("API_ID", "0"))
@@ -30,6 +40,74 @@ BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
 # ---- Бот ----
 SESSION_NAME: str = "mark_predictor_bot"
 
+# Вид диалога: "reply" — кнопки-подсказки, каждый шаг новым сообщением;
+# "inline" — inline-кнопки, все шаги редактируют одно сообщение
+DIALOG_MODE: str = os.getenv("DIALOG_MODE", "reply")
+
+# Сессии диалога: время жизни без активности (сек), лимит в памяти и путь
+# к SQLite-хранилищу (пусто — хранить в памяти процесса)
+SESSION_TTL: float = 30 * 60
+SESSION_MAX_COUNT: int = 10_000
+SESSION_STORE_PATH: str = os.getenv("SESSION_STORE_PATH", "")
+# Сколько обращение к SQLite-хранилищу ждёт блокировку записи другого
+# процесса (сек): вызовы идут из event loop, долгое ожидание остановило бы бота
+SESSION_STORE_BUSY_TIMEOUT: float = 0.1
+
+# Шардированный запуск (python -m src.bot.supervisor): число процессов бота
+# и общее SQLite-хранилище сессий, если SESSION_STORE_PATH не задан
+BOT_WORKERS: int = int(os.getenv("BOT_WORKERS", "2"))
+SHARED_SESSION_STORE_PATH: Path = BASE_DIR / "bot_sessions.db"
+
+# Диспетчер апдейтов: одновременно обрабатываемых апдейтов (разных
+# пользователей), предел очереди одного пользователя и всех очередей вместе;
+# апдейты сверх пределов отбрасываются
+DISPATCH_CONCURRENCY: int = int(os.getenv("DISPATCH_CONCURRENCY", "64"))
+DISPATCH_USER_QUEUE_SIZE: int = 8
+DISPATCH_MAX_PENDING: int = 4096
+
+# Исходящие сообщения: общий лимит бота (сообщений/сек и всплеск; при
+# шардировании делится между шардами), лимит на чат, число повторов после
+# FloodWait и самый долгий FloodWait (сек), который имеет смысл переждать
+SEND_RATE: float = 25.0
+SEND_BURST: int = 30
+SEND_CHAT_RATE: float = 1.0
+SEND_CHAT_BURST: int = 3
+SEND_MAX_RETRIES: int = 3
+SEND_MAX_FLOOD_WAIT: float = 120.0
+
+# Период опроса файлов модели для горячей перезагрузки (сек, 0 — выключено)
+MODEL_RELOAD_INTERVAL: float = 10.0
+
+# Чем считать деревья при инференсе: "numpy" (без зависимости от xgboost)
+# или "xgboost" (рантайм XGBoost)
+PREDICTOR_BACKEND: str = os.getenv("PREDICTOR_BACKEND", "numpy")
+
+# LRU-кэш готовых предсказаний по закодированным признакам (0 — выключен)
+PREDICTION_CACHE_SIZE: int = 4096
+
+# Метрики: HTTP-эндпоинт Prometheus (порт 0 — выключен), период дампа
+# метрик в лог (сек, 0 — выключен) и период замера задержки event loop
+METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9108"))
+METRICS_DUMP_INTERVAL: float = float(os.getenv("METRICS_DUMP_INTERVAL", "0"))
+LOOP_LAG_INTERVAL: float = 0.5
+
+# Очередь инференса: размер батча, ожидание добора батча (сек), глубина очереди
+INFERENCE_BATCH_SIZE: int = 32
+INFERENCE_MAX_WAIT: float = 0.005
+INFERENCE_QUEUE_SIZE: int = 1024
+# Процессов инференса (0 — батчи считаются в пуле потоков процесса бота)
+INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "0"))
+# Батчи до стольких запросов считаются построчно через predict(): на паре
+# строк векторная подготовка predict_many() дороже самого расчёта
+INFERENCE_SCALAR_BATCH: int = 8
+
+# Запись журнала предсказаний: записей в батче, период сброса (сек) и предел
+# буфера в памяти (при медленном диске новые записи сверх него отбрасываются)
+PREDICTION_LOG_BATCH_SIZE: int = 256
+PREDICTION_LOG_FLUSH_INTERVAL: float = 1.0
+PREDICTION_LOG_MAX_PENDING: int = 10_000
+
 # ---- Модель ----
 RANDOM_STATE: int = 52
 CV_RANDOM_STATE: int = 42
@@ -45,6 +123,9 @@ FREQUENCY_MAX: int = 20
 # K-Fold
 KFOLD_SPLITS: int = 5
 
+# Число параллельных задач (параметры × фолд) при подборе гиперпараметров
+TRAIN_WORKERS: int = os.cpu_count() or 1
+
 # Сетка гиперпараметров для подбора модели
 PARAM_GRID: list[dict] = [
     {"n_estimators": 50, "learning_rate": 0.1, "max_depth": 4},
@@ -53,7 +134,41 @@ PARAM_GRID: list[dict] = [
     {"n_estimators": 100, "learning_rate": 0.01, "max_depth": 4},
 ]
 
+# Дообучение: число новых деревьев поверх сохранённой модели
+CONTINUE_ROUNDS: int = 20
+
+# Потоковое обучение: число строк CSV в части (None — читать датасет целиком)
+TRAIN_CHUNKSIZE: Optional[int] = None
+
+# Режим подбора гиперпараметров: "grid" — полный перебор PARAM_GRID,
+# "halving" — successive halving по SEARCH_SPACE с ранней остановкой
+SEARCH_MODE: str = "grid"
+
+# Пространство поиска для режима "halving" (n_estimators задаёт бюджет раунда)
+SEARCH_SPACE: dict[str, list] = {
+    "learning_rate": [0.01, 0.03, 0.05, 0.1, 0.2],
+    "max_depth": [2, 3, 4, 5, 6],
+    "min_child_weight": [1, 3, 5],
+    "subsample": [0.7, 0.85, 1.0],
+    "colsample_bytree": [0.6, 0.8, 1.0],
+}
+HALVING_CANDIDATES: int = 27
+HALVING_ETA: int = 3
+HALVING_MIN_ROUNDS: int = 10
+HALVING_MAX_ROUNDS: int = 300
+EARLY_STOPPING_ROUNDS: int = 10
+# Доля обучающей части фолда, отложенная под раннюю остановку: валидация
+# фолда остаётся нетронутой и честно оценивает кандидата
+EARLY_STOPPING_FRACTION: float = 0.2
+
 # Категориальные и числовые столбцы
+INPUT_COLUMNS: list[str] = [
+    "tier",
+    "frequency_day",
+    "frequency_day_o",
+    "like_drink_f",
+    "often_drink_f",
+]
 CATEGORICAL_COLUMNS: list[str] = ["tier", "like_drink_f", "often_drink_f"]
 NUMERIC_COLUMNS: list[str] = ["mark"]
 FEATURE_COLUMNS: list[str] = [
@@ -0,0 +1,201 @@
+"""Потоковая загрузка датасета в дисковый кэш закодированных признаков.
+
+CSV читается частями: каждая часть очищается, освобождается от пропусков
+и дописывается в бинарные файлы, а словари категорий растут по мере чтения.
+В конце провизорные коды категорий переводятся в коды LabelEncoder'а
+(индексы в отсортированном словаре), и признаки сохраняются в .npy,
+которые затем открываются через memmap.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from src.config import (
+    CATEGORICAL_COLUMNS,
+    NUMERIC_COLUMNS,
+    FEATURE_COLUMNS,
+    RANDOM_STATE,
+    TEST_SIZE,
+    KFOLD_SPLITS,
+)
+from src.data.preprocessing import clean_categorical_series, clean_numeric_series
+
+logger = logging.getLogger(__name__)
+
+# Коды частей выборки в split.npy
+SPLIT_TRAIN: int = 0
+SPLIT_VALID: int = 1
+SPLIT_TEST: int = 2
+
+# Доля валидации внутри обучающей части (как у одного фолда K-Fold)
+VALID_SIZE: float = (1 - TEST_SIZE) / KFOLD_SPLITS
+
+
+@dataclass
+class FeatureCache:
+    """Дисковый кэш признаков: X.npy, y.npy, split.npy и vocab.json."""
+    directory: Path
+    n_rows: int
+    vocabularies: dict[str, list[str]]
+
+    @property
+    def features(self) -> np.ndarray:
+        """Матрица признаков (n_rows × len(FEATURE_COLUMNS)), float32, memmap."""
+        return np.load(self.directory / "X.npy", mmap_mode="r")
+
+    @property
+    def target(self) -> np.ndarray:
+        """Целевая переменная, float32, memmap."""
+        return np.load(self.directory / "y.npy", mmap_mode="r")
+
+    @property
+    def splits(self) -> np.ndarray:
+        """Код части выборки для каждой строки (SPLIT_TRAIN/VALID/TEST), memmap."""
+        return np.load(self.directory / "split.npy", mmap_mode="r")
+
+    def label_encoders(self) -> dict[str, LabelEncoder]:
+        """LabelEncoder'ы, эквивалентные обученным на всём датасете."""
+        encoders = {}
+        for col, classes in self.vocabularies.items():
+            le = LabelEncoder()
+            le.classes_ = np.asarray(classes, dtype=object)
+            encoders[col] = le
+        return encoders
+
+    def iter_batches(
+        self, split: int, batch_rows: int
+    ) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """Отдаёт (X, y) части выборки ``split`` батчами до ``batch_rows`` строк кэша."""
+        X, y, splits = self.features, self.target, self.splits
+        for start in range(0, self.n_rows, batch_rows):
+            stop = start + batch_rows
+            mask = splits[start:stop] == split
+            if mask.any():
+                yield np.asarray(X[start:stop][mask]), np.asarray(y[start:stop][mask])
+
+    @classmethod
+    def load(cls, directory: Path) -> "FeatureCache":
+        """Открывает ранее построенный кэш."""
+        vocabularies = json.loads((directory / "vocab.json").read_text(encoding="utf-8"))
+        n_rows = len(np.load(directory / "y.npy", mmap_mode="r"))
+        return cls(directory=directory, n_rows=n_rows, vocabularies=vocabularies)
+
+
+def _read_chunks(dataset_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Читает нужные колонки CSV частями, очищает и удаляет пропуски."""
+    numeric_features = [col for col in FEATURE_COLUMNS if not col.endswith("_encoded")]
+    usecols = CATEGORICAL_COLUMNS + NUMERIC_COLUMNS + numeric_features
+
+    for chunk in pd.read_csv(dataset_path, usecols=usecols, chunksize=chunksize):
+        for col in CATEGORICAL_COLUMNS:
+            chunk[col] = clean_categorical_series(chunk[col])
+        for col in NUMERIC_COLUMNS:
+            chunk[col] = clean_numeric_series(chunk[col])
+        yield chunk.dropna(subset=CATEGORICAL_COLUMNS + NUMERIC_COLUMNS)
+
+
+def build_feature_cache(
+    dataset_path: str, cache_dir: Path, chunksize: int
+) -> FeatureCache:
+    """Строит кэш признаков за один проход по CSV.
+
+    Args:
+        dataset_path: Путь к CSV с данными опроса.
+        cache_dir: Каталог кэша (создаётся при необходимости).
+        chunksize: Число строк CSV в одной части.
+
+    Returns:
+        Описание построенного кэша.
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    vocab: dict[str, dict[str, int]] = {col: {} for col in CATEGORICAL_COLUMNS}
+    rng = np.random.default_rng(RANDOM_STATE)
+    n_rows = 0
+
+    logger.info("Потоковая загрузка %s частями по %d строк", dataset_path, chunksize)
+    with open(cache_dir / "X.raw", "wb") as x_file, \
+            open(cache_dir / "y.raw", "wb") as y_file, \
+            open(cache_dir / "split.raw", "wb") as split_file:
+        for chunk in _read_chunks(dataset_path, chunksize):
+            features = np.empty((len(chunk), len(FEATURE_COLUMNS)), dtype=np.float32)
+            for idx, col in enumerate(FEATURE_COLUMNS):
+                source = col.removesuffix("_encoded")
+                if source in vocab:
+                    # Провизорный код — порядок первого появления значения
+                    codes = vocab[source]
+                    for value in chunk[source].unique():
+                        codes.setdefault(value, len(codes))
+                    features[:, idx] = chunk[source].map(codes).to_numpy()
+                else:
+                    features[:, idx] = chunk[col].astype(float).to_numpy()
+
+            # Случайное разбиение построчно; не зависит от размера частей
+            draw = rng.random(len(chunk))
+            split = np.full(len(chunk), SPLIT_TRAIN, dtype=np.uint8)
+            split[draw < TEST_SIZE + VALID_SIZE] = SPLIT_VALID
+            split[draw < TEST_SIZE] = SPLIT_TEST
+
+            x_file.write(features.tobytes())
+            y_file.write(chunk[NUMERIC_COLUMNS[0]].to_numpy(dtype=np.float32).tobytes())
+            split_file.write(split.tobytes())
+            n_rows += len(chunk)
+
+    if n_rows == 0:
+        raise ValueError(f"В датасете нет строк без пропусков: {dataset_path}")
+
+    vocabularies = {col: sorted(codes) for col, codes in vocab.items()}
+    _finalize_codes(cache_dir, n_rows, vocab, vocabularies, chunksize)
+
+    (cache_dir / "vocab.json").write_text(
+        json.dumps(vocabularies, ensure_ascii=False), encoding="utf-8"
+    )
+    logger.info(
+        "Кэш признаков построен: %s, %d строк, словари: %s",
+        cache_dir, n_rows, {col: len(classes) for col, classes in vocabularies.items()},
+    )
+    return FeatureCache(directory=cache_dir, n_rows=n_rows, vocabularies=vocabularies)
+
+
+def _finalize_codes(
+    cache_dir: Path,
+    n_rows: int,
+    vocab: dict[str, dict[str, int]],
+    vocabularies: dict[str, list[str]],
+    chunksize: int,
+) -> None:
+    """Переводит провизорные коды в коды LabelEncoder'а и пишет .npy блоками."""
+    remaps = {}
+    for col, codes in vocab.items():
+        final = {value: idx for idx, value in enumerate(vocabularies[col])}
+        remap = np.empty(len(codes), dtype=np.float32)
+        for value, provisional in codes.items():
+            remap[provisional] = final[value]
+        remaps[FEATURE_COLUMNS.index(col + "_encoded")] = remap
+
+    layouts = {
+        "X": (np.float32, (n_rows, len(FEATURE_COLUMNS))),
+        "y": (np.float32, (n_rows,)),
+        "split": (np.uint8, (n_rows,)),
+    }
+    for name, (dtype, shape) in layouts.items():
+        raw_path = cache_dir / f"{name}.raw"
+        raw = np.memmap(raw_path, dtype=dtype, mode="r", shape=shape)
+        out = np.lib.format.open_memmap(
+            cache_dir / f"{name}.npy", mode="w+", dtype=dtype, shape=shape
+        )
+        for start in range(0, n_rows, chunksize):
+            block = np.array(raw[start:start + chunksize])
+            if name == "X":
+                for idx, remap in remaps.items():
+                    block[:, idx] = remap[block[:, idx].astype(np.intp)]
+            out[start:start + chunksize] = block
+        out.flush()
+        del raw, out
+        raw_path.unlink()
@@ -0,0 +1,359 @@
+"""Журнал предсказаний бота: буферизованная асинхронная запись в SQLite.
+
+Каждое предсказание (входы, результат, версия модели, время расчёта)
+копится в памяти и пишется в таблицу SQLite (WAL, только добавление)
+батчами — по размеру батча или по таймеру, — в отдельном потоке.
+
+Фактический балл к строке журнала проставляется отдельно, по её id
+(``label_predictions`` или CLI ниже); такие строки тренер добавляет к
+датасету. Выгрузить строки без балла и загрузить заполненный файл::
+
+    python -m src.data.prediction_log pending > pending.csv
+    python -m src.data.prediction_log label --csv pending.csv
+    python -m src.data.prediction_log label 17=4.5 18=3
+"""
+
+import argparse
+import asyncio
+import csv
+import logging
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, astuple, fields
+from typing import TYPE_CHECKING, Mapping, Optional, TextIO
+
+from src.config import (
+    MARK_MIN,
+    MARK_MAX,
+    PREDICTION_LOG_PATH,
+    PREDICTION_LOG_BATCH_SIZE,
+    PREDICTION_LOG_FLUSH_INTERVAL,
+    PREDICTION_LOG_MAX_PENDING,
+    INPUT_COLUMNS,
+    NUMERIC_COLUMNS,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PredictionRecord:
+    """Одно предсказание бота."""
+    ts: float
+    tier: str
+    frequency_day: float
+    frequency_day_o: float
+    like_drink_f: str
+    often_drink_f: str
+    prediction: float
+    model_version: str
+    latency_ms: float
+    # Фактический балл: проставляется позже по id строки (label_predictions),
+    # в обучение идут только строки с ним
+    mark: Optional[float] = None
+
+    @classmethod
+    def from_prediction(
+        cls, features: dict, prediction: float, model_version: str, latency: float
+    ) -> "PredictionRecord":
+        """Запись по входам ``predict()``, результату и времени расчёта (сек)."""
+        return cls(
+            ts=time.time(),
+            tier=features["tier"],
+            frequency_day=float(features["frequency_day"]),
+            frequency_day_o=float(features["frequency_day_o"]),
+            like_drink_f=features["like_drink_f"],
+            often_drink_f=features["often_drink_f"],
+            prediction=float(prediction),
+            model_version=model_version,
+            latency_ms=latency * 1000,
+        )
+
+
+_COLUMNS: tuple[str, ...] = tuple(f.name for f in fields(PredictionRecord))
+
+_CREATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS predictions ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " ts REAL NOT NULL,"
+    " tier TEXT NOT NULL,"
+    " frequency_day REAL NOT NULL,"
+    " frequency_day_o REAL NOT NULL,"
+    " like_drink_f TEXT NOT NULL,"
+    " often_drink_f TEXT NOT NULL,"
+    " prediction REAL NOT NULL,"
+    " model_version TEXT NOT NULL,"
+    " latency_ms REAL NOT NULL,"
+    " mark REAL)"
+)
+_INSERT = (
+    f"INSERT INTO predictions ({', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(_COLUMNS))})"
+)
+_UPDATE_MARK = "UPDATE predictions SET mark = ? WHERE id = ?"
+
+# Колонки выгрузки строк без балла: id, входы и предсказание, пустой mark
+_PENDING_COLUMNS: tuple[str, ...] = ("id", *INPUT_COLUMNS, "prediction", "model_version", "mark")
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(_CREATE_TABLE)
+    conn.commit()
+    return conn
+
+
+class PredictionLogWriter:
+    """Буферизованный асинхронный писатель журнала предсказаний.
+
+    ``log()`` не блокирует event loop: запись попадает в буфер, а фоновая
+    задача сбрасывает его одной транзакцией в отдельном потоке, когда набралось
+    ``batch_size`` записей или прошло ``flush_interval`` секунд. Память
+    ограничена: если диск не успевает и в буфере уже ``max_pending`` записей,
+    новые отбрасываются (их число — в ``dropped``).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = PREDICTION_LOG_BATCH_SIZE,
+        flush_interval: float = PREDICTION_LOG_FLUSH_INTERVAL,
+        max_pending: int = PREDICTION_LOG_MAX_PENDING,
+    ) -> None:
+        self.path: str = path
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.max_pending: int = max_pending
+        self.written: int = 0
+        self.dropped: int = 0
+        self._buffer: list[tuple] = []
+        # Записи, которые сейчас пишутся на диск, тоже занимают память
+        self._in_flight: int = 0
+        self._wakeup: asyncio.Event = asyncio.Event()
+        # Один поток — одно соединение SQLite и строгий порядок батчей
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="prediction-log"
+        )
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing: bool = False
+
+    # ----- Жизненный цикл -----
+
+    async def start(self) -> None:
+        """Открывает базу (в потоке записи) и запускает фоновый сброс."""
+        if self._task is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._conn = await loop.run_in_executor(self._executor, _connect, self.path)
+        self._task = loop.create_task(self._run())
+        logger.info("Журнал предсказаний: %s", self.path)
+
+    async def stop(self) -> None:
+        """Останавливает сброс, дописывает остаток буфера и закрывает базу."""
+        if self._task is None:
+            return
+        # Без cancel(): отмена во время wait_for могла бы потеряться, а батч,
+        # уже отданный потоку записи, — остаться неучтённым
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+        await self._flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._conn.close)
+        self._executor.shutdown(wait=True)
+        logger.info(
+            "Журнал предсказаний закрыт: записано %d, отброшено %d", self.written, self.dropped
+        )
+
+    # ----- Запись -----
+
+    def log(self, record: PredictionRecord) -> None:
+        """Ставит запись в буфер; при переполнении буфера запись отбрасывается."""
+        if len(self._buffer) + self._in_flight >= self.max_pending:
+            self.dropped += 1
+            return
+        self._buffer.append(astuple(record))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        self._in_flight = len(batch)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._write, batch)
+        except Exception:
+            logger.exception("Не удалось записать журнал предсказаний (%d записей)", len(batch))
+            self.dropped += len(batch)
+        else:
+            self.written += len(batch)
+        finally:
+            self._in_flight = 0
+
+    def _write(self, batch: list[tuple]) -> None:
+        with self._conn:
+            self._conn.executemany(_INSERT, batch)
+
+
+def read_prediction_log(path: str, labeled_only: bool = True) -> "pd.DataFrame":
+    """Читает журнал в схеме датасета (INPUT_COLUMNS + mark).
+
+    С ``labeled_only`` возвращаются только строки с известным фактическим
+    баллом: собственные предсказания модели не должны становиться её метками.
+    """
+    import pandas as pd
+
+    columns = INPUT_COLUMNS + NUMERIC_COLUMNS
+    query = f"SELECT {', '.join(columns)} FROM predictions"
+    if labeled_only:
+        query += " WHERE mark IS NOT NULL"
+    query += " ORDER BY id"
+
+    conn = _connect(path)
+    try:
+        return pd.read_sql_query(query, conn)
+    finally:
+        conn.close()
+
+
+def label_predictions(path: str, labels: Mapping[int, float]) -> list[int]:
+    """Проставляет фактический балл строкам журнала по их id.
+
+    Args:
+        path: Путь к базе журнала.
+        labels: id строки → фактический балл.
+
+    Returns:
+        id, которых нет в журнале (им балл не проставлен).
+
+    Raises:
+        ValueError: Если балл вне диапазона [MARK_MIN, MARK_MAX].
+    """
+    for row_id, mark in labels.items():
+        if not MARK_MIN <= mark <= MARK_MAX:
+            raise ValueError(
+                f"Балл {mark} для строки {row_id} вне диапазона {MARK_MIN}–{MARK_MAX}"
+            )
+
+    conn = _connect(path)
+    try:
+        with conn:
+            placeholders = ", ".join("?" * len(labels))
+            known = {
+                row_id for (row_id,) in conn.execute(
+                    f"SELECT id FROM predictions WHERE id IN ({placeholders})", list(labels)
+                )
+            }
+            conn.executemany(
+                _UPDATE_MARK, [(float(labels[row_id]), row_id) for row_id in sorted(known)]
+            )
+    finally:
+        conn.close()
+    return sorted(set(labels) - known)
+
+
+def write_pending(path: str, out: TextIO, limit: Optional[int] = None) -> int:
+    """Пишет в ``out`` CSV строк журнала без фактического балла; возвращает их число."""
+    query = (
+        f"SELECT {', '.join(_PENDING_COLUMNS)} FROM predictions "
+        "WHERE mark IS NULL ORDER BY id"
+    )
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+
+    conn = _connect(path)
+    try:
+        writer = csv.writer(out)
+        writer.writerow(_PENDING_COLUMNS)
+        n_rows = 0
+        for row in conn.execute(query):
+            writer.writerow(row)
+            n_rows += 1
+    finally:
+        conn.close()
+    return n_rows
+
+
+def _read_labels(csv_path: str) -> dict[int, float]:
+    """id → балл из CSV с колонками id и mark (строки с пустым mark пропускаются)."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return {
+            int(row["id"]): float(row["mark"].replace(",", "."))
+            for row in csv.DictReader(f)
+            if row.get("mark", "").strip()
+        }
+
+
+def _parse_label(text: str) -> tuple[int, float]:
+    row_id, sep, mark = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"ожидается ID=БАЛЛ, получено «{text}»")
+    try:
+        return int(row_id), float(mark.replace(",", "."))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ожидается ID=БАЛЛ, получено «{text}»") from None
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Фактические баллы в журнале предсказаний")
+    parser.add_argument("--path", default=PREDICTION_LOG_PATH, help="база журнала")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pending = commands.add_parser("pending", help="CSV строк без фактического балла в stdout")
+    pending.add_argument("--limit", type=int, default=None)
+
+    label = commands.add_parser("label", help="проставить фактические баллы по id строк")
+    label.add_argument("labels", nargs="*", type=_parse_label, metavar="ID=БАЛЛ")
+    label.add_argument("--csv", help="CSV с колонками id и mark (например, из pending)")
+
+    args = parser.parse_args(argv)
+    if not args.path:
+        parser.error("журнал выключен: PREDICTION_LOG_PATH пуст")
+
+    if args.command == "pending":
+        n_rows = write_pending(args.path, sys.stdout, args.limit)
+        logger.info("Строк без фактического балла: %d", n_rows)
+        return 0
+
+    labels = _read_labels(args.csv) if args.csv else {}
+    labels.update(args.labels)
+    if not labels:
+        parser.error("нет баллов: укажи ID=БАЛЛ или --csv")
+    try:
+        missing = label_predictions(args.path, labels)
+    except ValueError as e:
+        parser.error(str(e))
+    if missing:
+        logger.warning("Нет в журнале строк с id: %s", ", ".join(map(str, missing)))
+    logger.info("Проставлено баллов: %d", len(labels) - len(missing))
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        stream=sys.stderr,
+    )
+    sys.exit(main())
@@ -1,9 +1,13 @@
 """Функции предобработки и очистки данных опроса."""
 
 import re
-from typing import Any, Optional
+import sys
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
 
-import pandas as pd
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 # Диапазон допустимых значений балла
@@ -16,6 +20,25 @@ FREQUENCY_MIN: int = 0
 FREQUENCY_MAX: int = 20
 
 
+def _is_missing(value: Any) -> bool:
+    """pd.isna для скаляра без обязательного импорта pandas.
+
+    Скалярные функции нужны боту при старте, а pandas — тяжёлый импорт.
+    Пропуски pandas (pd.NA, pd.NaT) могут существовать, только если pandas
+    уже импортирован, — тогда проверка делегируется ему.
+    """
+    pandas = sys.modules.get("pandas")
+    if pandas is not None:
+        return pandas.isna(value)
+    if value is None:
+        return True
+    # NaN (float, NumPy, Decimal) и NaT NumPy не равны сами себе
+    try:
+        return bool(value != value)
+    except (TypeError, ValueError):
+        return False
+
+
 def clean_numeric_value(value: Any, default: float = MARK_DEFAULT) -> float:
     """Очищает и нормализует числовое значение (балл/частота).
 
@@ -26,7 +49,7 @@ def clean_numeric_value(value: Any, default: float = MARK_DEFAULT) -> float:
     Returns:
         Число с плавающей точкой в диапазоне [MARK_MIN, MARK_MAX].
     """
-    if pd.isna(value) or value == "":
+    if _is_missing(value) or value == "":
         return default
 
     value_str = str(value).strip().replace(",", ".")
@@ -48,7 +71,147 @@ def clean_categorical_value(value: Any) -> Optional[str]:
     Returns:
         Очищенная строка в нижнем регистре или None.
     """
-    if pd.isna(value):
+    if _is_missing(value):
         return None
     cleaned = str(value).strip().lower()
     return cleaned if cleaned else None
+
+
+# Типы, у которых равные значения одного типа одинаково выглядят в str():
+# для них очистку можно запомнить по значению (у Decimal это не так)
+_MEMO_TYPES: tuple[type, ...] = (str, int, float, np.integer, np.floating)
+
+
+def _clean_list(values: Iterable[Any], clean: Callable[[Any], Any]) -> list:
+    """Скалярная очистка каждого значения, один раз на уникальное значение.
+
+    Ключ запоминания — (тип, значение): 1, 1.0 и True равны, но очищаются
+    по-разному.
+    """
+    memo: dict[tuple[type, Any], Any] = {}
+    result = []
+    for value in values:
+        if not isinstance(value, _MEMO_TYPES):
+            result.append(clean(value))
+            continue
+        key = (type(value), value)
+        cleaned = memo.get(key, memo)
+        if cleaned is memo:
+            cleaned = memo[key] = clean(value)
+        result.append(cleaned)
+    return result
+
+
+def clean_numeric_list(values: Iterable[Any], default: float = MARK_DEFAULT) -> list[float]:
+    """clean_numeric_value для последовательности (список, массив NumPy) без pandas.
+
+    Args:
+        values: Исходные значения.
+        default: Значение по умолчанию, если очистка невозможна.
+
+    Returns:
+        Список float в диапазоне [MARK_MIN, MARK_MAX].
+    """
+    return _clean_list(values, lambda value: clean_numeric_value(value, default))
+
+
+def clean_categorical_list(values: Iterable[Any]) -> list[Optional[str]]:
+    """clean_categorical_value для последовательности (список, массив NumPy) без pandas.
+
+    Args:
+        values: Исходные значения.
+
+    Returns:
+        Список очищенных строк в нижнем регистре (None для пустых).
+    """
+    return _clean_list(values, clean_categorical_value)
+
+
+def _clean_unique_strings(
+    values: "pd.Series", clean: Callable[["pd.Series"], "pd.Series"], missing: Any
+) -> Optional["pd.Series"]:
+    """Очищает только уникальные значения строковой колонки.
+
+    Ответы опроса сильно повторяются, поэтому factorize + очистка уникальных
+    значений на порядки быстрее построчной. Применимо, только если все
+    значения — строки: в смешанной колонке 1, 1.0 и True совпали бы при
+    факторизации. Иначе возвращает None.
+    """
+    import pandas as pd
+
+    if pd.api.types.infer_dtype(values, skipna=True) != "string":
+        return None
+    codes, uniques = pd.factorize(values)
+    cleaned = clean(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    # Код -1 (пропуск) указывает на последний элемент — значение для пропусков
+    result = np.append(cleaned, [missing])[codes]
+    return pd.Series(result, index=values.index, dtype=object)
+
+
+def clean_numeric_series(values: "pd.Series", default: float = MARK_DEFAULT) -> "pd.Series":
+    """Векторный аналог clean_numeric_value для целой колонки.
+
+    Args:
+        values: Колонка исходных значений.
+        default: Значение по умолчанию, если очистка невозможна.
+
+    Returns:
+        Колонка float в диапазоне [MARK_MIN, MARK_MAX].
+    """
+    import pandas as pd
+
+    if pd.api.types.is_integer_dtype(values) or pd.api.types.is_float_dtype(values):
+        numbers = values.astype(float)
+        # Без экспоненты в str() очистка лишь отбрасывает знак минус
+        plain = numbers.abs().between(1e-4, 1e16, inclusive="left") | (numbers == 0)
+        result = numbers.abs().where(plain)
+        if not plain.all():
+            exotic = ~plain & numbers.notna()
+            result[exotic] = clean_numeric_series(values[exotic].astype(object), default)
+        return result.clip(MARK_MIN, MARK_MAX).fillna(default)
+
+    unique_cleaned = _clean_unique_strings(
+        values, lambda uniques: _clean_numeric_strings(uniques, default), default
+    )
+    if unique_cleaned is not None:
+        return unique_cleaned.astype(float)
+    return _clean_numeric_strings(values, default)
+
+
+def _clean_numeric_strings(values: "pd.Series", default: float) -> "pd.Series":
+    """Строковая ветка clean_numeric_series."""
+    import pandas as pd
+
+    text = values.astype(object).where(values.notna(), "").astype(str)
+    cleaned = (
+        text.str.replace(",", ".", regex=False)
+        .str.replace(r"[^\d.]", "", regex=True)
+    )
+    # float() принимает ровно одну группу цифр с не более чем одной точкой
+    parsable = cleaned.str.fullmatch(r"\d+\.?\d*|\.\d+").astype(bool)
+    result = pd.Series(np.nan, index=values.index)
+    result[parsable] = cleaned[parsable].to_numpy(dtype=object).astype(float)
+
+    return result.clip(MARK_MIN, MARK_MAX).fillna(default)
+
+
+def clean_categorical_series(values: "pd.Series") -> "pd.Series":
+    """Векторный аналог clean_categorical_value для целой колонки.
+
+    Args:
+        values: Колонка исходных значений.
+
+    Returns:
+        Колонка очищенных строк в нижнем регистре (None для пустых).
+    """
+    unique_cleaned = _clean_unique_strings(values, _clean_categorical_strings, None)
+    if unique_cleaned is not None:
+        return unique_cleaned
+    return _clean_categorical_strings(values)
+
+
+def _clean_categorical_strings(values: "pd.Series") -> "pd.Series":
+    """Построчная ветка clean_categorical_series."""
+    present = values.notna()
+    cleaned = values.astype(object).where(present, "").astype(str).str.strip().str.lower()
+    return cleaned.astype(object).where(present & (cleaned != ""), None)
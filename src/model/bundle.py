@@ -0,0 +1,123 @@
+"""Бандл модели для быстрого старта бота.
+
+Один файл, пригодный для mmap:
+
+    8 байт  — сигнатура ``FMBNDL01``
+    4 байта — длина JSON-заголовка (uint32, little-endian)
+    N байт  — JSON-заголовок: словари категорий, признаки, метаданные,
+              отпечаток и смещения бинарных секций
+    ...     — бинарные секции (модель XGBoost в UBJSON и т.п.)
+
+Чтение бандла не требует scikit-learn, pandas и joblib: словари хранятся
+простыми списками строк, а не pickle-объектами LabelEncoder.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import struct
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_MAGIC: bytes = b"FMBNDL01"
+_HEADER_LEN = struct.Struct("<I")
+
+
+@dataclass
+class ModelBundle:
+    """Открытый бандл: заголовок и отображённые в память бинарные секции."""
+    header: dict[str, Any]
+    _buffer: mmap.mmap
+
+    @property
+    def vocabularies(self) -> dict[str, list[str]]:
+        return self.header["vocabularies"]
+
+    @property
+    def features(self) -> list[str]:
+        return self.header["features"]
+
+    @property
+    def metadata(self) -> dict[str, Any]:
+        return self.header["metadata"]
+
+    @property
+    def fingerprint(self) -> str:
+        return self.header["fingerprint"]
+
+    def has_section(self, name: str) -> bool:
+        return name in self.header["sections"]
+
+    def section(self, name: str) -> memoryview:
+        """Секция без копирования (представление над mmap)."""
+        offset, length = self.header["sections"][name]
+        return memoryview(self._buffer)[offset:offset + length]
+
+    def close(self) -> None:
+        self._buffer.close()
+
+
+def write_bundle(
+    path: str,
+    vocabularies: dict[str, list[str]],
+    features: list[str],
+    metadata: dict[str, Any],
+    sections: dict[str, bytes],
+) -> str:
+    """Записывает бандл и возвращает его отпечаток (sha256 содержимого)."""
+    digest = hashlib.sha256(
+        json.dumps([vocabularies, features], ensure_ascii=False, sort_keys=True).encode()
+    )
+    for name in sorted(sections):
+        digest.update(name.encode())
+        digest.update(sections[name])
+
+    # Смещения зависят от длины заголовка, а она — от смещений: считаем
+    # смещения относительно начала данных и сдвигаем, пока длина не сойдётся
+    relative, position = {}, 0
+    for name, data in sections.items():
+        relative[name] = position
+        position += len(data)
+
+    header_size = 0
+    while True:
+        base = len(BUNDLE_MAGIC) + _HEADER_LEN.size + header_size
+        header = json.dumps({
+            "fingerprint": digest.hexdigest(),
+            "vocabularies": vocabularies,
+            "features": features,
+            "metadata": metadata,
+            "sections": {
+                name: [base + relative[name], len(data)] for name, data in sections.items()
+            },
+        }, ensure_ascii=False).encode("utf-8")
+        if len(header) == header_size:
+            break
+        header_size = len(header)
+
+    with open(path, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(_HEADER_LEN.pack(len(header)))
+        f.write(header)
+        for data in sections.values():
+            f.write(data)
+    return digest.hexdigest()
+
+
+def read_bundle(path: str) -> ModelBundle:
+    """Открывает бандл через mmap."""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    prefix = len(BUNDLE_MAGIC) + _HEADER_LEN.size
+    if buffer[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+        buffer.close()
+        raise ValueError(f"Файл не является бандлом модели: {path}")
+    (header_len,) = _HEADER_LEN.unpack(buffer[len(BUNDLE_MAGIC):prefix])
+    header = json.loads(buffer[prefix:prefix + header_len].decode("utf-8"))
+
+    logger.info("Бандл модели открыт: %s", path)
+    return ModelBundle(header=header, _buffer=buffer)
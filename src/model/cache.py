@@ -0,0 +1,64 @@
+"""Кэш предсказаний по очищенным и закодированным признакам."""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+# Ключ — значения признаков в порядке FEATURE_COLUMNS, приведённые к float32
+# (модель видит именно их, поэтому равные ключи дают равные предсказания)
+CacheKey = tuple[float, ...]
+
+
+@dataclass
+class PredictionCacheStats:
+    """Счётчики обращений к кэшу предсказаний."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class PredictionCache:
+    """Ограниченный LRU-кэш готовых (округлённых) предсказаний.
+
+    Потокобезопасен: предиктор вызывается и из event loop, и из пула потоков.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size: int = max_size
+        self.stats: PredictionCacheStats = PredictionCacheStats()
+        self._items: OrderedDict[CacheKey, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[float]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.stats.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: CacheKey, value: float) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
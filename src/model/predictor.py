@@ -1,67 +1,456 @@
 """Предсказание среднего балла по обученной модели XGBoost."""
 
+import hashlib
+import io
 import logging
-from typing import Optional
+import os
+import sys
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Mapping, Optional, Union
 
-import pandas as pd
-from xgboost import XGBRegressor
-import joblib
+import numpy as np
 
 from src.config import (
     MARK_MIN,
     MARK_MAX,
+    FREQUENCY_MIN,
+    FREQUENCY_MAX,
     CATEGORICAL_COLUMNS,
     FEATURE_COLUMNS,
+    INPUT_COLUMNS,
+    PREDICTOR_BACKEND,
+    PREDICTION_CACHE_SIZE,
 )
-from src.data.preprocessing import clean_categorical_value, clean_numeric_value
+from src.data.preprocessing import (
+    clean_categorical_value,
+    clean_numeric_value,
+    clean_categorical_list,
+    clean_numeric_list,
+    clean_categorical_series,
+    clean_numeric_series,
+)
+from src.model.bundle import read_bundle
+from src.model.cache import PredictionCache, PredictionCacheStats
+from src.model.trees import TreeEnsemble
+from src.model.vocabulary import Vocabulary
+
+# pandas, xgboost и joblib (а через них scikit-learn) импортируются лениво,
+# в момент первого использования: это секунды холодного старта бота
+if TYPE_CHECKING:
+    import pandas as pd
+    from xgboost import XGBRegressor
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class _ModelState:
+    """Согласованный снимок загруженных артефактов.
+
+    При перезагрузке заменяется целиком одним присваиванием, поэтому запрос
+    никогда не видит модель от одной версии, а энкодеры — от другой.
+    """
+    model: Union["XGBRegressor", TreeEnsemble]
+    label_encoders: Optional[dict]
+    available_tiers: list[str]
+    available_like_drinks: list[str]
+    available_often_drinks: list[str]
+    vocabularies: Mapping[str, Vocabulary]
+    signature: tuple
+    fingerprint: str
+    table: Optional[np.ndarray] = None
+    table_freq_index: dict[float, int] = field(default_factory=dict)
+    # Кэш привязан к версии модели: при перезагрузке начинается пустой
+    cache: Optional[PredictionCache] = None
+
+
 class MarkPredictor:
     """Класс для предсказания среднего балла на основе 5 признаков.
 
     Принимает на вход: tier, frequency_day, frequency_day_o, like_drink_f, often_drink_f.
+
+    Если включён ``precompute``, при загрузке строится (или читается из
+    ``table_path``) плотная таблица предсказаний по всей сетке входов бота,
+    и ``predict()`` сводится к индексации массива.
+
+    ``reload()`` перечитывает модель и энкодеры и атомарно подменяет их,
+    не прерывая обработку запросов.
+
+    Вместо пары модель + энкодеры можно загрузить бандл (``from_bundle``):
+    он читается без распаковки pickle и без scikit-learn.
+
+    Готовые предсказания запоминаются в LRU-кэше на ``cache_size`` записей
+    (0 — без кэша) по очищенным и закодированным признакам.
+
+    С ``backend="numpy"`` деревья считаются на NumPy (TreeEnsemble) и
+    xgboost не импортируется; ``backend="xgboost"`` — рантайм XGBoost.
+    С ``mmap_artifacts`` деревья из бандла не копируются, а делятся между
+    процессами через отображение файла.
     """
 
-    def __init__(self, model_path: str, encoders_path: str) -> None:
-        self.model: XGBRegressor = self._load_model(model_path)
-        self.label_encoders: dict = self._load_encoders(encoders_path)
-        self._setup_available_options()
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        encoders_path: Optional[str] = None,
+        table_path: Optional[str] = None,
+        precompute: bool = False,
+        bundle_path: Optional[str] = None,
+        backend: str = PREDICTOR_BACKEND,
+        cache_size: int = PREDICTION_CACHE_SIZE,
+        mmap_artifacts: bool = False,
+    ) -> None:
+        if bundle_path is None and (model_path is None or encoders_path is None):
+            raise ValueError("Нужны пути к модели и энкодерам либо путь к бандлу")
+        if backend not in ("numpy", "xgboost"):
+            raise ValueError(f"Неизвестный бэкенд инференса: {backend}")
+        self.model_path: Optional[str] = model_path
+        self.encoders_path: Optional[str] = encoders_path
+        self.bundle_path: Optional[str] = bundle_path
+        self.table_path: Optional[str] = table_path
+        self.precompute: bool = precompute
+        self.backend: str = backend
+        self.cache_size: int = cache_size
+        self.mmap_artifacts: bool = mmap_artifacts
+        self._reload_lock = threading.Lock()
+        # Неизвестные значения категорий по признакам (за всё время работы)
+        self._unknown_lock = threading.Lock()
+        self._unknown_counts: dict[str, int] = {}
+        self._state: _ModelState = self._load_state()
+
+    @classmethod
+    def from_bundle(
+        cls,
+        bundle_path: str,
+        table_path: Optional[str] = None,
+        precompute: bool = False,
+        backend: str = PREDICTOR_BACKEND,
+        cache_size: int = PREDICTION_CACHE_SIZE,
+        mmap_artifacts: bool = False,
+    ) -> "MarkPredictor":
+        """Создаёт предиктор из бандла, экспортированного тренером.
+
+        С ``mmap_artifacts`` деревья не копируются в память процесса, а читаются
+        прямо из отображённого файла бандла (см. ``TreeEnsemble.from_sections``).
+        """
+        return cls(
+            table_path=table_path,
+            precompute=precompute,
+            bundle_path=bundle_path,
+            backend=backend,
+            cache_size=cache_size,
+            mmap_artifacts=mmap_artifacts,
+        )
+
+    # ----- Текущая версия артефактов -----
+
+    @property
+    def model(self) -> Union["XGBRegressor", TreeEnsemble]:
+        return self._state.model
+
+    @property
+    def label_encoders(self) -> Optional[dict]:
+        """LabelEncoder'ы (None, если загружен бандл — в нём только словари)."""
+        return self._state.label_encoders
+
+    @property
+    def vocabularies(self) -> Mapping[str, Vocabulary]:
+        """Словари категориальных признаков текущей версии модели."""
+        return self._state.vocabularies
+
+    def vocabulary(self, col: str) -> Vocabulary:
+        """Словарь признака из CATEGORICAL_COLUMNS."""
+        return self._state.vocabularies[col]
+
+    @property
+    def available_tiers(self) -> list[str]:
+        return self._state.available_tiers
+
+    @property
+    def available_like_drinks(self) -> list[str]:
+        return self._state.available_like_drinks
+
+    @property
+    def available_often_drinks(self) -> list[str]:
+        return self._state.available_often_drinks
+
+    @property
+    def model_version(self) -> str:
+        """Короткий хэш содержимого загруженных артефактов."""
+        return self._state.fingerprint[:12]
+
+    @property
+    def cache_stats(self) -> Optional[PredictionCacheStats]:
+        """Статистика кэша предсказаний текущей версии модели (None без кэша)."""
+        cache = self._state.cache
+        return cache.stats if cache is not None else None
+
+    @property
+    def unknown_value_counts(self) -> dict[str, int]:
+        """Сколько неизвестных значений заменено на 0, по признакам."""
+        with self._unknown_lock:
+            return dict(self._unknown_counts)
 
     # ----- Загрузка -----
 
-    def _load_model(self, model_path: str) -> XGBRegressor:
-        """Загружает модель XGBoost из файла."""
+    @property
+    def artifact_paths(self) -> tuple[str, ...]:
+        """Файлы, из которых загружается модель."""
+        if self.bundle_path is not None:
+            return (self.bundle_path,)
+        return (self.model_path, self.encoders_path)
+
+    def _load_model(
+        self, model_path: str, raw: bytes
+    ) -> Union["XGBRegressor", TreeEnsemble]:
+        """Загружает JSON-модель XGBoost из прочитанного файла."""
+        if self.backend == "numpy":
+            model = TreeEnsemble.from_model_json(raw)
+            logger.info("Модель загружена: %s", model_path)
+            return model
+        return self._load_xgboost_model(model_path, raw)
+
+    def _load_xgboost_model(self, model_path: str, raw: bytes) -> "XGBRegressor":
+        """Загружает модель в рантайм XGBoost (JSON или UBJSON)."""
+        from xgboost import XGBRegressor
+
         model = XGBRegressor()
-        model.load_model(model_path)
+        model.load_model(bytearray(raw))
         logger.info("Модель загружена: %s", model_path)
         return model
 
-    def _load_encoders(self, encoders_path: str) -> dict:
-        """Загружает LabelEncoder'ы из joblib."""
-        encoders = joblib.load(encoders_path)
+    def _load_encoders(self, encoders_path: str, raw: bytes) -> dict:
+        """Загружает LabelEncoder'ы из прочитанного joblib-файла."""
+        import joblib
+
+        encoders = joblib.load(io.BytesIO(raw))
         logger.info("Энкодеры загружены: %s", encoders_path)
         return encoders
 
-    def _setup_available_options(self) -> None:
-        """Извлекает списки доступных значений из энкодеров."""
-        self.available_tiers: list[str] = list(self.label_encoders["tier"].classes_)
-        self.available_like_drinks: list[str] = list(
-            self.label_encoders["like_drink_f"].classes_
-        )
-        self.available_often_drinks: list[str] = list(
-            self.label_encoders["often_drink_f"].classes_
-        )
+    def _load_state(self) -> _ModelState:
+        """Загружает модель, энкодеры и (при необходимости) таблицу предсказаний."""
+        # Подпись снимается до чтения: запись во время загрузки даст новую перезагрузку
+        signature = self.artifacts_signature()
+        if self.bundle_path is not None:
+            bundle = read_bundle(self.bundle_path)
+            shared = False
+            try:
+                if self.backend == "numpy" and "trees" in bundle.metadata:
+                    shared = self.mmap_artifacts
+                    model = TreeEnsemble.from_sections(
+                        bundle.metadata["trees"], bundle.section, copy=not shared
+                    )
+                    logger.info("Деревья загружены из бандла: %s", self.bundle_path)
+                else:
+                    model = self._load_xgboost_model(self.bundle_path, bundle.section("model"))
+                label_encoders = None
+                available = {col: list(bundle.vocabularies[col]) for col in CATEGORICAL_COLUMNS}
+                fingerprint = bundle.fingerprint
+            finally:
+                # Массивы над mmap держат отображение сами: оно закроется вместе с ними
+                if not shared:
+                    bundle.close()
+        else:
+            # Файлы читаются один раз, чтобы хэш и загруженные объекты были из одних байтов
+            model_raw = Path(self.model_path).read_bytes()
+            encoders_raw = Path(self.encoders_path).read_bytes()
+            model = self._load_model(self.model_path, model_raw)
+            label_encoders = self._load_encoders(self.encoders_path, encoders_raw)
+            available = {col: list(label_encoders[col].classes_) for col in CATEGORICAL_COLUMNS}
+            fingerprint = hashlib.sha256(model_raw + encoders_raw).hexdigest()
+
         logger.info(
             "Доступно: %d курсов, %d любимых напитков, %d частых напитков",
-            len(self.available_tiers),
-            len(self.available_like_drinks),
-            len(self.available_often_drinks),
+            len(available["tier"]),
+            len(available["like_drink_f"]),
+            len(available["often_drink_f"]),
+        )
+
+        state = _ModelState(
+            model=model,
+            label_encoders=label_encoders,
+            available_tiers=available["tier"],
+            available_like_drinks=available["like_drink_f"],
+            available_often_drinks=available["often_drink_f"],
+            vocabularies=MappingProxyType({
+                col: Vocabulary.from_values(classes) for col, classes in available.items()
+            }),
+            signature=signature,
+            fingerprint=fingerprint,
+            cache=PredictionCache(self.cache_size) if self.cache_size > 0 else None,
         )
+        if self.precompute:
+            table, freq_axis = self._setup_prediction_table(state)
+            state = replace(
+                state,
+                table=table,
+                table_freq_index={value: idx for idx, value in enumerate(freq_axis)},
+            )
+        return state
+
+    # ----- Перезагрузка -----
+
+    def artifacts_signature(self) -> tuple:
+        """(mtime, размер) файлов модели на диске."""
+        signature = []
+        for path in self.artifact_paths:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    @property
+    def loaded_signature(self) -> tuple:
+        """Подпись файлов, из которых загружена текущая версия."""
+        return self._state.signature
+
+    def artifacts_changed(self) -> bool:
+        """Изменились ли файлы модели с момента загрузки."""
+        return self.artifacts_signature() != self.loaded_signature
+
+    def reload(self) -> None:
+        """Перечитывает артефакты и атомарно подменяет текущую версию.
+
+        Блокирующий вызов — из асинхронного кода его нужно запускать в пуле
+        потоков. При ошибке загрузки остаётся прежняя версия.
+        """
+        with self._reload_lock:
+            self._state = self._load_state()
+        logger.info("Модель перезагружена: %s", ", ".join(map(str, self.artifact_paths)))
+
+    # ----- Таблица предсказаний -----
+
+    @staticmethod
+    def _frequency_axis() -> list[float]:
+        """Различные очищенные значения целых частот из диапазона бота."""
+        return sorted({
+            clean_numeric_value(freq)
+            for freq in range(FREQUENCY_MIN, FREQUENCY_MAX + 1)
+        })
+
+    def _setup_prediction_table(self, state: _ModelState) -> tuple[np.ndarray, list[float]]:
+        """Загружает таблицу из кэша или строит её заново."""
+        fingerprint = state.fingerprint
+        freq_axis = self._frequency_axis()
+        table_path = self.table_path
+
+        table = None
+        if table_path is not None and Path(table_path).exists():
+            table = self._load_prediction_table(state, table_path, fingerprint, freq_axis)
+
+        if table is None:
+            table = self._build_prediction_table(state, freq_axis)
+            if table_path is not None:
+                # Таблицу могут одновременно строить несколько процессов бота:
+                # каждый пишет во временный файл и атомарно подменяет общий
+                path = Path(table_path)
+                tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.tmp.npz")
+                np.savez(
+                    tmp_path,
+                    table=table,
+                    freq_axis=np.asarray(freq_axis, dtype=np.float64),
+                    fingerprint=np.asarray(fingerprint),
+                )
+                os.replace(tmp_path, path)
+                logger.info("Таблица предсказаний сохранена: %s", table_path)
+
+        return table, freq_axis
+
+    def _load_prediction_table(
+        self,
+        state: _ModelState,
+        table_path: str,
+        fingerprint: str,
+        freq_axis: list[float],
+    ) -> Optional[np.ndarray]:
+        """Читает таблицу из файла, если она соответствует текущим артефактам."""
+        try:
+            with np.load(table_path) as cached:
+                table = cached["table"]
+                cached_axis = cached["freq_axis"].tolist()
+                cached_fingerprint = str(cached["fingerprint"])
+        except (OSError, KeyError, ValueError):
+            logger.warning("Не удалось прочитать таблицу предсказаний: %s", table_path)
+            return None
+
+        expected_shape = self._table_shape(state, len(freq_axis))
+        if (
+            cached_fingerprint != fingerprint
+            or cached_axis != freq_axis
+            or table.shape != expected_shape
+        ):
+            logger.info("Таблица предсказаний устарела, пересчитываем: %s", table_path)
+            return None
+
+        logger.info("Таблица предсказаний загружена: %s", table_path)
+        return table
+
+    @staticmethod
+    def _table_shape(state: _ModelState, n_freq: int) -> tuple[int, ...]:
+        """Форма таблицы в порядке FEATURE_COLUMNS."""
+        return (
+            len(state.available_tiers),
+            n_freq,
+            n_freq,
+            len(state.available_like_drinks),
+            len(state.available_often_drinks),
+        )
+
+    def _build_prediction_table(
+        self, state: _ModelState, freq_axis: list[float]
+    ) -> np.ndarray:
+        """Считает сырые предсказания модели для каждой точки сетки."""
+        shape = self._table_shape(state, len(freq_axis))
+        grid = np.indices(shape).reshape(len(shape), -1)
+        freq_values = np.asarray(freq_axis, dtype=np.float64)
+
+        columns = {
+            "tier_encoded": grid[0],
+            "frequency_day": freq_values[grid[1]],
+            "frequency_day_o": freq_values[grid[2]],
+            "like_drink_f_encoded": grid[3],
+            "often_drink_f_encoded": grid[4],
+        }
+        features = np.column_stack([columns[col] for col in FEATURE_COLUMNS]).astype(np.float32)
+
+        table = state.model.predict(features).reshape(shape)
+        logger.info("Таблица предсказаний построена: %d точек", table.size)
+        return table
 
     # ----- Предсказание -----
 
+    def _count_unknown(self, col: str, count: int) -> None:
+        with self._unknown_lock:
+            self._unknown_counts[col] = self._unknown_counts.get(col, 0) + count
+
+    def _encode(self, state: _ModelState, col: str, value: Optional[str]) -> int:
+        """Кодирует очищенное категориальное значение; неизвестные заменяются на 0."""
+        code = state.vocabularies[col].aliases.get(value)
+        if code is None:
+            self._count_unknown(col, 1)
+            logger.warning(
+                "Неизвестное значение '%s' для признака '%s', заменено на 0",
+                value, col,
+            )
+            return 0
+        return code
+
+    @staticmethod
+    def _lookup(state: _ModelState, features: dict[str, Any]) -> Optional[float]:
+        """Возвращает сырое предсказание из таблицы или None, если точки в ней нет."""
+        freq_idx = state.table_freq_index.get(features["frequency_day"])
+        freq_o_idx = state.table_freq_index.get(features["frequency_day_o"])
+        if state.table is None or freq_idx is None or freq_o_idx is None:
+            return None
+        return float(state.table[
+            features["tier_encoded"],
+            freq_idx,
+            freq_o_idx,
+            features["like_drink_f_encoded"],
+            features["often_drink_f_encoded"],
+        ])
+
     def predict(
         self,
         tier: str,
@@ -75,6 +464,8 @@ class MarkPredictor:
         Returns:
             Предсказанный балл, округлённый до 2 знаков, в диапазоне [2.0, 5.0].
         """
+        state = self._state
+
         # Очистка входных данных
         data = {
             "tier": clean_categorical_value(tier),
@@ -84,21 +475,148 @@ class MarkPredictor:
             "often_drink_f": clean_categorical_value(often_drink_f),
         }
 
-        new_df = pd.DataFrame([data])
-
         # Кодирование категориальных признаков
+        features = {
+            "frequency_day": data["frequency_day"],
+            "frequency_day_o": data["frequency_day_o"],
+        }
         for col in CATEGORICAL_COLUMNS:
-            le = self.label_encoders[col]
-            try:
-                new_df[col + "_encoded"] = le.transform(new_df[col])
-            except ValueError:
-                new_df[col + "_encoded"] = 0
-                logger.warning(
-                    "Неизвестное значение '%s' для признака '%s', заменено на 0",
-                    new_df[col].iloc[0], col,
-                )
+            features[col + "_encoded"] = self._encode(state, col, data[col])
+
+        row = np.array([[features[col] for col in FEATURE_COLUMNS]], dtype=np.float32)
+        key = tuple(row[0].tolist())
+        if state.cache is not None:
+            cached = state.cache.get(key)
+            if cached is not None:
+                return cached
 
-        # Предсказание и клиппинг
-        raw_prediction: float = float(self.model.predict(new_df[FEATURE_COLUMNS])[0])
+        # Предсказание (из таблицы, если точка в сетке) и клиппинг
+        raw_prediction = self._lookup(state, features)
+        if raw_prediction is None:
+            raw_prediction = float(state.model.predict(row)[0])
         clipped = max(MARK_MIN, min(MARK_MAX, raw_prediction))
-        return round(clipped, 2)
+        result = round(clipped, 2)
+
+        if state.cache is not None:
+            state.cache.put(key, result)
+        return result
+
+    def predict_many(
+        self, data: Union["pd.DataFrame", Mapping[str, Any]]
+    ) -> np.ndarray:
+        """Векторно предсказывает средний балл для набора строк.
+
+        Args:
+            data: DataFrame или словарь колонок (списки, массивы NumPy) с полями
+                tier, frequency_day, frequency_day_o, like_drink_f, often_drink_f.
+
+        Returns:
+            Массив баллов; для каждой строки совпадает с результатом predict().
+        """
+        state = self._state
+
+        missing = [col for col in INPUT_COLUMNS if col not in data]
+        if missing:
+            raise ValueError(f"Отсутствуют колонки: {', '.join(missing)}")
+
+        # Списки и массивы очищаются без pandas: бот не платит за его импорт.
+        # Если pandas не импортирован, DataFrame и Series прийти не могли
+        pandas = sys.modules.get("pandas")
+        if pandas is not None and (
+            isinstance(data, pandas.DataFrame)
+            or any(isinstance(data[col], pandas.Series) for col in INPUT_COLUMNS)
+        ):
+            columns = {col: pandas.Series(data[col]).reset_index(drop=True) for col in INPUT_COLUMNS}
+            clean_numeric, clean_categorical = clean_numeric_series, clean_categorical_series
+        else:
+            columns = {col: data[col] for col in INPUT_COLUMNS}
+            clean_numeric, clean_categorical = clean_numeric_list, clean_categorical_list
+        n_rows = len(columns[INPUT_COLUMNS[0]])
+        if any(len(values) != n_rows for values in columns.values()):
+            raise ValueError("Колонки должны быть одинаковой длины")
+
+        features = np.empty((n_rows, len(FEATURE_COLUMNS)), dtype=np.float32)
+        for col in ("frequency_day", "frequency_day_o"):
+            features[:, FEATURE_COLUMNS.index(col)] = clean_numeric(columns[col])
+        for col in CATEGORICAL_COLUMNS:
+            features[:, FEATURE_COLUMNS.index(col + "_encoded")] = self._encode_many(
+                state, col, clean_categorical(columns[col])
+            )
+
+        if state.cache is None or not n_rows:
+            return self._finalize_many(self._predict_raw_many(state, features))
+        return self._predict_cached_many(state, features)
+
+    @staticmethod
+    def _finalize_many(raw_predictions: np.ndarray) -> np.ndarray:
+        """Клиппинг и округление сырых предсказаний."""
+        # Предсказания модели — float32, поэтому x * 100 точно представимо
+        # во float64 и np.round совпадает со встроенным round() в predict()
+        clipped = np.clip(raw_predictions.astype(np.float64), MARK_MIN, MARK_MAX)
+        return np.round(clipped, 2)
+
+    def _predict_cached_many(self, state: _ModelState, features: np.ndarray) -> np.ndarray:
+        """Предсказания через кэш: каждая уникальная строка ищется в нём один раз."""
+        uniques, inverse = np.unique(features, axis=0, return_inverse=True)
+        keys = [tuple(row) for row in uniques.tolist()]
+
+        results = np.empty(len(uniques), dtype=np.float64)
+        missed = []
+        for idx, key in enumerate(keys):
+            cached = state.cache.get(key)
+            if cached is None:
+                missed.append(idx)
+            else:
+                results[idx] = cached
+
+        if missed:
+            computed = self._finalize_many(self._predict_raw_many(state, uniques[missed]))
+            results[missed] = computed
+            for idx, value in zip(missed, computed.tolist()):
+                state.cache.put(keys[idx], value)
+        return results[inverse.reshape(-1)]
+
+    def _encode_many(
+        self, state: _ModelState, col: str, values: Union["pd.Series", list[Optional[str]]]
+    ) -> np.ndarray:
+        """Кодирует колонку хэш-поиском по словарю; неизвестные заменяются на 0."""
+        aliases = state.vocabularies[col].aliases
+        if isinstance(values, list):
+            codes = np.array([aliases.get(value, np.nan) for value in values], dtype=np.float64)
+        else:
+            codes = np.array(values.map(aliases), dtype=np.float64)
+        unknown = np.isnan(codes)
+        if unknown.any():
+            self._count_unknown(col, int(unknown.sum()))
+            logger.warning(
+                "Неизвестные значения для признака '%s' (%d шт.), заменены на 0: %s",
+                col, int(unknown.sum()),
+                sorted(set(map(str, np.asarray(values, dtype=object)[unknown])))[:10],
+            )
+            codes[unknown] = 0
+        return codes
+
+    @staticmethod
+    def _predict_raw_many(state: _ModelState, features: np.ndarray) -> np.ndarray:
+        """Сырые предсказания: из таблицы для точек сетки, остальное — одним вызовом модели."""
+        raw_predictions = np.empty(len(features), dtype=np.float32)
+        on_grid = np.zeros(len(features), dtype=bool)
+
+        if state.table is not None and len(features):
+            freq_axis = np.asarray(sorted(state.table_freq_index), dtype=np.float32)
+            freq_cols = [FEATURE_COLUMNS.index("frequency_day"), FEATURE_COLUMNS.index("frequency_day_o")]
+            freq_idx = np.searchsorted(freq_axis, features[:, freq_cols]).clip(0, len(freq_axis) - 1)
+            on_grid = (freq_axis[freq_idx] == features[:, freq_cols]).all(axis=1)
+            codes = features[on_grid].astype(np.intp)
+            raw_predictions[on_grid] = state.table[
+                codes[:, FEATURE_COLUMNS.index("tier_encoded")],
+                freq_idx[on_grid, 0],
+                freq_idx[on_grid, 1],
+                codes[:, FEATURE_COLUMNS.index("like_drink_f_encoded")],
+                codes[:, FEATURE_COLUMNS.index("often_drink_f_encoded")],
+            ]
+
+        off_grid = ~on_grid
+        if off_grid.any():
+            raw_predictions[off_grid] = state.model.predict(features[off_grid])
+        return raw_predictions
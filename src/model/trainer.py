@@ -1,8 +1,16 @@
 """Обучение модели XGBoost для предсказания среднего балла."""
 
+import argparse
+import itertools
 import logging
+import math
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Any, Optional
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
 
 import joblib
 import numpy as np
@@ -10,15 +18,19 @@ import pandas as pd
 from sklearn.metrics import mean_squared_error, r2_score
 from sklearn.model_selection import train_test_split, KFold
 from sklearn.preprocessing import LabelEncoder
+import xgboost as xgb
 from xgboost import XGBRegressor
 
 from src.config import (
     DATASET_PATH,
+    FEATURE_CACHE_DIR,
     MODELS_DIR,
     MODEL_PATH,
     MODEL_ALT_PATH,
     ENCODERS_PATH,
     MODEL_INFO_PATH,
+    MODEL_BUNDLE_PATH,
+    PREDICTION_LOG_PATH,
     CATEGORICAL_COLUMNS,
     NUMERIC_COLUMNS,
     FEATURE_COLUMNS,
@@ -29,8 +41,29 @@ from src.config import (
     CV_RANDOM_STATE,
     TEST_SIZE,
     KFOLD_SPLITS,
+    TRAIN_WORKERS,
+    SEARCH_MODE,
+    SEARCH_SPACE,
+    HALVING_CANDIDATES,
+    HALVING_ETA,
+    HALVING_MIN_ROUNDS,
+    HALVING_MAX_ROUNDS,
+    EARLY_STOPPING_ROUNDS,
+    EARLY_STOPPING_FRACTION,
+    TRAIN_CHUNKSIZE,
+    CONTINUE_ROUNDS,
 )
-from src.data.preprocessing import clean_categorical_value, clean_numeric_value
+from src.data.ingestion import (
+    FeatureCache,
+    build_feature_cache,
+    SPLIT_TRAIN,
+    SPLIT_VALID,
+    SPLIT_TEST,
+)
+from src.data.prediction_log import read_prediction_log
+from src.data.preprocessing import clean_categorical_series, clean_numeric_series
+from src.model.bundle import write_bundle
+from src.model.trees import TreeEnsemble
 
 logger = logging.getLogger(__name__)
 
@@ -42,13 +75,81 @@ class ModelInfo:
     test_r2: float
     test_mse: float
     features: list[str] = field(default_factory=lambda: FEATURE_COLUMNS)
+    # Сколько строк CSV видела модель (для дообучения на дописанных строках)
+    dataset_rows: Optional[int] = None
 
 
-class ModelTrainer:
-    """Обучает XGBoost модель с K-Fold кросс-валидацией."""
+class _FeatureCacheIter(xgb.DataIter):
+    """Итератор XGBoost по батчам одной части дискового кэша признаков."""
+
+    def __init__(
+        self, cache: FeatureCache, split: int, batch_rows: int, cache_prefix: str
+    ) -> None:
+        self._cache = cache
+        self._split = split
+        self._batch_rows = batch_rows
+        self._batches: Optional[Iterator[tuple[np.ndarray, np.ndarray]]] = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> bool:
+        if self._batches is None:
+            self._batches = self._cache.iter_batches(self._split, self._batch_rows)
+        batch = next(self._batches, None)
+        if batch is None:
+            return False
+        input_data(data=batch[0], label=batch[1])
+        return True
+
+    def reset(self) -> None:
+        self._batches = None
+
+
+@dataclass
+class _FoldMatrices:
+    """Данные одного фолда, квантованные для XGBoost один раз на всю сетку."""
+    dtrain: xgb.QuantileDMatrix
+    dval: xgb.QuantileDMatrix
+    X_val: pd.DataFrame
+    y_val: pd.Series
+    # Часть обучающих строк фолда для ранней остановки (только в режиме halving)
+    dstop: Optional[xgb.QuantileDMatrix] = None
+
 
-    def __init__(self, dataset_path: str = str(DATASET_PATH)) -> None:
+class ModelTrainer:
+    """Обучает XGBoost модель с K-Fold кросс-валидацией.
+
+    При заданном ``chunksize`` датасет читается потоково в дисковый кэш
+    признаков, а модель обучается на внешней памяти XGBoost
+    с отложенной валидационной частью вместо K-Fold.
+    """
+
+    def __init__(
+        self,
+        dataset_path: str = str(DATASET_PATH),
+        n_workers: int = TRAIN_WORKERS,
+        search_mode: str = SEARCH_MODE,
+        chunksize: Optional[int] = TRAIN_CHUNKSIZE,
+        models_dir: Path = MODELS_DIR,
+        cache_dir: Path = FEATURE_CACHE_DIR,
+        prediction_log_path: Optional[str] = None,
+    ) -> None:
+        if search_mode not in ("grid", "halving"):
+            raise ValueError(f"Неизвестный режим подбора: {search_mode}")
         self.dataset_path: str = dataset_path
+        self.n_workers: int = max(1, n_workers)
+        self.search_mode: str = search_mode
+        self.chunksize: Optional[int] = chunksize
+        self.cache_dir: Path = Path(cache_dir)
+        # Журнал предсказаний бота как дополнительный источник размеченных строк
+        self.prediction_log_path: Optional[str] = prediction_log_path
+        # Артефакты пишутся в models_dir под именами из конфига
+        self.models_dir: Path = Path(models_dir)
+        self.model_path: Path = self.models_dir / MODEL_PATH.name
+        self.model_alt_path: Path = self.models_dir / MODEL_ALT_PATH.name
+        self.encoders_path: Path = self.models_dir / ENCODERS_PATH.name
+        self.model_info_path: Path = self.models_dir / MODEL_INFO_PATH.name
+        self.bundle_path: Path = self.models_dir / MODEL_BUNDLE_PATH.name
+        self.feature_cache: Optional[FeatureCache] = None
         self.df: Optional[pd.DataFrame] = None
         self.label_encoders: dict[str, LabelEncoder] = {}
         self.X_train: Optional[pd.DataFrame] = None
@@ -59,19 +160,36 @@ class ModelTrainer:
         self.best_params: Optional[dict[str, Any]] = None
         self.best_mse: float = float("inf")
         self.best_fold_results: list[dict[str, Any]] = []
+        self.dataset_rows: Optional[int] = None
+        # Разбиение K-Fold и матрицы фолдов (по max_bin и наличию части для
+        # ранней остановки) общие для всех наборов параметров; сбрасываются
+        # при новом split_data()
+        self._splits: Optional[list[tuple[np.ndarray, np.ndarray]]] = None
+        self._fold_matrices: dict[tuple[Optional[int], bool], list[_FoldMatrices]] = {}
 
     # ----- Загрузка и предобработка -----
 
-    def load_data(self) -> pd.DataFrame:
-        """Загружает CSV и выполняет очистку колонок."""
+    def load_data(self, start_row: int = 0) -> pd.DataFrame:
+        """Загружает CSV (начиная со строки данных ``start_row``) и очищает колонки."""
         logger.info("Загрузка данных из %s", self.dataset_path)
-        self.df = pd.read_csv(self.dataset_path)
+        self.df = pd.read_csv(self.dataset_path, skiprows=range(1, start_row + 1))
+        self.dataset_rows = start_row + len(self.df)
+
+        # Журнал добавляется только при полном обучении: при дообучении по
+        # новым строкам CSV его строки попали бы в модель повторно
+        if self.prediction_log_path is not None and start_row == 0:
+            if Path(self.prediction_log_path).exists():
+                logged = read_prediction_log(self.prediction_log_path)
+                logger.info("Строк с фактическим баллом из журнала предсказаний: %d", len(logged))
+                self.df = pd.concat([self.df, logged], ignore_index=True)
+            else:
+                logger.warning("Журнал предсказаний не найден: %s", self.prediction_log_path)
 
         for col in CATEGORICAL_COLUMNS:
-            self.df[col] = self.df[col].apply(clean_categorical_value)
+            self.df[col] = clean_categorical_series(self.df[col])
 
         for col in NUMERIC_COLUMNS:
-            self.df[col] = self.df[col].apply(clean_numeric_value)
+            self.df[col] = clean_numeric_series(self.df[col])
 
         logger.info("Размер до удаления пропусков: %d", len(self.df))
         self.df = self.df.dropna(subset=CATEGORICAL_COLUMNS + NUMERIC_COLUMNS)
@@ -99,6 +217,8 @@ class ModelTrainer:
         self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
             X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE,
         )
+        self._splits = None
+        self._fold_matrices = {}
         logger.info("Обучающая выборка: %s", self.X_train.shape)
         logger.info("Тестовая выборка: %s", self.X_test.shape)
 
@@ -111,54 +231,304 @@ class ModelTrainer:
 
     # ----- Кросс-валидация и обучение -----
 
-    def train_with_kfold(self) -> XGBRegressor:
-        """Обучает модели на сетке параметров с K-Fold кросс-валидацией."""
+    def _kfold_splits(self) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Индексы K-Fold разбиения обучающей выборки (считаются один раз)."""
         if self.X_train is None:
             self.split_data()
 
-        n_splits = min(KFOLD_SPLITS, len(self.X_train) - 1)
-        kf = KFold(n_splits=n_splits, shuffle=True, random_state=CV_RANDOM_STATE)
+        if self._splits is None:
+            n_splits = min(KFOLD_SPLITS, len(self.X_train) - 1)
+            kf = KFold(n_splits=n_splits, shuffle=True, random_state=CV_RANDOM_STATE)
+            self._splits = list(kf.split(self.X_train))
+        return self._splits
+
+    def _fold_data(
+        self, max_bin: Optional[int] = None, early_stopping: bool = False
+    ) -> list[_FoldMatrices]:
+        """Квантованные матрицы фолдов для заданного ``max_bin``.
+
+        Строятся так же, как их строит ``XGBRegressor.fit`` (QuantileDMatrix
+        обучающей части и валидационная с ``ref`` на неё), но один раз на
+        все наборы параметров, а не на каждое обучение. С ``early_stopping``
+        из обучающей части фолда откладывается EARLY_STOPPING_FRACTION строк
+        под раннюю остановку, а валидация фолда в ней не участвует.
+        """
+        key = (max_bin, early_stopping)
+        folds = self._fold_matrices.get(key)
+        if folds is None:
+            folds = []
+            for train_idx, val_idx in self._kfold_splits():
+                stop_idx = None
+                if early_stopping:
+                    train_idx, stop_idx = train_test_split(
+                        train_idx, test_size=EARLY_STOPPING_FRACTION,
+                        random_state=CV_RANDOM_STATE,
+                    )
+                X_fold_val = self.X_train.iloc[val_idx]
+                y_fold_val = self.y_train.iloc[val_idx]
+                dtrain = xgb.QuantileDMatrix(
+                    self.X_train.iloc[train_idx], label=self.y_train.iloc[train_idx],
+                    max_bin=max_bin, nthread=os.cpu_count() or 1,
+                )
+                dval = xgb.QuantileDMatrix(
+                    X_fold_val, label=y_fold_val, ref=dtrain,
+                    max_bin=max_bin, nthread=os.cpu_count() or 1,
+                )
+                dstop = None
+                if stop_idx is not None:
+                    dstop = xgb.QuantileDMatrix(
+                        self.X_train.iloc[stop_idx], label=self.y_train.iloc[stop_idx],
+                        ref=dtrain, max_bin=max_bin, nthread=os.cpu_count() or 1,
+                    )
+                folds.append(_FoldMatrices(dtrain, dval, X_fold_val, y_fold_val, dstop))
+            self._fold_matrices[key] = folds
+        return folds
+
+    def _fit_fold(
+        self,
+        params: dict[str, Any],
+        fold_idx: int,
+        fold: _FoldMatrices,
+        n_threads: int,
+        early_stopping_rounds: Optional[int] = None,
+    ) -> tuple[dict[str, Any], XGBRegressor]:
+        """Обучает модель на одном фолде и считает метрики на валидации.
+
+        При заданном ``early_stopping_rounds`` бустинг останавливается по
+        отложенной части обучающих строк (``fold.dstop``), а метрики
+        считаются на нетронутой валидации фолда.
+        """
+        model = XGBRegressor(
+            **params,
+            random_state=RANDOM_STATE,
+            n_jobs=n_threads,
+            early_stopping_rounds=early_stopping_rounds,
+        )
+        # Те же параметры и раунды, что у model.fit(), но на готовых матрицах фолда
+        booster = xgb.train(
+            model.get_xgb_params(),
+            fold.dtrain,
+            model.get_num_boosting_rounds(),
+            evals=[(fold.dstop, "validation_0")] if early_stopping_rounds is not None else (),
+            early_stopping_rounds=early_stopping_rounds,
+            verbose_eval=False,
+        )
+        model.load_model(bytearray(booster.save_raw()))
 
-        logger.info("K-Fold кросс-валидация (%d фолдов) на %d наборах параметров",
-                     n_splits, len(PARAM_GRID))
+        y_pred = model.predict(fold.X_val)
+        y_pred_clipped = self.clip_predictions(y_pred)
 
-        for params_idx, params in enumerate(PARAM_GRID, 1):
-            logger.info("[%d/%d] Параметры: %s", params_idx, len(PARAM_GRID), params)
+        fold_r2 = r2_score(fold.y_val, y_pred_clipped)
+        fold_mse = mean_squared_error(fold.y_val, y_pred_clipped)
+
+        logger.debug("  Фолд %d: MSE=%.4f, R²=%.4f", fold_idx + 1, fold_mse, fold_r2)
+        return {"fold": fold_idx, "r2": fold_r2, "mse": fold_mse}, model
+
+    def _cross_validate(
+        self,
+        param_list: list[dict[str, Any]],
+        early_stopping_rounds: Optional[int] = None,
+    ) -> Iterator[tuple[dict[str, Any], list[dict[str, Any]], list[XGBRegressor]]]:
+        """Кросс-валидирует наборы параметров, возвращая результаты по порядку.
+
+        Пары (параметры, фолд) обучаются параллельно в ``n_workers`` потоках
+        (XGBoost отпускает GIL на время обучения); результаты отдаются
+        в исходном порядке ``param_list``, поэтому выбор лучшей модели
+        не зависит от числа потоков.
+        """
+        n_workers = min(self.n_workers, len(param_list) * len(self._kfold_splits()))
+        n_threads = max(1, (os.cpu_count() or 1) // n_workers)
+
+        # Матрицы фолдов готовятся до запуска потоков: во время обучения
+        # они только читаются
+        fold_data = {
+            max_bin: self._fold_data(max_bin, early_stopping_rounds is not None)
+            for max_bin in {params.get("max_bin") for params in param_list}
+        }
+
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            # Отправляем все задачи сразу, а разбираем результаты по порядку
+            futures = [
+                [
+                    executor.submit(
+                        self._fit_fold, params, fold_idx, fold,
+                        n_threads, early_stopping_rounds,
+                    )
+                    for fold_idx, fold in enumerate(fold_data[params.get("max_bin")])
+                ]
+                for params in param_list
+            ]
+
+            for params, fold_futures in zip(param_list, futures):
+                results = [future.result() for future in fold_futures]
+                yield params, [score for score, _ in results], [model for _, model in results]
+
+    def _update_best(
+        self,
+        params: dict[str, Any],
+        fold_scores: list[dict[str, Any]],
+        fold_models: list[XGBRegressor],
+    ) -> float:
+        """Запоминает результат, если он лучше текущего; возвращает средний MSE."""
+        avg_mse = float(np.mean([s["mse"] for s in fold_scores]))
+        avg_r2 = float(np.mean([s["r2"] for s in fold_scores]))
+        logger.info("  Среднее: MSE=%.4f | R²=%.4f", avg_mse, avg_r2)
+
+        if avg_mse < self.best_mse:
+            self.best_mse = avg_mse
+            self.best_params = params
+            best_fold_idx = int(np.argmin([s["mse"] for s in fold_scores]))
+            self.best_model = fold_models[best_fold_idx]
+            self.best_fold_results = fold_scores
+            logger.info("  🏆 Новый лучший результат! MSE=%.4f", avg_mse)
+        return avg_mse
 
-            fold_scores: list[dict[str, Any]] = []
-            fold_models: list[XGBRegressor] = []
+    def train_with_kfold(self) -> XGBRegressor:
+        """Обучает модели на сетке параметров с K-Fold кросс-валидацией."""
+        splits = self._kfold_splits()
 
-            for fold_idx, (train_idx, val_idx) in enumerate(kf.split(self.X_train)):
-                X_fold_train = self.X_train.iloc[train_idx]
-                X_fold_val = self.X_train.iloc[val_idx]
-                y_fold_train = self.y_train.iloc[train_idx]
-                y_fold_val = self.y_train.iloc[val_idx]
+        logger.info("K-Fold кросс-валидация (%d фолдов) на %d наборах параметров",
+                     len(splits), len(PARAM_GRID))
 
-                model = XGBRegressor(**params, random_state=RANDOM_STATE)
-                model.fit(X_fold_train, y_fold_train)
+        results = self._cross_validate(PARAM_GRID)
+        for params_idx, (params, fold_scores, fold_models) in enumerate(results, 1):
+            logger.info("[%d/%d] Параметры: %s", params_idx, len(PARAM_GRID), params)
+            self._update_best(params, fold_scores, fold_models)
+
+        return self.best_model
 
-                y_pred = model.predict(X_fold_val)
-                y_pred_clipped = self.clip_predictions(y_pred)
+    @staticmethod
+    def _sample_candidates(n_candidates: int) -> list[dict[str, Any]]:
+        """Кандидаты для successive halving: конфигурации PARAM_GRID плюс
+        детерминированная выборка из SEARCH_SPACE."""
+        candidates: list[dict[str, Any]] = []
+        for params in PARAM_GRID:
+            candidate = {k: v for k, v in params.items() if k != "n_estimators"}
+            if candidate not in candidates:
+                candidates.append(candidate)
+
+        keys = list(SEARCH_SPACE)
+        space = list(itertools.product(*(SEARCH_SPACE[k] for k in keys)))
+        rng = np.random.default_rng(RANDOM_STATE)
+        for idx in rng.permutation(len(space)):
+            if len(candidates) >= n_candidates:
+                break
+            candidate = dict(zip(keys, space[idx]))
+            if candidate not in candidates:
+                candidates.append(candidate)
+        return candidates
+
+    def train_with_halving(self) -> XGBRegressor:
+        """Подбирает параметры successive halving'ом по SEARCH_SPACE.
+
+        На каждом раунде все выжившие кандидаты обучаются на всех фолдах
+        с бюджетом ``n_estimators`` и ранней остановкой по отложенной части
+        обучающих строк фолда (MSE считается по его валидации);
+        дальше проходит лучшая 1/HALVING_ETA часть, а бюджет растёт в
+        HALVING_ETA раз. Лучшая модель выбирается по последнему раунду.
+        """
+        splits = self._kfold_splits()
+        candidates = self._sample_candidates(HALVING_CANDIDATES)
+        budget = HALVING_MIN_ROUNDS
+
+        logger.info("Successive halving (%d фолдов): %d кандидатов, бюджет %d–%d деревьев",
+                     len(splits), len(candidates), HALVING_MIN_ROUNDS, HALVING_MAX_ROUNDS)
+
+        while True:
+            is_last = len(candidates) <= 1 or budget >= HALVING_MAX_ROUNDS
+            logger.info("Раунд: %d кандидатов по %d деревьев", len(candidates), budget)
+
+            param_list = [{**candidate, "n_estimators": budget} for candidate in candidates]
+            scored = []
+            results = self._cross_validate(param_list, EARLY_STOPPING_ROUNDS)
+            for candidate, (params, fold_scores, fold_models) in zip(candidates, results):
+                logger.info("  Параметры: %s", params)
+                if is_last:
+                    avg_mse = self._update_best(params, fold_scores, fold_models)
+                else:
+                    avg_mse = float(np.mean([s["mse"] for s in fold_scores]))
+                    logger.info("  Среднее: MSE=%.4f", avg_mse)
+                scored.append((avg_mse, candidate))
+
+            if is_last:
+                break
+
+            # Стабильная сортировка: при равенстве MSE выигрывает более ранний кандидат
+            n_keep = max(1, math.ceil(len(candidates) / HALVING_ETA))
+            scored.sort(key=lambda item: item[0])
+            candidates = [candidate for _, candidate in scored[:n_keep]]
+            budget = min(budget * HALVING_ETA, HALVING_MAX_ROUNDS)
 
-                fold_r2 = r2_score(y_fold_val, y_pred_clipped)
-                fold_mse = mean_squared_error(y_fold_val, y_pred_clipped)
+        return self.best_model
 
-                fold_scores.append({"fold": fold_idx, "r2": fold_r2, "mse": fold_mse})
-                fold_models.append(model)
+    def train(self) -> XGBRegressor:
+        """Подбирает модель в режиме ``search_mode`` (или на внешней памяти)."""
+        if self.chunksize is not None:
+            return self.train_external_memory()
+        if self.search_mode == "halving":
+            return self.train_with_halving()
+        return self.train_with_kfold()
 
-                logger.debug("  Фолд %d: MSE=%.4f, R²=%.4f", fold_idx + 1, fold_mse, fold_r2)
+    # ----- Обучение на внешней памяти -----
 
-            avg_mse = float(np.mean([s["mse"] for s in fold_scores]))
-            avg_r2 = float(np.mean([s["r2"] for s in fold_scores]))
-            logger.info("  Среднее: MSE=%.4f | R²=%.4f", avg_mse, avg_r2)
+    def build_feature_cache(self) -> FeatureCache:
+        """Потоково строит дисковый кэш признаков и энкодеры по датасету."""
+        self.feature_cache = build_feature_cache(
+            self.dataset_path, self.cache_dir, self.chunksize
+        )
+        self.label_encoders = self.feature_cache.label_encoders()
+        return self.feature_cache
+
+    def _predict_cache_split(
+        self, booster: xgb.Booster, split: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Истинные значения и обрезанные предсказания для части кэша."""
+        y_true, y_pred = [], []
+        for X_batch, y_batch in self.feature_cache.iter_batches(split, self.chunksize):
+            y_true.append(y_batch)
+            y_pred.append(self.clip_predictions(booster.inplace_predict(X_batch)))
+        if not y_true:
+            raise ValueError("В кэше признаков нет строк для оценки")
+        return np.concatenate(y_true), np.concatenate(y_pred)
+
+    def train_external_memory(self) -> XGBRegressor:
+        """Перебирает PARAM_GRID, обучая на внешней памяти XGBoost.
+
+        Обучающая часть кэша подаётся в XGBoost итератором батчей (страницы
+        хранятся на диске), качество оценивается на отложенной валидационной
+        части и записывается как единственный «фолд».
+        """
+        if self.feature_cache is None:
+            self.build_feature_cache()
+
+        logger.info("Обучение на внешней памяти: %d наборов параметров", len(PARAM_GRID))
+        with tempfile.TemporaryDirectory(dir=self.cache_dir) as pages_dir:
+            dtrain = xgb.DMatrix(_FeatureCacheIter(
+                self.feature_cache, SPLIT_TRAIN, self.chunksize,
+                os.path.join(pages_dir, "train"),
+            ))
+
+            for params_idx, params in enumerate(PARAM_GRID, 1):
+                logger.info("[%d/%d] Параметры: %s", params_idx, len(PARAM_GRID), params)
+                native = {k: v for k, v in params.items() if k != "n_estimators"}
+                native.update({
+                    "objective": "reg:squarederror",
+                    "tree_method": "hist",
+                    "seed": RANDOM_STATE,
+                })
+                booster = xgb.train(native, dtrain, num_boost_round=params["n_estimators"])
+
+                y_val, y_pred = self._predict_cache_split(booster, SPLIT_VALID)
+                score = {
+                    "fold": 0,
+                    "r2": r2_score(y_val, y_pred),
+                    "mse": mean_squared_error(y_val, y_pred),
+                }
 
-            if avg_mse < self.best_mse:
-                self.best_mse = avg_mse
-                self.best_params = params
-                best_fold_idx = int(np.argmin([s["mse"] for s in fold_scores]))
-                self.best_model = fold_models[best_fold_idx]
-                self.best_fold_results = fold_scores
-                logger.info("  🏆 Новый лучший результат! MSE=%.4f", avg_mse)
+                model = XGBRegressor(**params, random_state=RANDOM_STATE)
+                model.load_model(bytearray(booster.save_raw("json")))
+                self._update_best(params, [score], [model])
+            del dtrain
 
         return self.best_model
 
@@ -167,13 +537,20 @@ class ModelTrainer:
     def evaluate(self) -> ModelInfo:
         """Оценивает лучшую модель на тестовой выборке."""
         if self.best_model is None:
-            self.train_with_kfold()
+            self.train()
 
-        y_pred = self.best_model.predict(self.X_test)
-        y_pred_clipped = self.clip_predictions(y_pred)
+        if self.feature_cache is not None:
+            y_test, y_pred_clipped = self._predict_cache_split(
+                self.best_model.get_booster(), SPLIT_TEST
+            )
+            final_mse = mean_squared_error(y_test, y_pred_clipped)
+            final_r2 = r2_score(y_test, y_pred_clipped)
+        else:
+            y_pred = self.best_model.predict(self.X_test)
+            y_pred_clipped = self.clip_predictions(y_pred)
 
-        final_mse = mean_squared_error(self.y_test, y_pred_clipped)
-        final_r2 = r2_score(self.y_test, y_pred_clipped)
+            final_mse = mean_squared_error(self.y_test, y_pred_clipped)
+            final_r2 = r2_score(self.y_test, y_pred_clipped)
 
         logger.info("=== Результаты на тестовых данных ===")
         logger.info("MSE:  %.4f", final_mse)
@@ -185,40 +562,210 @@ class ModelTrainer:
             params=self.best_params,
             test_r2=float(final_r2),
             test_mse=float(final_mse),
+            dataset_rows=self.dataset_rows,
         )
 
     # ----- Сохранение -----
 
+    @staticmethod
+    def _atomic_write(path: Path, write: Callable[[str], None]) -> None:
+        """Пишет файл во временный рядом и подменяет его через os.replace.
+
+        Бот следит за файлами модели и не должен увидеть их недописанными.
+        Расширение сохраняется: по нему XGBoost выбирает формат.
+        """
+        tmp_path = path.with_name(f".{path.stem}.tmp{path.suffix}")
+        write(str(tmp_path))
+        os.replace(tmp_path, path)
+
     def save(self, model_info: ModelInfo) -> None:
         """Сохраняет модель, энкодеры и метаинформацию."""
-        MODELS_DIR.mkdir(parents=True, exist_ok=True)
+        self.models_dir.mkdir(parents=True, exist_ok=True)
+
+        self._atomic_write(self.model_path, self.best_model.save_model)
+        self._atomic_write(self.model_alt_path, lambda p: joblib.dump(self.best_model, p))
+        logger.info("Модель сохранена: %s", self.model_path)
+
+        self._atomic_write(self.model_info_path, lambda p: joblib.dump(model_info, p))
+        self._atomic_write(self.encoders_path, lambda p: joblib.dump(self.label_encoders, p))
 
-        self.best_model.save_model(str(MODEL_PATH))
-        joblib.dump(self.best_model, str(MODEL_ALT_PATH))
-        logger.info("Модель сохранена: %s", MODEL_PATH)
+        logger.info("Энкодеры сохранены: %s", self.encoders_path)
+        logger.info("Метаданные сохранены: %s", self.model_info_path)
 
-        joblib.dump(model_info, str(MODEL_INFO_PATH))
-        joblib.dump(self.label_encoders, str(ENCODERS_PATH))
+        self.export_bundle(model_info)
 
-        logger.info("Энкодеры сохранены: %s", ENCODERS_PATH)
-        logger.info("Метаданные сохранены: %s", MODEL_INFO_PATH)
+    def export_bundle(self, model_info: ModelInfo) -> None:
+        """Экспортирует бандл для быстрого старта бота.
+
+        Модель в UBJSON, деревья в плоских массивах для NumPy-инференса и
+        словари категорий простыми списками: бот загружает их без распаковки
+        LabelEncoder'ов, разбора JSON-модели и импорта xgboost.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_file = Path(tmp_dir) / "model.ubj"
+            self.best_model.save_model(str(model_file))
+            model_raw = model_file.read_bytes()
+        trees = TreeEnsemble.from_model_json(
+            bytes(self.best_model.get_booster().save_raw("json"))
+        )
+
+        vocabularies = {
+            col: [str(value) for value in self.label_encoders[col].classes_]
+            for col in CATEGORICAL_COLUMNS
+        }
+        metadata = {
+            # Параметры halving-поиска приходят типами NumPy
+            "params": {
+                key: value.item() if isinstance(value, np.generic) else value
+                for key, value in model_info.params.items()
+            },
+            "test_r2": float(model_info.test_r2),
+            "test_mse": float(model_info.test_mse),
+            "dataset_rows": model_info.dataset_rows,
+            "trees": trees.header(),
+        }
+        sections = {"model": model_raw, **trees.to_sections()}
+        self._atomic_write(
+            self.bundle_path,
+            lambda p: write_bundle(p, vocabularies, list(model_info.features), metadata, sections),
+        )
+        logger.info("Бандл модели сохранён: %s", self.bundle_path)
+
+    def run_export_bundle(self) -> None:
+        """Собирает бандл из уже сохранённых артефактов без переобучения."""
+        self.label_encoders = joblib.load(str(self.encoders_path))
+        self.best_model = XGBRegressor()
+        self.best_model.load_model(str(self.model_path))
+        self.export_bundle(self._saved_model_info())
+
+    # ----- Дообучение -----
+
+    def _saved_model_info(self) -> ModelInfo:
+        """Сохранённая метаинформация о модели."""
+        info = joblib.load(str(self.model_info_path))
+        # Ранние версии сохраняли метаинформацию словарём
+        if isinstance(info, dict):
+            return ModelInfo(
+                params=info["best_params"],
+                test_r2=info["test_r2"],
+                test_mse=info["test_mse"],
+                features=info.get("features", FEATURE_COLUMNS),
+                dataset_rows=info.get("dataset_rows"),
+            )
+        return info
+
+    def _saved_params_and_rows(self) -> tuple[dict[str, Any], Optional[int]]:
+        """Параметры и число строк датасета из сохранённой метаинформации."""
+        info = self._saved_model_info()
+        return info.params, info.dataset_rows
+
+    def run_incremental(self, start_row: Optional[int] = None) -> None:
+        """Дообучает сохранённую модель на строках, дописанных в датасет.
+
+        Новые деревья (CONTINUE_ROUNDS) строятся поверх сохранённого бустера на
+        строках CSV начиная со ``start_row`` (по умолчанию — с числа строк,
+        записанного в метаинформации). Энкодеры не меняются: строки с новыми
+        категориями пропускаются, для них нужно полное переобучение.
+        """
+        params, saved_rows = self._saved_params_and_rows()
+        if start_row is None:
+            if saved_rows is None:
+                raise ValueError(
+                    "В метаинформации модели нет числа строк датасета (модель сохранена "
+                    "до появления дообучения): укажи, с какой строки CSV начинаются "
+                    "новые данные (--start-row N), или один раз переобучи модель "
+                    "полностью (python -m src.model.trainer)"
+                )
+            start_row = saved_rows
+
+        self.label_encoders = joblib.load(str(self.encoders_path))
+        base_model = XGBRegressor()
+        base_model.load_model(str(self.model_path))
+
+        self.load_data(start_row=start_row)
+        known = np.ones(len(self.df), dtype=bool)
+        for col in CATEGORICAL_COLUMNS:
+            known &= self.df[col].isin(self.label_encoders[col].classes_).to_numpy()
+        if not known.all():
+            logger.warning("Пропущено строк с новыми категориями: %d", int((~known).sum()))
+        self.df = self.df[known]
+        if len(self.df) < 2:
+            raise ValueError(f"Недостаточно новых строк для дообучения: {len(self.df)}")
+
+        for col in CATEGORICAL_COLUMNS:
+            self.df[col + "_encoded"] = self.label_encoders[col].transform(self.df[col])
+        X = self.df[FEATURE_COLUMNS].astype(float)
+        y = self.df[NUMERIC_COLUMNS[0]].astype(float)
+        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
+            X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE,
+        )
+        self._splits = None
+        self._fold_matrices = {}
+
+        self.best_params = {**params, "n_estimators": CONTINUE_ROUNDS}
+        logger.info("Дообучение на %d новых строках: +%d деревьев", len(self.df), CONTINUE_ROUNDS)
+        self.best_model = XGBRegressor(**self.best_params, random_state=RANDOM_STATE)
+        base_booster = base_model.get_booster()
+        best_iteration = base_booster.attr("best_iteration")
+        if best_iteration is not None:
+            # Модель после ранней остановки хранит лишние деревья и номер лучшей
+            # итерации: predict() и TreeEnsemble отрезали бы по нему и новые деревья
+            base_booster = base_booster[: int(best_iteration) + 1]
+            base_booster.set_attr(best_iteration=None, best_score=None)
+        self.best_model.fit(self.X_train, self.y_train, xgb_model=base_booster)
+
+        info = self.evaluate()
+        self.save(info)
+        logger.info("Дообучение завершено. MSE на новых тестовых строках: %.4f", info.test_mse)
 
     # ----- Полный пайплайн -----
 
     def run(self) -> None:
         """Запускает полный пайплайн: загрузка → обучение → оценка → сохранение."""
-        self.load_data()
-        self.split_data()
-        self.train_with_kfold()
+        if self.chunksize is not None:
+            if self.prediction_log_path is not None:
+                logger.warning(
+                    "Потоковое обучение читает только CSV, журнал предсказаний не используется"
+                )
+            self.build_feature_cache()
+        else:
+            self.load_data()
+            self.split_data()
+        self.train()
         info = self.evaluate()
         self.save(info)
         logger.info("Обучение завершено. MSE на тесте: %.4f", info.test_mse)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Обучение модели ForecastMark")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--continue", dest="incremental", action="store_true",
+                      help="дообучить сохранённую модель на новых строках датасета")
+    mode.add_argument("--bundle", action="store_true",
+                      help="собрать бандл из сохранённых артефактов без обучения")
+    parser.add_argument("--start-row", type=int, default=None,
+                        help="с --continue: первая новая строка данных CSV "
+                             "(по умолчанию — из метаинформации модели)")
+    parser.add_argument("--with-prediction-log", action="store_true",
+                        help="добавить к датасету размеченные строки журнала предсказаний")
+    args = parser.parse_args()
+    if args.start_row is not None and not args.incremental:
+        parser.error("--start-row используется только с --continue")
+
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     )
-    trainer = ModelTrainer()
-    trainer.run()
+    log_path = PREDICTION_LOG_PATH if args.with_prediction_log else ""
+    trainer = ModelTrainer(prediction_log_path=log_path or None)
+    if args.incremental:
+        try:
+            trainer.run_incremental(start_row=args.start_row)
+        except ValueError as e:
+            logger.error("%s", e)
+            sys.exit(1)
+    elif args.bundle:
+        trainer.run_export_bundle()
+    else:
+        trainer.run()
@@ -0,0 +1,207 @@
+"""Вычисление ансамбля деревьев XGBoost на чистом NumPy.
+
+Деревья из JSON-дампа модели раскладываются в плоские массивы (признак,
+порог, потомки, направление для пропусков, значения листьев), а батч
+прогоняется по всем деревьям сразу: на каждом уровне один векторный шаг
+для матрицы узлов «строка × дерево». Результат совпадает с
+``XGBRegressor.predict``: сравнение и суммирование листьев идут во float32
+в том же порядке, что и в XGBoost.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Целевые функции с тождественной связью: предсказание = base_score + сумма листьев
+_IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror"}
+
+# Строк в одном блоке вычисления: ограничивает матрицу узлов в памяти
+_BLOCK_ROWS: int = 4096
+
+# Массивы ансамбля и их типы (порядок — порядок секций бандла)
+TREE_ARRAYS: dict[str, np.dtype] = {
+    "feature": np.dtype(np.int32),
+    "threshold": np.dtype(np.float32),
+    "left": np.dtype(np.int32),
+    "right": np.dtype(np.int32),
+    "default_left": np.dtype(np.bool_),
+    "value": np.dtype(np.float32),
+    "roots": np.dtype(np.int32),
+}
+
+
+@dataclass
+class TreeEnsemble:
+    """Плоское представление ансамбля деревьев.
+
+    Узлы всех деревьев лежат подряд; ``left``/``right`` — глобальные индексы
+    потомков. Переход из листа ведёт в него же, а ``value`` хранит значения
+    листьев, поэтому все деревья проходятся за ``max_depth`` шагов без
+    ветвлений.
+    """
+    feature: np.ndarray
+    threshold: np.ndarray
+    left: np.ndarray
+    right: np.ndarray
+    default_left: np.ndarray
+    value: np.ndarray
+    roots: np.ndarray
+    base_score: float
+    max_depth: int
+    n_features: int
+
+    @classmethod
+    def from_model_json(cls, model: Union[dict[str, Any], bytes, str]) -> "TreeEnsemble":
+        """Собирает ансамбль из JSON-модели XGBoost (словарь, байты или текст).
+
+        Учитывает ``best_iteration`` — как и ``XGBRegressor.predict``, берутся
+        только деревья до лучшей итерации ранней остановки.
+        """
+        if not isinstance(model, dict):
+            model = json.loads(model)
+        learner = model["learner"]
+
+        objective = learner["objective"]["name"]
+        if objective not in _IDENTITY_OBJECTIVES:
+            raise ValueError(f"Целевая функция не поддерживается: {objective}")
+        model_param = learner["learner_model_param"]
+        if int(model_param.get("num_target", 1)) != 1 or int(model_param.get("num_class", 0)) > 1:
+            raise ValueError("Поддерживается только регрессия с одной целью")
+        booster = learner["gradient_booster"]
+        if booster["name"] != "gbtree":
+            raise ValueError(f"Бустер не поддерживается: {booster['name']}")
+
+        trees = booster["model"]["trees"]
+        best_iteration = learner.get("attributes", {}).get("best_iteration")
+        if best_iteration is not None:
+            indptr = booster["model"]["iteration_indptr"]
+            trees = trees[:indptr[int(best_iteration) + 1]]
+
+        parts: dict[str, list[np.ndarray]] = {name: [] for name in TREE_ARRAYS}
+        offset, max_depth = 0, 0
+        for tree in trees:
+            if any(tree["split_type"]):
+                raise ValueError("Категориальные разбиения не поддерживаются")
+            left = np.asarray(tree["left_children"], dtype=np.int32)
+            right = np.asarray(tree["right_children"], dtype=np.int32)
+            leaf = left == -1
+            nodes = np.arange(len(left), dtype=np.int32) + offset
+
+            # Значение листа хранится в split_conditions
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            parts["feature"].append(np.where(leaf, 0, tree["split_indices"]).astype(np.int32))
+            parts["threshold"].append(np.where(leaf, 0, conditions).astype(np.float32))
+            parts["left"].append(np.where(leaf, nodes, left + offset).astype(np.int32))
+            parts["right"].append(np.where(leaf, nodes, right + offset).astype(np.int32))
+            parts["default_left"].append(np.asarray(tree["default_left"], dtype=bool))
+            parts["value"].append(np.where(leaf, conditions, 0).astype(np.float32))
+            parts["roots"].append(np.asarray([offset], dtype=np.int32))
+
+            max_depth = max(max_depth, _tree_depth(left, right))
+            offset += len(left)
+
+        arrays = {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtype=TREE_ARRAYS[name])
+            for name, chunks in parts.items()
+        }
+        # В новых версиях XGBoost base_score записан списком: "[4.15973E0]"
+        base_score = float(model_param["base_score"].strip("[]"))
+        ensemble = cls(
+            **arrays,
+            base_score=base_score,
+            max_depth=max_depth,
+            n_features=int(model_param["num_feature"]),
+        )
+        logger.info(
+            "Ансамбль скомпилирован: %d деревьев, %d узлов, глубина %d",
+            len(ensemble.roots), len(ensemble.value), max_depth,
+        )
+        return ensemble
+
+    def to_sections(self) -> dict[str, bytes]:
+        """Массивы ансамбля как бинарные секции бандла."""
+        return {
+            f"trees.{name}": np.ascontiguousarray(getattr(self, name), dtype=dtype).tobytes()
+            for name, dtype in TREE_ARRAYS.items()
+        }
+
+    def header(self) -> dict[str, Any]:
+        """Скалярные параметры ансамбля для заголовка бандла."""
+        return {
+            "base_score": self.base_score,
+            "max_depth": self.max_depth,
+            "n_features": self.n_features,
+        }
+
+    @classmethod
+    def from_sections(
+        cls, header: dict[str, Any], section: Callable[[str], memoryview], copy: bool = True
+    ) -> "TreeEnsemble":
+        """Восстанавливает ансамбль из секций бандла.
+
+        По умолчанию массивы копируются, а представления освобождаются сразу —
+        иначе отображённый файл бандла нельзя было бы закрыть. С ``copy=False``
+        массивы только для чтения смотрят прямо в mmap: страницы файла делятся
+        между процессами через page cache, а отображение живёт, пока живут массивы.
+        """
+        arrays = {}
+        for name, dtype in TREE_ARRAYS.items():
+            if copy:
+                with section(f"trees.{name}") as view:
+                    arrays[name] = np.frombuffer(view, dtype=dtype).copy()
+            else:
+                arrays[name] = np.frombuffer(section(f"trees.{name}"), dtype=dtype)
+        return cls(
+            **arrays,
+            base_score=float(header["base_score"]),
+            max_depth=int(header["max_depth"]),
+            n_features=int(header["n_features"]),
+        )
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Предсказания для матрицы признаков (строки × n_features), float32."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Ожидается матрица с {self.n_features} признаками, получено {X.shape}"
+            )
+        out = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), _BLOCK_ROWS):
+            out[start:start + _BLOCK_ROWS] = self._predict_block(X[start:start + _BLOCK_ROWS])
+        return out
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_trees = len(X), len(self.roots)
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * self.n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, n_trees))
+        for _ in range(self.max_depth):
+            values = flat_X.take(row_offsets + self.feature.take(nodes))
+            # Влево при x < порога; пропуск идёт по направлению по умолчанию
+            go_left = values < self.threshold.take(nodes)
+            missing = np.isnan(values)
+            if missing.any():
+                go_left[missing] = self.default_left.take(nodes[missing])
+            nodes = np.where(go_left, self.left.take(nodes), self.right.take(nodes))
+
+        # Листья суммируются по порядку деревьев во float32, как в XGBoost:
+        # accumulate, в отличие от sum, складывает строго последовательно
+        leaves = np.empty((n_rows, n_trees + 1), dtype=np.float32)
+        leaves[:, 0] = self.base_score
+        leaves[:, 1:] = self.value.take(nodes)
+        return np.add.accumulate(leaves, axis=1)[:, -1]
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    """Глубина дерева (число рёбер на самом длинном пути от корня)."""
+    depth, level = 0, [0]
+    while True:
+        level = [child for node in level for child in (left[node], right[node]) if child != -1]
+        if not level:
+            return depth
+        depth += 1
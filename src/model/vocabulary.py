@@ -0,0 +1,97 @@
+"""Неизменяемые словари категориальных признаков модели."""
+
+import difflib
+import re
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+from src.data.preprocessing import clean_categorical_value
+
+_DIGITS = re.compile(r"\d+")
+
+
+@dataclass(frozen=True)
+class Vocabulary:
+    """Словарь признака: значение ↔ код с поиском за O(1).
+
+    Код значения — его позиция в ``values`` (как в ``LabelEncoder.classes_``).
+    Кроме точного значения, код находится по нормализованной форме
+    ``clean_categorical_value``: «  Вино» и «ВИНО» дают код «вино».
+    """
+    values: tuple[str, ...]
+    codes: Mapping[str, int]
+    aliases: Mapping[str, int]
+    value_set: frozenset[str]
+
+    @classmethod
+    def from_values(cls, values: Iterable[str]) -> "Vocabulary":
+        values = tuple(values)
+        codes = {value: code for code, value in enumerate(values)}
+        aliases = {}
+        for value, code in codes.items():
+            alias = clean_categorical_value(value)
+            if alias is not None:
+                # При совпадении нормализованных форм побеждает первое значение
+                aliases.setdefault(alias, code)
+        return cls(
+            values=values,
+            codes=MappingProxyType(codes),
+            aliases=MappingProxyType(aliases),
+            value_set=frozenset(values),
+        )
+
+    def code(self, value: Optional[str]) -> Optional[int]:
+        """Код значения (точного или нормализованного) или None, если его нет."""
+        if value is None:
+            return None
+        code = self.codes.get(value)
+        if code is None:
+            alias = clean_categorical_value(value)
+            code = self.aliases.get(alias) if alias is not None else None
+        return code
+
+    def canonical(self, value: Optional[str]) -> Optional[str]:
+        """Значение словаря, которому соответствует ввод, или None."""
+        code = self.code(value)
+        return None if code is None else self.values[code]
+
+    def closest(
+        self, value: Optional[str], cutoff: float = 0.75, margin: float = 0.05
+    ) -> Optional[str]:
+        """Значение словаря для ввода с опечатками: точное, нормализованное
+        или ближайшее по ``difflib`` с похожестью не ниже ``cutoff``.
+
+        Ближайшее принимается, только если оно похоже на ввод хотя бы на
+        ``margin`` больше второго кандидата, а числа в нём те же, что во
+        вводе: «7 курс» не превращается в «6 курс».
+        """
+        canonical = self.canonical(value)
+        if canonical is not None or value is None:
+            return canonical
+        alias = clean_categorical_value(value)
+        if alias is None:
+            return None
+
+        numbers = _DIGITS.findall(alias)
+        matcher = difflib.SequenceMatcher(b=alias)
+        scores = []
+        for candidate in self.aliases:
+            matcher.set_seq1(candidate)
+            scores.append((matcher.ratio(), candidate))
+        scores.sort(reverse=True)
+
+        if not scores or scores[0][0] < cutoff:
+            return None
+        best_score, best = scores[0]
+        if len(scores) > 1 and best_score - scores[1][0] < margin:
+            return None
+        if _DIGITS.findall(best) != numbers:
+            return None
+        return self.values[self.aliases[best]]
+
+    def __contains__(self, value: object) -> bool:
+        return isinstance(value, str) and self.code(value) is not None
+
+    def __len__(self) -> int:
+        return len(self.values)
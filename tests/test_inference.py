@@ -0,0 +1,64 @@
+"""Очередь инференса: батчи считаются вне event loop, остановка не теряет запросы."""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from src.bot.inference import InferenceQueue
+from src.config import INPUT_COLUMNS
+
+
+class FakePredictor:
+    """Предиктор-заглушка: балл — сумма частот; запоминает потоки расчёта."""
+
+    def __init__(self) -> None:
+        self.threads: set[int] = set()
+
+    def predict(self, tier, frequency_day, frequency_day_o, like_drink_f, often_drink_f) -> float:
+        self.threads.add(threading.get_ident())
+        return float(frequency_day + frequency_day_o)
+
+    def predict_many(self, data: dict[str, list]) -> np.ndarray:
+        self.threads.add(threading.get_ident())
+        assert set(data) == set(INPUT_COLUMNS)
+        return np.asarray(data["frequency_day"], dtype=float) + data["frequency_day_o"]
+
+
+def _request(queue: InferenceQueue, value: int):
+    return queue.predict("1 курс", value, 1, "вино", "вода")
+
+
+@pytest.mark.parametrize("n_requests", [1, 5, 40])
+def test_batches_run_off_the_event_loop(n_requests: int) -> None:
+    predictor = FakePredictor()
+
+    async def main() -> list[float]:
+        queue = InferenceQueue(predictor, max_batch_size=16, max_wait=0.01)
+        queue.start()
+        try:
+            return await asyncio.gather(*(_request(queue, i) for i in range(n_requests)))
+        finally:
+            await queue.stop()
+
+    assert asyncio.run(main()) == [float(i + 1) for i in range(n_requests)]
+    assert threading.get_ident() not in predictor.threads
+
+
+def test_stop_during_collection_cancels_collected_requests() -> None:
+    async def main() -> None:
+        queue = InferenceQueue(FakePredictor(), max_batch_size=16, max_wait=10.0)
+        queue.start()
+        requests = [asyncio.ensure_future(_request(queue, i)) for i in range(3)]
+        # Запросы сняты с очереди и ждут добора батча
+        await asyncio.sleep(0.05)
+        assert queue._queue.empty()
+
+        await asyncio.wait_for(queue.stop(), timeout=1.0)
+        done, pending = await asyncio.wait(requests, timeout=1.0)
+        assert not pending
+        assert all(request.cancelled() for request in done)
+
+    asyncio.run(main())
+
@@ -0,0 +1,44 @@
+"""Разбор строки /predict: курс по номеру, опечатки в напитках."""
+
+import pytest
+
+from src.bot import handlers
+from src.config import MODEL_BUNDLE_PATH
+from src.model.predictor import MarkPredictor
+
+
+@pytest.fixture(scope="module", autouse=True)
+def predictor() -> MarkPredictor:
+    predictor = MarkPredictor.from_bundle(str(MODEL_BUNDLE_PATH))
+    handlers.init_handlers(predictor)
+    return predictor
+
+
+@pytest.mark.parametrize("tier, expected", [
+    ("1 курс", "1 курс"),
+    ("6 КУРС", "6 курс"),
+    ("3", "3 курс"),
+    ("3-й курс", "3 курс"),
+    ("аспирнтура", "аспирантура"),
+])
+def test_tier_resolved_by_value_or_number(tier: str, expected: str) -> None:
+    features, error, _ = handlers._parse_predict_line(f"{tier}; вино; 2; вода; 5")
+    assert error is None
+    assert features["tier"] == expected
+
+
+@pytest.mark.parametrize("tier", ["7 курс", "9 курс", "0", "курс"])
+def test_unknown_tier_number_rejected(tier: str) -> None:
+    features, error, _ = handlers._parse_predict_line(f"{tier}; вино; 2; вода; 5")
+    assert features is None
+    assert error == f"курс: «{tier}» не найден"
+
+
+def test_corrections_are_reported() -> None:
+    features, error, corrections = handlers._parse_predict_line("3; вада; 2; ВОДА; 5")
+    assert error is None
+    assert features["like_drink_f"] == "вода"
+    # Регистр — не исправление, опечатка и номер курса — исправления
+    assert corrections == {"tier": "3", "like_drink_f": "вада"}
+    assert handlers._shown(features, corrections, "like_drink_f") == "вада → вода"
+    assert handlers._shown(features, corrections, "often_drink_f") == "вода"
@@ -0,0 +1,102 @@
+"""Журнал предсказаний: фактические баллы по id строк доходят до тренера."""
+
+import asyncio
+import csv
+import io
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src.config import DATASET_PATH
+from src.data.prediction_log import (
+    PredictionLogWriter,
+    PredictionRecord,
+    label_predictions,
+    main,
+    read_prediction_log,
+)
+from src.model.trainer import ModelTrainer
+
+
+FEATURES = [
+    {"tier": "1 курс", "frequency_day": 2, "frequency_day_o": 3,
+     "like_drink_f": "виски", "often_drink_f": "кола"},
+    {"tier": "6 курс", "frequency_day": 5, "frequency_day_o": 1,
+     "like_drink_f": "водка", "often_drink_f": "вода"},
+    {"tier": "2 курс", "frequency_day": 1, "frequency_day_o": 4,
+     "like_drink_f": "пиво", "often_drink_f": "вода"},
+]
+
+
+@pytest.fixture
+def log_path(tmp_path: Path) -> str:
+    """Журнал с тремя предсказаниями без фактического балла (id 1–3)."""
+    path = str(tmp_path / "prediction_log.db")
+
+    async def write() -> None:
+        writer = PredictionLogWriter(path, batch_size=100, flush_interval=60.0)
+        await writer.start()
+        for features in FEATURES:
+            writer.log(PredictionRecord.from_prediction(features, 4.0, "v1", 0.001))
+        await writer.stop()
+
+    asyncio.run(write())
+    return path
+
+
+def test_label_predictions_sets_mark_by_id(log_path: str) -> None:
+    assert read_prediction_log(log_path).empty
+
+    assert label_predictions(log_path, {2: 3.5, 99: 4.0}) == [99]
+
+    labeled = read_prediction_log(log_path)
+    assert labeled.to_dict("records") == [{**FEATURES[1], "mark": 3.5}]
+    assert len(read_prediction_log(log_path, labeled_only=False)) == len(FEATURES)
+
+
+def test_label_predictions_rejects_out_of_range_mark(log_path: str) -> None:
+    with pytest.raises(ValueError):
+        label_predictions(log_path, {1: 4.0, 2: 7.0})
+    assert read_prediction_log(log_path).empty
+
+
+def test_cli_pending_and_label_roundtrip(log_path: str, capsys, tmp_path: Path) -> None:
+    assert main(["--path", log_path, "pending"]) == 0
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [row["id"] for row in rows] == ["1", "2", "3"]
+
+    # Заполняем балл в выгрузке для первой строки, третью — аргументом
+    rows[0]["mark"] = "4,5"
+    filled = tmp_path / "pending.csv"
+    with open(filled, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    assert main(["--path", log_path, "label", "--csv", str(filled), "3=2.5"]) == 0
+
+    marks = read_prediction_log(log_path)["mark"].tolist()
+    assert marks == [4.5, 2.5]
+
+    assert main(["--path", log_path, "pending"]) == 0
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [row["id"] for row in rows] == ["2"]
+
+
+def test_labeled_rows_reach_trainer(log_path: str, tmp_path: Path) -> None:
+    dataset = tmp_path / "drinks.csv"
+    shutil.copy(DATASET_PATH, dataset)
+    base_rows = len(ModelTrainer(dataset_path=str(dataset), models_dir=tmp_path).load_data())
+
+    trainer = ModelTrainer(
+        dataset_path=str(dataset), models_dir=tmp_path, prediction_log_path=log_path,
+    )
+    assert len(trainer.load_data()) == base_rows
+
+    label_predictions(log_path, {1: 4.5, 3: 2.5})
+    df = trainer.load_data()
+    assert len(df) == base_rows + 2
+    assert df.tail(2)[["tier", "like_drink_f", "mark"]].to_dict("records") == [
+        {"tier": "1 курс", "like_drink_f": "виски", "mark": 4.5},
+        {"tier": "2 курс", "like_drink_f": "пиво", "mark": 2.5},
+    ]
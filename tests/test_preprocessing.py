@@ -0,0 +1,114 @@
+"""Векторная очистка колонок совпадает со скалярной построчно."""
+
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.preprocessing import (
+    clean_categorical_list,
+    clean_categorical_series,
+    clean_categorical_value,
+    clean_numeric_list,
+    clean_numeric_series,
+    clean_numeric_value,
+)
+
+
+NUMERIC_CASES = {
+    "strings": ["2", "3.5", "4", " 5 ", "10", "0", "abc", "", "1.2.3"],
+    "comma_decimals": ["2,5", "3,75", " 4,0 ", ",5", "4,"],
+    "negatives": ["-3", "-2,5", "-0", -4, -3.5, -0.0],
+    "exponents": ["1e1", "2E-1", "3e+0", 1e-5, 2.5e-7, 1e16, 3e20, -1e-5],
+    "float_exponents": [1e-5, 2.5e-7, 9.9e-5, 1e-4, 1e16, 3e20, -1e-5, 0.0, -0.0, 3.0],
+    "missing": [None, np.nan, pd.NA, "", None, "3"],
+    "mixed_objects": [
+        1, "2,5", None, True, 3.7, "abc", np.int64(4), np.float32(2.5), Decimal("3.25"),
+    ],
+    "ints": [0, 1, 2, 3, 5, 7, 100],
+    "floats_with_nan": [2.0, np.nan, 3.5, 4.25, np.nan],
+}
+
+CATEGORICAL_CASES = {
+    "strings": ["вино", "пиво", "вода", "вино"],
+    "whitespace_case": ["Вино", " вино ", "ВИНО", "\tВино\n", "вИнО"],
+    "empty": ["", "   ", "\t"],
+    "missing": [None, np.nan, pd.NA, "чай", None],
+    "mixed_objects": [1, 1.0, True, "1", "True", np.int64(2), None],
+}
+
+
+def _series_cases(cases: dict[str, list]) -> list:
+    """Каждый набор значений — колонкой object и, где возможно, колонкой своего dtype."""
+    params = []
+    for name, values in cases.items():
+        params.append(pytest.param(pd.Series(values, dtype=object), id=f"{name}-object"))
+        inferred = pd.Series(values)
+        if inferred.dtype != object:
+            params.append(pytest.param(inferred, id=f"{name}-{inferred.dtype}"))
+    return params
+
+
+def _assert_numeric_equal(actual: list[float], expected: list[float]) -> None:
+    assert np.array_equal(np.asarray(actual, dtype=float), np.asarray(expected, dtype=float))
+
+
+# ----- Числовые колонки -----
+
+@pytest.mark.parametrize("values", _series_cases(NUMERIC_CASES))
+def test_clean_numeric_series_matches_scalar(values: pd.Series) -> None:
+    expected = [clean_numeric_value(value) for value in values]
+    _assert_numeric_equal(clean_numeric_series(values).tolist(), expected)
+
+
+@pytest.mark.parametrize("values", _series_cases(NUMERIC_CASES))
+def test_clean_numeric_series_custom_default(values: pd.Series) -> None:
+    expected = [clean_numeric_value(value, default=2.5) for value in values]
+    _assert_numeric_equal(clean_numeric_series(values, default=2.5).tolist(), expected)
+
+
+def test_clean_numeric_series_keeps_index() -> None:
+    values = pd.Series(["2,5", None, "4"], index=[10, 20, 30])
+    assert clean_numeric_series(values).index.tolist() == [10, 20, 30]
+
+
+@pytest.mark.parametrize("name", NUMERIC_CASES)
+def test_clean_numeric_list_matches_scalar(name: str) -> None:
+    values = NUMERIC_CASES[name]
+    _assert_numeric_equal(clean_numeric_list(values), [clean_numeric_value(v) for v in values])
+
+
+def test_clean_numeric_list_distinguishes_equal_values() -> None:
+    # Равные значения разных типов (и Decimal с разной записью) очищаются по-разному
+    values = [1, 1.0, True, 2.0, Decimal("2"), Decimal("2E+0"), np.float64(2.0), 2]
+    _assert_numeric_equal(clean_numeric_list(values), [clean_numeric_value(v) for v in values])
+
+
+def test_clean_numeric_list_accepts_ndarray() -> None:
+    values = np.array([1.5, np.nan, 3.0, -4.0, 1e20])
+    _assert_numeric_equal(clean_numeric_list(values), [clean_numeric_value(v) for v in values])
+
+
+# ----- Категориальные колонки -----
+
+@pytest.mark.parametrize("values", _series_cases(CATEGORICAL_CASES))
+def test_clean_categorical_series_matches_scalar(values: pd.Series) -> None:
+    expected = [clean_categorical_value(value) for value in values]
+    assert clean_categorical_series(values).tolist() == expected
+
+
+def test_clean_categorical_series_keeps_index() -> None:
+    values = pd.Series([" Вино", None], index=[5, 7])
+    assert clean_categorical_series(values).index.tolist() == [5, 7]
+
+
+@pytest.mark.parametrize("name", CATEGORICAL_CASES)
+def test_clean_categorical_list_matches_scalar(name: str) -> None:
+    values = CATEGORICAL_CASES[name]
+    assert clean_categorical_list(values) == [clean_categorical_value(v) for v in values]
+
+
+def test_clean_categorical_list_accepts_ndarray() -> None:
+    values = np.array(["Вино ", "ВОДА", ""])
+    assert clean_categorical_list(values) == ["вино", "вода", None]
@@ -0,0 +1,74 @@
+"""Хранилища сессий: вытеснение LRU, pop в SQLite, короткое ожидание блокировки."""
+
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from src.bot.sessions import MemorySessionStore, Session, SQLiteSessionStore
+
+
+def test_memory_store_evicts_least_recently_used() -> None:
+    store = MemorySessionStore(max_size=2)
+    store.save(1, Session(step=1))
+    store.save(2, Session(step=1))
+    # Чтение делает сессию 1 самой свежей: вытесняется 2
+    assert store.get(1) is not None
+    store.save(3, Session(step=1))
+
+    assert 1 in store and 3 in store
+    assert 2 not in store
+    assert store.stats.evictions == 1
+
+
+def test_memory_store_expires_by_ttl() -> None:
+    store = MemorySessionStore(ttl=0.01)
+    store.save(1, Session(step=2))
+    time.sleep(0.02)
+    assert store.get(1) is None
+    assert store.stats.expirations == 1
+
+
+@pytest.fixture
+def sqlite_store(tmp_path: Path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), busy_timeout=0.1)
+    yield store
+    store.close()
+
+
+def test_sqlite_store_roundtrip_and_pop(sqlite_store: SQLiteSessionStore) -> None:
+    sqlite_store.save(7, Session(step=3, tier="1 курс", frequency_day=2))
+    session = sqlite_store.get(7)
+    assert session.to_dict() == {"step": 3, "tier": "1 курс", "frequency_day": 2}
+
+    popped = sqlite_store.pop(7)
+    assert popped.to_dict() == session.to_dict()
+    assert sqlite_store.get(7) is None
+    assert sqlite_store.pop(7, None) is None
+    assert len(sqlite_store) == 0
+
+
+def test_sqlite_store_does_not_wait_long_for_lock(
+    sqlite_store: SQLiteSessionStore, tmp_path: Path
+) -> None:
+    sqlite_store.save(1, Session(step=1))
+    # Другой процесс (шард) держит блокировку записи
+    other = sqlite3.connect(str(tmp_path / "sessions.db"), isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        # Чтение в WAL не блокируется
+        assert sqlite_store.get(1) is not None
+
+        start = time.perf_counter()
+        with pytest.raises(sqlite3.OperationalError):
+            sqlite_store.save(2, Session(step=1))
+        with pytest.raises(sqlite3.OperationalError):
+            sqlite_store.pop(1)
+        assert time.perf_counter() - start < 1.0
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    # После неудачи соединение пригодно: транзакция pop откатилась
+    assert sqlite_store.pop(1).to_dict() == {"step": 1}
@@ -0,0 +1,42 @@
+"""Поиск значений словаря: нормализация и исправление опечаток."""
+
+import pytest
+
+from src.model.vocabulary import Vocabulary
+
+
+TIERS = Vocabulary.from_values(["1 курс", "2 курс", "6 курс", "аспирантура"])
+DRINKS = Vocabulary.from_values(
+    ["вино", "вода", "водка", "кофе латте", "кофе матча латте", "чёрный чай", "зелёный чай"]
+)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("вино", "вино"),
+    ("  ВИНО ", "вино"),
+    ("вада", "вода"),
+    ("водк", "водка"),
+    ("черный чай", "чёрный чай"),
+    ("кофе лате", "кофе латте"),
+])
+def test_closest_fixes_typos(raw: str, expected: str) -> None:
+    assert DRINKS.closest(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["7 курс", "9 курс", "3 курс", "курс"])
+def test_closest_does_not_change_numbers(raw: str) -> None:
+    assert TIERS.closest(raw) is None
+
+
+def test_closest_rejects_ambiguous_match() -> None:
+    # Одинаково похоже на оба напитка — угадывать нельзя
+    drinks = Vocabulary.from_values(["чай зелёный", "чай чёрный"])
+    assert drinks.closest("чай зелный", margin=0.05) == "чай зелёный"
+    assert drinks.closest("чай", margin=0.05) is None
+
+
+def test_closest_unknown_and_empty() -> None:
+    assert DRINKS.closest("абракадабра") is None
+    assert DRINKS.closest("   ") is None
+    assert DRINKS.closest(None) is None
+    assert TIERS.closest("аспирнтура") == "аспирантура"